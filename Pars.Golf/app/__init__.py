@@ -1,15 +1,24 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_login import LoginManager
-from flask_mail import Mail
 from config import Config
+from app.utils.cache import Cache
+from app.utils.instrumentation import Instrumentation
+from app.utils.metrics import Metrics
+from app.utils.storage import Storage
+from app.utils.migrations import Migrations
+from app.utils.templates import Templates
+from app.utils.routing import RoutingSession, stick_to_primary
 
-db = SQLAlchemy()
-migrate = Migrate()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+migrate = Migrations()
 login = LoginManager()
 login.login_view = 'auth.login'
-mail = Mail()
+cache = Cache()
+instrumentation = Instrumentation()
+metrics = Metrics()
+storage = Storage()
+templates = Templates()
 
 def create_app(config_class=Config):
     app = Flask(__name__)
@@ -18,14 +27,31 @@ def create_app(config_class=Config):
     db.init_app(app)
     migrate.init_app(app, db)
     login.init_app(app)
-    mail.init_app(app)
+    cache.init_app(app)
+    instrumentation.init_app(app)
+    metrics.init_app(app)
+    storage.init_app(app)
+    templates.init_app(app)
+    app.after_request(stick_to_primary)
     
-    from app.routes import main, auth, clubs, players, courses
+    # Every model, including those only lazily imported code uses (SyncPage), so
+    # create_all() and migrations see all the tables
+    from app.models import user, content, job, sync
+    from app.routes import main, auth, clubs, players, courses, jobs, api
     app.register_blueprint(main.bp)
     app.register_blueprint(auth.bp)
     app.register_blueprint(clubs.bp)
     app.register_blueprint(players.bp)
     app.register_blueprint(courses.bp)
+    app.register_blueprint(jobs.bp)
+    app.register_blueprint(api.bp)
+
+    from app.utils.images import srcset, picture
+    app.add_template_global(srcset)
+    app.add_template_global(picture)
+
+    from app.utils.votes import vote_buffer
+    vote_buffer.init_app(app)
     
     return app
 
@@ -1,5 +1,16 @@
 from app import db
+from collections import Counter
 from datetime import datetime
+from sqlalchemy.dialects import postgresql, sqlite
+
+def partial_index(name, *columns, where):
+    """An index over the rows matching where, on both PostgreSQL and SQLite.
+
+    The condition has to render exactly like the queries' own filter (e.g. the
+    'approved = 1' that filter_by(approved=True) produces on SQLite), or SQLite
+    won't consider the index.
+    """
+    return db.Index(name, *columns, postgresql_where=where, sqlite_where=where)
 
 class Club(db.Model):
     __tablename__ = 'clubs'
@@ -15,19 +26,24 @@ class Club(db.Model):
     release_year = db.Column(db.Integer)
     approved = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    vote_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)  # Denormalized from votes
     
     # Foreign keys
     submitter_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     
     # Relationships
-    votes = db.relationship('Vote', backref='club', lazy='dynamic',
-                          primaryjoin="and_(Vote.club_id==Club.id, Vote.content_type=='club')",
-                          foreign_keys="Vote.club_id")
+    votes = db.relationship('Vote', backref=db.backref('club', viewonly=True), lazy='dynamic',
+                          primaryjoin=lambda: db.and_(db.foreign(Vote.object_id) == Club.id,
+                                                      Vote.object_type == Vote.CLUB),
+                          viewonly=True)
     
-    @property
-    def vote_count(self):
-        return self.votes.count()
+    __table_args__ = (
+        # Leaderboard rebuilds read (id, vote_count) of approved rows straight from this index
+        partial_index('ix_clubs_approved_vote_count', vote_count, id, where=approved == True),
+        partial_index('ix_clubs_approved_created_at', created_at, where=approved == True),
+        partial_index('ix_clubs_pending_created_at', created_at, where=approved == False),
+    )
     
     def __repr__(self):
         return f'<Club {self.brand} {self.name}>'
@@ -49,19 +65,23 @@ class Player(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)  # If player has account
     user_account = db.relationship('User', foreign_keys=[user_id], overlaps="players_submitted")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    vote_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)  # Denormalized from votes
     
     # Foreign keys
     submitter_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     
     # Relationships
-    votes = db.relationship('Vote', backref='player', lazy='dynamic',
-                          primaryjoin="and_(Vote.player_id==Player.id, Vote.content_type=='player')",
-                          foreign_keys="Vote.player_id")
+    votes = db.relationship('Vote', backref=db.backref('player', viewonly=True), lazy='dynamic',
+                          primaryjoin=lambda: db.and_(db.foreign(Vote.object_id) == Player.id,
+                                                      Vote.object_type == Vote.PLAYER),
+                          viewonly=True)
     
-    @property
-    def vote_count(self):
-        return self.votes.count()
+    __table_args__ = (
+        partial_index('ix_players_approved_vote_count', vote_count, id, where=approved == True),
+        partial_index('ix_players_approved_world_ranking', world_ranking, where=approved == True),
+        partial_index('ix_players_pending_created_at', created_at, where=approved == False),
+    )
     
     def __repr__(self):
         return f'<Player {self.name}>'
@@ -82,21 +102,27 @@ class Course(db.Model):
     designer = db.Column(db.String(100))
     is_public = db.Column(db.Boolean, default=True)
     has_hosted_major = db.Column(db.Boolean, default=False)
+    external_id = db.Column(db.String(64), unique=True)  # Course id in the golf course API
     approved = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    vote_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)  # Denormalized from votes
     
     # Foreign keys
     submitter_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     
     # Relationships
-    votes = db.relationship('Vote', backref='course', lazy='dynamic',
-                          primaryjoin="and_(Vote.course_id==Course.id, Vote.content_type=='course')",
-                          foreign_keys="Vote.course_id")
+    votes = db.relationship('Vote', backref=db.backref('course', viewonly=True), lazy='dynamic',
+                          primaryjoin=lambda: db.and_(db.foreign(Vote.object_id) == Course.id,
+                                                      Vote.object_type == Vote.COURSE),
+                          viewonly=True)
     
-    @property
-    def vote_count(self):
-        return self.votes.count()
+    __table_args__ = (
+        partial_index('ix_courses_approved_vote_count', vote_count, id, where=approved == True),
+        partial_index('ix_courses_approved_difficulty_rating', difficulty_rating,
+                      where=approved == True),
+        partial_index('ix_courses_pending_created_at', created_at, where=approved == False),
+    )
     
     def __repr__(self):
         return f'<Course {self.name}>'
@@ -104,19 +130,120 @@ class Course(db.Model):
 class Vote(db.Model):
     __tablename__ = 'votes'
     
+    # object_type values. Stored as small integers, so they must never be renumbered.
+    CLUB = 1
+    PLAYER = 2
+    COURSE = 3
+    CONTENT_TYPES = {CLUB: 'club', PLAYER: 'player', COURSE: 'course'}
+    
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
-    club_id = db.Column(db.Integer, db.ForeignKey('clubs.id'), nullable=True)
-    player_id = db.Column(db.Integer, db.ForeignKey('players.id'), nullable=True)
-    course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=True)
-    content_type = db.Column(db.String(20))  # 'club', 'player', or 'course'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    object_type = db.Column(db.SmallInteger, nullable=False)
+    object_id = db.Column(db.Integer, nullable=False)  # clubs.id, players.id or courses.id
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     __table_args__ = (
-        db.UniqueConstraint('user_id', 'club_id', 'content_type', name='uq_vote_club'),
-        db.UniqueConstraint('user_id', 'player_id', 'content_type', name='uq_vote_player'),
-        db.UniqueConstraint('user_id', 'course_id', 'content_type', name='uq_vote_course'),
+        # One vote per user and item; also answers "has this user voted for it"
+        db.Index('uq_votes_user_object', 'user_id', 'object_type', 'object_id', unique=True),
+        # Per-item counts and GROUP BYs
+        db.Index('ix_votes_object', 'object_type', 'object_id'),
     )
     
+    @property
+    def content_type(self):
+        return self.CONTENT_TYPES[self.object_type]
+    
     def __repr__(self):
-        return f'<Vote {self.id}>'
\ No newline at end of file
+        return f'<Vote {self.id}>'
+
+VOTE_MODELS = {Vote.CLUB: Club, Vote.PLAYER: Player, Vote.COURSE: Course}
+OBJECT_TYPES = {model: object_type for object_type, model in VOTE_MODELS.items()}
+
+# Votes are only written with the statements below. They decide what changed from
+# what the database reports back (RETURNING), never from an earlier read, so
+# concurrent toggles can't hit the unique index or count a vote twice.
+
+# Keys per statement, so a large batch stays well under the bind parameter limits
+# (32766 on SQLite, 65535 on PostgreSQL) at three parameters per key
+VOTE_CHUNK_SIZE = 1000
+
+def _chunks(keys):
+    keys = list(keys)
+    return [keys[i:i + VOTE_CHUNK_SIZE] for i in range(0, len(keys), VOTE_CHUNK_SIZE)]
+
+def add_votes(keys):
+    """Insert a vote for each (user_id, object_type, object_id), skipping existing ones.
+
+    Returns the (object_type, object_id) of every vote actually inserted.
+    """
+    dialect = postgresql if db.engine.dialect.name == 'postgresql' else sqlite
+    added = []
+    for chunk in _chunks(keys):
+        added += [tuple(row) for row in db.session.execute(
+            dialect.insert(Vote.__table__).on_conflict_do_nothing()
+            .returning(Vote.object_type, Vote.object_id),
+            [{'user_id': user_id, 'object_type': object_type, 'object_id': object_id}
+             for user_id, object_type, object_id in chunk])]
+    return added
+
+def remove_votes(keys):
+    """Delete the votes for the given keys; returns (object_type, object_id) of each one deleted."""
+    removed = []
+    for chunk in _chunks(keys):
+        removed += [tuple(row) for row in db.session.execute(
+            db.delete(Vote.__table__)
+            .where(db.tuple_(Vote.user_id, Vote.object_type, Vote.object_id).in_(chunk))
+            .returning(Vote.object_type, Vote.object_id))]
+    return removed
+
+def adjust_vote_counts(added, removed):
+    """Apply the results of add_votes and remove_votes to the vote_count columns.
+
+    Returns {object_type: [object_id, ...]} of the items whose count changed.
+    """
+    deltas = Counter(added)
+    deltas.subtract(removed)
+    changed = {}
+    for (object_type, object_id), delta in deltas.items():
+        if delta:
+            changed.setdefault(object_type, []).append({'item_id': object_id, 'delta': delta})
+    for object_type, rows in changed.items():
+        table = VOTE_MODELS[object_type].__table__
+        db.session.execute(
+            db.update(table).where(table.c.id == db.bindparam('item_id'))
+            .values(vote_count=table.c.vote_count + db.bindparam('delta')), rows)
+    return {object_type: [row['item_id'] for row in rows] for object_type, rows in changed.items()}
+
+def toggle_vote(user_id, item):
+    """Add the user's vote for item, or remove it if they already had one, and commit.
+
+    Returns True if the vote was added. Tries the insert first rather than looking
+    the vote up, so a double click resolves to one add and one remove.
+    """
+    key = (user_id, OBJECT_TYPES[type(item)], item.id)
+    added = add_votes([key])
+    removed = [] if added else remove_votes([key])
+    adjust_vote_counts(added, removed)
+    db.session.commit()
+    return bool(added)
+
+def reconcile_vote_counts():
+    """Rebuild the denormalized vote_count columns from the votes table.
+
+    Returns a dict mapping content type to the number of rows that were corrected.
+    """
+    fixed = {}
+    for object_type, model in VOTE_MODELS.items():
+        # count(*) rather than count(id), so it's answered from ix_votes_object alone
+        actual = db.select(db.func.count()).select_from(Vote)\
+            .where(Vote.object_type == object_type, Vote.object_id == model.id)\
+            .scalar_subquery()
+        result = db.session.execute(
+            db.update(model)
+            .where(model.vote_count != actual)
+            # Keep updated_at untouched, this is bookkeeping rather than an edit
+            .values(vote_count=actual, updated_at=model.updated_at)
+        )
+        fixed[Vote.CONTENT_TYPES[object_type]] = result.rowcount
+    db.session.commit()
+    return fixed
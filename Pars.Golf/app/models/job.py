@@ -0,0 +1,69 @@
+from app import db
+from datetime import datetime
+import json
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(32))  # handler name, e.g. 'import_csv'
+    status = db.Column(db.String(16), default='queued', index=True)  # queued, running, done, failed
+    payload = db.Column(db.Text)  # JSON arguments for the handler
+    checkpoint = db.Column(db.Integer, default=0)  # source rows covered by committed work
+    processed = db.Column(db.Integer, default=0)
+    succeeded = db.Column(db.Integer, default=0)
+    updated = db.Column(db.Integer, default=0)  # rows changed by upserts
+    unchanged = db.Column(db.Integer, default=0)
+    error_count = db.Column(db.Integer, default=0)
+    errors = db.Column(db.Text)  # JSON list of [row, message]
+    message = db.Column(db.Text)
+    worker = db.Column(db.String(64))
+    attempts = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    # Foreign keys
+    submitter_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+
+    # Relationships
+    submitter = db.relationship('User', foreign_keys=[submitter_id])
+
+    @property
+    def params(self):
+        return json.loads(self.payload or '{}')
+
+    @property
+    def error_list(self):
+        return json.loads(self.errors or '[]')
+
+    @property
+    def throughput(self):
+        """Rows per second since the job first started."""
+        if not self.started_at:
+            return 0.0
+        elapsed = ((self.finished_at or datetime.utcnow()) - self.started_at).total_seconds()
+        return round(self.processed / elapsed, 1) if elapsed > 0 else 0.0
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'processed': self.processed,
+            'succeeded': self.succeeded,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'error_count': self.error_count,
+            'errors': self.error_list,
+            'rows_per_second': self.throughput,
+            'message': self.message,
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
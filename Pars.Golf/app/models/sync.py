@@ -0,0 +1,15 @@
+from app import db
+from datetime import datetime
+
+class SyncPage(db.Model):
+    """HTTP validators for one page of an external API, so re-syncs can skip unchanged pages."""
+    __tablename__ = 'sync_pages'
+
+    url = db.Column(db.String(255), primary_key=True)
+    etag = db.Column(db.String(255))
+    last_modified = db.Column(db.String(64))
+    total_pages = db.Column(db.Integer)
+    synced_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SyncPage {self.url}>'
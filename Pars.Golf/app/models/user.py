@@ -3,7 +3,6 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 from datetime import datetime
 from time import time
-import jwt
 from flask import current_app
 import re
 
@@ -56,6 +55,7 @@ class User(UserMixin, db.Model):
         return check_password_hash(self.password_hash, password)
     
     def get_reset_password_token(self, expires_in=600):
+        import jwt
         return jwt.encode(
             {'reset_password': self.id, 'exp': time() + expires_in},
             current_app.config['SECRET_KEY'],
@@ -64,6 +64,7 @@ class User(UserMixin, db.Model):
     
     @staticmethod
     def verify_reset_password_token(token):
+        import jwt
         try:
             id = jwt.decode(
                 token,
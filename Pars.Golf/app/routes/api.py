@@ -0,0 +1,120 @@
+from flask import Blueprint, jsonify, request, abort
+from flask_login import current_user
+from app.models.content import Club, Player, Course
+from app.utils.keyset import Keyset, InvalidCursor
+from app.utils.votes import vote_buffer
+from app.utils.routing import replica_reads
+from sqlalchemy.orm import load_only
+from werkzeug.exceptions import HTTPException
+
+bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+MAX_LIMIT = 100
+
+def _flag(value):
+    return value == 'true'
+
+# Per content type: listing fields, extra detail fields, sorts (the first is the
+# default) and facet filters, mirroring the HTML listings
+RESOURCES = {
+    'clubs': {
+        'model': Club,
+        'fields': ['id', 'name', 'brand', 'club_type', 'price', 'release_year', 'image_url',
+                   'purchase_link', 'vote_count'],
+        'detail': ['description', 'created_at', 'updated_at'],
+        'sorts': {'votes': Keyset(Club.vote_count, Club.id, descending=True),
+                  'newest': Keyset(Club.created_at, Club.id, descending=True),
+                  'name': Keyset(Club.name, Club.id)},
+        'facets': {'brand': ('brand', str), 'type': ('club_type', str)},
+    },
+    'players': {
+        'model': Player,
+        'fields': ['id', 'name', 'country', 'world_ranking', 'major_wins', 'tour_wins', 'verified',
+                   'profile_image', 'vote_count'],
+        'detail': ['bio', 'pro_since', 'created_at', 'updated_at'],
+        'sorts': {'votes': Keyset(Player.vote_count, Player.id, descending=True),
+                  'ranking': Keyset(Player.world_ranking, Player.id),
+                  'name': Keyset(Player.name, Player.id)},
+        'facets': {'country': ('country', str)},
+    },
+    'courses': {
+        'model': Course,
+        'fields': ['id', 'name', 'location', 'par', 'length_yards', 'difficulty_rating', 'year_built',
+                   'designer', 'is_public', 'has_hosted_major', 'image_url', 'website', 'vote_count'],
+        'detail': ['description', 'created_at', 'updated_at'],
+        'sorts': {'votes': Keyset(Course.vote_count, Course.id, descending=True),
+                  'difficulty': Keyset(Course.difficulty_rating, Course.id, descending=True),
+                  'name': Keyset(Course.name, Course.id)},
+        'facets': {'public': ('is_public', _flag), 'has_hosted_major': ('has_hosted_major', _flag)},
+    },
+}
+
+def _serialize(item, fields):
+    data = {}
+    for field in fields:
+        value = getattr(item, field)
+        data[field] = value.isoformat() if hasattr(value, 'isoformat') else value
+    return data
+
+def _item(kind, id):
+    return RESOURCES[kind]['model'].query.filter_by(id=id, approved=True).first_or_404()
+
+@bp.errorhandler(HTTPException)
+def error(e):
+    return jsonify(error=e.description), e.code
+
+@bp.route('/<any(clubs, players, courses):kind>')
+@replica_reads
+def index(kind):
+    """One page of approved items.
+
+    ?sort= one of the resource's sorts, ?limit= up to MAX_LIMIT, ?cursor= the
+    previous page's next_cursor, facet filters as in the HTML listing, and
+    ?count=true to include the total, which costs a COUNT over the filtered rows.
+    """
+    resource = RESOURCES[kind]
+    model = resource['model']
+    sort = request.args.get('sort') or next(iter(resource['sorts']))
+    if sort not in resource['sorts']:
+        abort(400, f"sort must be one of {', '.join(resource['sorts'])}")
+    limit = min(max(request.args.get('limit', 20, type=int), 1), MAX_LIMIT)
+
+    query = model.query.filter_by(approved=True)
+    for param, (column, convert) in resource['facets'].items():
+        if request.args.get(param):
+            query = query.filter_by(**{column: convert(request.args[param])})
+
+    try:
+        items, next_cursor = resource['sorts'][sort].page(
+            query.options(load_only(*[getattr(model, field) for field in resource['fields']])),
+            request.args.get('cursor'), limit)
+    except InvalidCursor:
+        abort(400, 'Invalid cursor')
+
+    data = {'items': [_serialize(item, resource['fields']) for item in items],
+            'next_cursor': next_cursor}
+    if _flag(request.args.get('count')):
+        data['total'] = query.order_by(None).count()
+    return jsonify(data)
+
+@bp.route('/<any(clubs, players, courses):kind>/<int:id>')
+@replica_reads
+def show(kind, id):
+    resource = RESOURCES[kind]
+    item = _item(kind, id)
+    data = _serialize(item, resource['fields'] + resource['detail'])
+    if current_user.is_authenticated:
+        data['voted'] = vote_buffer.voted(current_user.id, item)
+    return jsonify(data)
+
+@bp.route('/<any(clubs, players, courses):kind>/<int:id>/vote', methods=['POST'])
+def vote(kind, id):
+    """Toggle the current user's vote. Returns whether they now have one."""
+    if not current_user.is_authenticated:
+        abort(401, 'Log in to vote')
+    # Session cookies authenticate this, and a cross-site form can't send JSON
+    if not request.is_json:
+        abort(415, 'Send the request with Content-Type: application/json')
+    item = _item(kind, id)
+    # vote_count lags by up to VOTE_FLUSH_INTERVAL while the vote is buffered
+    return jsonify(voted=vote_buffer.toggle(current_user.id, item), vote_count=item.vote_count)
@@ -2,7 +2,6 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request,
 from flask_login import login_user, logout_user, login_required, current_user
 from app import db
 from app.models.user import User, Role
-from app.utils.forms import LoginForm, RegisterForm, ResetPasswordRequestForm, ResetPasswordForm
 from app.utils.email import send_password_reset_email
 from app.utils.oauth import OAuthSignIn
 
@@ -13,6 +12,8 @@ def login():
     if current_user.is_authenticated:
         return redirect(url_for('main.index'))
     
+    from app.utils.forms import LoginForm
+    
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data).first()
@@ -39,6 +40,8 @@ def register():
     if current_user.is_authenticated:
         return redirect(url_for('main.index'))
     
+    from app.utils.forms import RegisterForm
+    
     form = RegisterForm()
     if form.validate_on_submit():
         if not User.validate_username(form.username.data):
@@ -109,6 +112,8 @@ def reset_password_request():
     if current_user.is_authenticated:
         return redirect(url_for('main.index'))
     
+    from app.utils.forms import ResetPasswordRequestForm
+    
     form = ResetPasswordRequestForm()
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data).first()
@@ -128,6 +133,8 @@ def reset_password(token):
     if not user:
         return redirect(url_for('main.index'))
     
+    from app.utils.forms import ResetPasswordForm
+    
     form = ResetPasswordForm()
     if form.validate_on_submit():
         user.password = form.password.data
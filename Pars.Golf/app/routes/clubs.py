@@ -1,17 +1,23 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
+from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
-from app import db
-from app.models.content import Club, Vote
-from app.utils.forms import ClubForm
-from werkzeug.utils import secure_filename
-import os
-import csv
-import io
-from datetime import datetime
+from markupsafe import Markup
+from app import db, cache
+from app.models.content import Club
+from app.utils.facets import facet_index
+from app.utils.ranking import leaderboard
+from app.utils.events import item_saved
+from app.utils.importer import stash_upload
+from app.utils.jobs import enqueue
+from app.utils.votes import vote_buffer
+from app.utils.images import queue_image
+from app.utils.conditional import conditional
+from app.utils.routing import replica_reads
 
 bp = Blueprint('clubs', __name__, url_prefix='/clubs')
 
 @bp.route('/')
+@replica_reads
+@conditional(Club)
 def index():
     page = request.args.get('page', 1, type=int)
     sort_by = request.args.get('sort', 'votes')
@@ -19,88 +25,77 @@ def index():
     filter_type = request.args.get('type')
     
     query = Club.query.filter_by(approved=True)
+    facets = {}
     
     if filter_brand:
         query = query.filter_by(brand=filter_brand)
+        facets['brand'] = filter_brand
     
     if filter_type:
         query = query.filter_by(club_type=filter_type)
+        facets['club_type'] = filter_type
     
-    if sort_by == 'votes':
-        clubs = query.join(Vote, Club.id == Vote.club_id)\
-            .group_by(Club.id)\
-            .order_by(db.func.count(Vote.id).desc())\
-            .paginate(page=page, per_page=12)
-    elif sort_by == 'newest':
+    if sort_by == 'newest':
         clubs = query.order_by(Club.created_at.desc()).paginate(page=page, per_page=12)
     elif sort_by == 'name':
         clubs = query.order_by(Club.name).paginate(page=page, per_page=12)
     else:
-        clubs = query.join(Vote, Club.id == Vote.club_id)\
-            .group_by(Club.id)\
-            .order_by(db.func.count(Vote.id).desc())\
-            .paginate(page=page, per_page=12)
+        # 'votes' (the default) is served from the precomputed ranking
+        clubs = leaderboard.paginate(Club, page=page, per_page=12, **facets)
     
-    # Get unique brands and club types for filtering
-    brands = db.session.query(Club.brand).distinct().all()
-    club_types = db.session.query(Club.club_type).distinct().all()
+    # Brands and club types for filtering, with the number of approved clubs for each
+    brand_counts = facet_index.counts(Club, 'brand')
+    club_type_counts = facet_index.counts(Club, 'club_type')
     
     return render_template('clubs/index.html', 
                            title='Golf Clubs',
                            clubs=clubs,
-                           brands=[brand[0] for brand in brands],
-                           club_types=[club_type[0] for club_type in club_types],
+                           brands=list(brand_counts),
+                           club_types=list(club_type_counts),
+                           brand_counts=brand_counts,
+                           club_type_counts=club_type_counts,
                            current_sort=sort_by,
                            current_brand=filter_brand,
                            current_type=filter_type)
 
 @bp.route('/<int:id>')
+@replica_reads
+@conditional(Club)
 def show(id):
     club = Club.query.filter_by(id=id, approved=True).first_or_404()
     
     # Check if current user has voted for this club
     user_voted = False
     if current_user.is_authenticated:
-        vote = Vote.query.filter_by(
-            user_id=current_user.id,
-            club_id=club.id,
-            content_type='club'
-        ).first()
-        user_voted = vote is not None
+        user_voted = vote_buffer.voted(current_user.id, club)
     
-    # Get similar clubs
-    similar_clubs = Club.query.filter_by(
-        club_type=club.club_type, 
-        approved=True
-    ).filter(Club.id != club.id).limit(4).all()
+    # Get similar clubs, the rendered block is shared by every visitor
+    similar_clubs_html = cache.get_or_set('clubs', f'similar:{club.id}', lambda: render_template(
+        'fragments/club_cards.html',
+        clubs=Club.query.filter_by(
+            club_type=club.club_type, 
+            approved=True
+        ).filter(Club.id != club.id).limit(4).all()))
     
     return render_template('clubs/show.html', 
                            title=f'{club.brand} {club.name}',
                            club=club,
                            user_voted=user_voted,
-                           similar_clubs=similar_clubs)
+                           similar_clubs_html=Markup(similar_clubs_html))
 
 @bp.route('/new', methods=['GET', 'POST'])
 @login_required
 def new():
+    from app.utils.forms import ClubForm
+    
     form = ClubForm()
     if form.validate_on_submit():
-        # Handle image upload
-        image_url = None
-        if form.image.data:
-            filename = secure_filename(form.image.data.filename)
-            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-            filename = f"{timestamp}_{filename}"
-            form.image.data.save(os.path.join(current_app.config['UPLOAD_FOLDER'], 'clubs', filename))
-            image_url = f'/static/uploads/clubs/{filename}'
-        
         # Create club
         club = Club(
             name=form.name.data,
             brand=form.brand.data,
             club_type=form.club_type.data,
             description=form.description.data,
-            image_url=image_url,
             purchase_link=form.purchase_link.data,
             price=form.price.data,
             release_year=form.release_year.data,
@@ -111,6 +106,9 @@ def new():
         
         db.session.add(club)
         db.session.commit()
+        item_saved(club)
+        if form.image.data:
+            queue_image(form.image.data, 'clubs', club.id)
         
         flash('Your club has been submitted for approval!' if not club.approved else 'Club added successfully!')
         return redirect(url_for('clubs.show', id=club.id))
@@ -127,16 +125,10 @@ def edit(id):
         flash('You do not have permission to edit this club.')
         return redirect(url_for('clubs.show', id=club.id))
     
+    from app.utils.forms import ClubForm
+    
     form = ClubForm()
     if form.validate_on_submit():
-        # Handle image upload
-        if form.image.data:
-            filename = secure_filename(form.image.data.filename)
-            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-            filename = f"{timestamp}_{filename}"
-            form.image.data.save(os.path.join(current_app.config['UPLOAD_FOLDER'], 'clubs', filename))
-            club.image_url = f'/static/uploads/clubs/{filename}'
-        
         club.name = form.name.data
         club.brand = form.brand.data
         club.club_type = form.club_type.data
@@ -146,6 +138,9 @@ def edit(id):
         club.release_year = form.release_year.data
         
         db.session.commit()
+        item_saved(club)
+        if form.image.data:
+            queue_image(form.image.data, 'clubs', club.id)
         
         flash('Club updated successfully!')
         return redirect(url_for('clubs.show', id=club.id))
@@ -166,28 +161,11 @@ def edit(id):
 def vote(id):
     club = Club.query.filter_by(id=id, approved=True).first_or_404()
     
-    # Check if user has already voted
-    existing_vote = Vote.query.filter_by(
-        user_id=current_user.id,
-        club_id=club.id,
-        content_type='club'
-    ).first()
-    
-    if existing_vote:
-        # Remove vote if it exists
-        db.session.delete(existing_vote)
-        db.session.commit()
-        flash('Your vote has been removed.')
-    else:
-        # Add new vote
-        vote = Vote(
-            user_id=current_user.id,
-            club_id=club.id,
-            content_type='club'
-        )
-        db.session.add(vote)
-        db.session.commit()
+    # Buffered and written in batches, see app/utils/votes.py
+    if vote_buffer.toggle(current_user.id, club):
         flash('Your vote has been recorded!')
+    else:
+        flash('Your vote has been removed.')
     
     return redirect(url_for('clubs.show', id=club.id))
 
@@ -202,6 +180,7 @@ def approve(id):
     club = Club.query.get_or_404(id)
     club.approved = True
     db.session.commit()
+    item_saved(club)
     
     flash('Club has been approved!')
     
@@ -230,33 +209,9 @@ def import_clubs():
             return redirect(request.url)
         
         if file:
-            try:
-                csv_data = file.read().decode('utf-8')
-                csv_file = io.StringIO(csv_data)
-                csv_reader = csv.DictReader(csv_file)
-                
-                clubs_imported = 0
-                for row in csv_reader:
-                    club = Club(
-                        name=row.get('name', ''),
-                        brand=row.get('brand', ''),
-                        club_type=row.get('club_type', ''),
-                        description=row.get('description', ''),
-                        image_url=row.get('image_url', ''),
-                        purchase_link=row.get('purchase_link', ''),
-                        price=float(row.get('price', 0)),
-                        release_year=int(row.get('release_year', 0)),
-                        submitter=current_user,
-                        approved=True
-                    )
-                    db.session.add(club)
-                    clubs_imported += 1
-                
-                db.session.commit()
-                flash(f'Successfully imported {clubs_imported} clubs!')
-            except Exception as e:
-                flash(f'Error importing CSV file: {str(e)}')
-            
-            return redirect(url_for('clubs.index'))
+            job = enqueue('import_csv', submitter_id=current_user.id, content='clubs',
+                          key=stash_upload(file))
+            flash(f'Your import has been queued as job #{job.id}.')
+            return redirect(url_for('jobs.show', id=job.id))
     
     return render_template('clubs/import.html', title='Import Clubs')
\ No newline at end of file
@@ -1,18 +1,22 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
+from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
-from app import db
-from app.models.content import Course, Vote
-from app.utils.forms import CourseForm
-from werkzeug.utils import secure_filename
-import os
-import csv
-import io
-from datetime import datetime
-import requests
+from markupsafe import Markup
+from app import db, cache
+from app.models.content import Course
+from app.utils.ranking import leaderboard
+from app.utils.events import item_saved
+from app.utils.importer import stash_upload
+from app.utils.jobs import enqueue
+from app.utils.votes import vote_buffer
+from app.utils.images import queue_image
+from app.utils.conditional import conditional
+from app.utils.routing import replica_reads
 
 bp = Blueprint('courses', __name__, url_prefix='/courses')
 
 @bp.route('/')
+@replica_reads
+@conditional(Course)
 def index():
     page = request.args.get('page', 1, type=int)
     sort_by = request.args.get('sort', 'votes')
@@ -20,29 +24,25 @@ def index():
     filter_has_hosted_major = request.args.get('has_hosted_major')
     
     query = Course.query.filter_by(approved=True)
+    facets = {}
     
     if filter_public:
         is_public = filter_public == 'true'
         query = query.filter_by(is_public=is_public)
+        facets['is_public'] = is_public
     
     if filter_has_hosted_major:
         has_hosted = filter_has_hosted_major == 'true'
         query = query.filter_by(has_hosted_major=has_hosted)
+        facets['has_hosted_major'] = has_hosted
     
-    if sort_by == 'votes':
-        courses = query.join(Vote, Course.id == Vote.course_id)\
-            .group_by(Course.id)\
-            .order_by(db.func.count(Vote.id).desc())\
-            .paginate(page=page, per_page=12)
-    elif sort_by == 'difficulty':
+    if sort_by == 'difficulty':
         courses = query.order_by(Course.difficulty_rating.desc()).paginate(page=page, per_page=12)
     elif sort_by == 'name':
         courses = query.order_by(Course.name).paginate(page=page, per_page=12)
     else:
-        courses = query.join(Vote, Course.id == Vote.course_id)\
-            .group_by(Course.id)\
-            .order_by(db.func.count(Vote.id).desc())\
-            .paginate(page=page, per_page=12)
+        # 'votes' (the default) is served from the precomputed ranking
+        courses = leaderboard.paginate(Course, page=page, per_page=12, **facets)
     
     return render_template('courses/index.html', 
                            title='Golf Courses',
@@ -52,52 +52,43 @@ def index():
                            filter_has_hosted_major=filter_has_hosted_major)
 
 @bp.route('/<int:id>')
+@replica_reads
+@conditional(Course)
 def show(id):
     course = Course.query.filter_by(id=id, approved=True).first_or_404()
     
     # Check if current user has voted for this course
     user_voted = False
     if current_user.is_authenticated:
-        vote = Vote.query.filter_by(
-            user_id=current_user.id,
-            course_id=course.id,
-            content_type='course'
-        ).first()
-        user_voted = vote is not None
+        user_voted = vote_buffer.voted(current_user.id, course)
     
-    # Find similar courses (by location)
-    similar_courses = Course.query.filter(
-        Course.location.like(f"%{course.location.split(',')[0]}%"), 
-        Course.id != course.id,
-        Course.approved == True
-    ).limit(3).all()
+    # Find similar courses (by location), the rendered block is shared by every visitor
+    similar_courses_html = cache.get_or_set('courses', f'similar:{course.id}', lambda: render_template(
+        'fragments/course_cards.html',
+        courses=Course.query.filter(
+            Course.location.like(f"%{course.location.split(',')[0]}%"), 
+            Course.id != course.id,
+            Course.approved == True
+        ).limit(3).all()))
     
     return render_template('courses/show.html', 
                            title=course.name,
                            course=course,
                            user_voted=user_voted,
-                           similar_courses=similar_courses)
+                           similar_courses_html=Markup(similar_courses_html))
 
 @bp.route('/new', methods=['GET', 'POST'])
 @login_required
 def new():
+    from app.utils.forms import CourseForm
+    
     form = CourseForm()
     if form.validate_on_submit():
-        # Handle image upload
-        image_url = None
-        if form.image.data:
-            filename = secure_filename(form.image.data.filename)
-            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-            filename = f"{timestamp}_{filename}"
-            form.image.data.save(os.path.join(current_app.config['UPLOAD_FOLDER'], 'courses', filename))
-            image_url = f'/static/uploads/courses/{filename}'
-        
         # Create course
         course = Course(
             name=form.name.data,
             location=form.location.data,
             description=form.description.data,
-            image_url=image_url,
             website=form.website.data,
             par=form.par.data,
             length_yards=form.length_yards.data,
@@ -113,6 +104,9 @@ def new():
         
         db.session.add(course)
         db.session.commit()
+        item_saved(course)
+        if form.image.data:
+            queue_image(form.image.data, 'courses', course.id)
         
         flash('Your course has been submitted for approval!' if not course.approved else 'Course added successfully!')
         return redirect(url_for('courses.show', id=course.id))
@@ -129,16 +123,10 @@ def edit(id):
         flash('You do not have permission to edit this course.')
         return redirect(url_for('courses.show', id=course.id))
     
+    from app.utils.forms import CourseForm
+    
     form = CourseForm()
     if form.validate_on_submit():
-        # Handle image upload
-        if form.image.data:
-            filename = secure_filename(form.image.data.filename)
-            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-            filename = f"{timestamp}_{filename}"
-            form.image.data.save(os.path.join(current_app.config['UPLOAD_FOLDER'], 'courses', filename))
-            course.image_url = f'/static/uploads/courses/{filename}'
-        
         course.name = form.name.data
         course.location = form.location.data
         course.description = form.description.data
@@ -152,6 +140,9 @@ def edit(id):
         course.has_hosted_major = form.has_hosted_major.data
         
         db.session.commit()
+        item_saved(course)
+        if form.image.data:
+            queue_image(form.image.data, 'courses', course.id)
         
         flash('Course updated successfully!')
         return redirect(url_for('courses.show', id=course.id))
@@ -176,28 +167,11 @@ def edit(id):
 def vote(id):
     course = Course.query.filter_by(id=id, approved=True).first_or_404()
     
-    # Check if user has already voted
-    existing_vote = Vote.query.filter_by(
-        user_id=current_user.id,
-        course_id=course.id,
-        content_type='course'
-    ).first()
-    
-    if existing_vote:
-        # Remove vote if it exists
-        db.session.delete(existing_vote)
-        db.session.commit()
-        flash('Your vote has been removed.')
-    else:
-        # Add new vote
-        vote = Vote(
-            user_id=current_user.id,
-            course_id=course.id,
-            content_type='course'
-        )
-        db.session.add(vote)
-        db.session.commit()
+    # Buffered and written in batches, see app/utils/votes.py
+    if vote_buffer.toggle(current_user.id, course):
         flash('Your vote has been recorded!')
+    else:
+        flash('Your vote has been removed.')
     
     return redirect(url_for('courses.show', id=course.id))
 
@@ -212,6 +186,7 @@ def approve(id):
     course = Course.query.get_or_404(id)
     course.approved = True
     db.session.commit()
+    item_saved(course)
     
     flash('Course has been approved!')
     
@@ -237,108 +212,18 @@ def import_courses():
         # Import from CSV
         if 'csv_file' in request.files and request.files['csv_file'].filename != '':
             file = request.files['csv_file']
-            try:
-                csv_data = file.read().decode('utf-8')
-                csv_file = io.StringIO(csv_data)
-                csv_reader = csv.DictReader(csv_file)
-                
-                courses_imported = 0
-                for row in csv_reader:
-                    course = Course(
-                        name=row.get('name', ''),
-                        location=row.get('location', ''),
-                        description=row.get('description', ''),
-                        image_url=row.get('image_url', ''),
-                        website=row.get('website', ''),
-                        par=int(row.get('par', 72)),
-                        length_yards=int(row.get('length_yards', 0)),
-                        difficulty_rating=float(row.get('difficulty_rating', 0)),
-                        year_built=int(row.get('year_built', 0)),
-                        designer=row.get('designer', ''),
-                        is_public=row.get('is_public', '').lower() == 'true',
-                        has_hosted_major=row.get('has_hosted_major', '').lower() == 'true',
-                        submitter=current_user,
-                        approved=True
-                    )
-                    db.session.add(course)
-                    courses_imported += 1
-                
-                db.session.commit()
-                flash(f'Successfully imported {courses_imported} courses from CSV!')
-            except Exception as e:
-                flash(f'Error importing CSV file: {str(e)}')
+            job = enqueue('import_csv', submitter_id=current_user.id, content='courses',
+                          key=stash_upload(file))
+            flash(f'Your CSV import has been queued as job #{job.id}.')
+            return redirect(url_for('jobs.show', id=job.id))
         
         # Import from API
         elif request.form.get('use_api'):
-            try:
-                # This is a placeholder for the actual API call
-                # In a real implementation, we would use the correct API endpoint and authentication
-                api_url = "https://golfapi.io/api/v1/courses"
-                # Add API key from config
-                api_key = current_app.config.get('GOLF_API_KEY', '')
-                
-                # For demonstration purposes, we'll mock the API response
-                # In a real implementation, this would be:
-                # response = requests.get(api_url, headers={'Authorization': f'Bearer {api_key}'})
-                # courses_data = response.json()
-                
-                # Mock data for demonstration
-                courses_data = [
-                    {
-                        "name": "Augusta National Golf Club",
-                        "location": "Augusta, Georgia, USA",
-                        "description": "Home of the Masters Tournament",
-                        "website": "https://www.masters.com",
-                        "par": 72,
-                        "length_yards": 7475,
-                        "difficulty_rating": 9.8,
-                        "year_built": 1933,
-                        "designer": "Alister MacKenzie, Bobby Jones",
-                        "is_public": False,
-                        "has_hosted_major": True,
-                        "image_url": "/static/img/courses/augusta.jpg"
-                    },
-                    {
-                        "name": "St Andrews Links (Old Course)",
-                        "location": "St Andrews, Scotland, UK",
-                        "description": "The home of golf",
-                        "website": "https://www.standrews.com",
-                        "par": 72,
-                        "length_yards": 6721,
-                        "difficulty_rating": 9.2,
-                        "year_built": 1552,
-                        "designer": "Mother Nature",
-                        "is_public": True,
-                        "has_hosted_major": True,
-                        "image_url": "/static/img/courses/st_andrews.jpg"
-                    }
-                ]
-                
-                courses_imported = 0
-                for course_data in courses_data:
-                    course = Course(
-                        name=course_data.get('name', ''),
-                        location=course_data.get('location', ''),
-                        description=course_data.get('description', ''),
-                        image_url=course_data.get('image_url', ''),
-                        website=course_data.get('website', ''),
-                        par=course_data.get('par', 72),
-                        length_yards=course_data.get('length_yards', 0),
-                        difficulty_rating=course_data.get('difficulty_rating', 0),
-                        year_built=course_data.get('year_built', 0),
-                        designer=course_data.get('designer', ''),
-                        is_public=course_data.get('is_public', True),
-                        has_hosted_major=course_data.get('has_hosted_major', False),
-                        submitter=current_user,
-                        approved=True
-                    )
-                    db.session.add(course)
-                    courses_imported += 1
-                
-                db.session.commit()
-                flash(f'Successfully imported {courses_imported} courses from API!')
-            except Exception as e:
-                flash(f'Error importing from API: {str(e)}')
+            # Upserts by external_id; pages unchanged since the last sync are skipped
+            job = enqueue('sync_golf_api', submitter_id=current_user.id,
+                          full=bool(request.form.get('full_sync')))
+            flash(f'Your API sync has been queued as job #{job.id}.')
+            return redirect(url_for('jobs.show', id=job.id))
             
         return redirect(url_for('courses.index'))
     
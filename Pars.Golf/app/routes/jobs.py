@@ -0,0 +1,32 @@
+from flask import Blueprint, render_template, redirect, url_for, flash, jsonify, abort, current_app
+from flask_login import login_required, current_user
+from app import db
+from app.models.job import Job
+from app.utils.jobs import pool
+
+bp = Blueprint('jobs', __name__, url_prefix='/jobs')
+
+@bp.before_app_request
+def start_workers():
+    # Threads don't survive a fork, so each web worker starts its own on first request
+    pool.start(current_app._get_current_object())
+
+def _can_view(job):
+    return job.submitter_id == current_user.id or current_user.role.name in ['Employee', 'Admin']
+
+@bp.route('/<int:id>')
+@login_required
+def show(id):
+    job = db.get_or_404(Job, id)
+    if not _can_view(job):
+        flash('You do not have permission to view this job.')
+        return redirect(url_for('main.index'))
+    return render_template('jobs/show.html', title=f'Job #{job.id}', job=job)
+
+@bp.route('/<int:id>/status')
+@login_required
+def status(id):
+    job = db.get_or_404(Job, id)
+    if not _can_view(job):
+        abort(403)
+    return jsonify(job.to_dict())
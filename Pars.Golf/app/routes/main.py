@@ -1,61 +1,79 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
-from app import db
-from app.models.content import Club, Player, Course, Vote
-from app.models.user import User, Role
-from sqlalchemy import and_
-from werkzeug.utils import secure_filename
-import os
-from datetime import datetime
+from markupsafe import Markup
+from app import db, cache, instrumentation
+from app.models.content import Club, Player, Course
+from app.models.user import Role
+from app.utils.ranking import leaderboard
+from app.utils.search import search_index, MODELS as SEARCH_TYPES
+from app.utils.queries import (user_by_username, votes_by_type, submissions_by_type,
+                               pending_by_type, users_with_roles, activity_counts)
+from app.utils.images import queue_image
+from app.utils.routing import replica_reads
 
 bp = Blueprint('main', __name__)
 
+def _render_top(model, template, empty_message, limit=5):
+    items = leaderboard.paginate(model, page=1, per_page=limit).items
+    return render_template(template, empty_message=empty_message, **{model.__tablename__: items})
+
 @bp.route('/')
 def index():
-    # For first run, just return empty lists if tables don't exist yet
+    # The card sections are cached per content table and rebuilt when it changes,
+    # so most anonymous hits render without touching the database
     try:
-        # Simple query to check if tables exist
-        db.session.execute(db.select(Club.id).limit(1))
-        db.session.execute(db.select(Player.id).limit(1))
-        db.session.execute(db.select(Course.id).limit(1))
-        
-        # If tables exist, get the data
-        top_clubs = Club.query.filter_by(approved=True).limit(5).all()
-        top_players = Player.query.filter_by(approved=True).limit(5).all()
-        top_courses = Course.query.filter_by(approved=True).limit(5).all()
+        top_clubs_html = cache.get_or_set('clubs', 'home:top', lambda: _render_top(
+            Club, 'fragments/club_cards.html', 'No clubs available yet. Be the first to add a club!'))
+        top_players_html = cache.get_or_set('players', 'home:top', lambda: _render_top(
+            Player, 'fragments/player_cards.html', 'No players available yet. Be the first to add a player!'))
+        top_courses_html = cache.get_or_set('courses', 'home:top', lambda: _render_top(
+            Course, 'fragments/course_cards.html', 'No courses available yet. Be the first to add a course!'))
     except Exception as e:
         # For first run without tables
         print(f"Database tables not ready: {e}")
-        top_clubs = []
-        top_players = []
-        top_courses = []
+        db.session.rollback()
+        top_clubs_html = top_players_html = top_courses_html = ''
     
     return render_template('index.html', 
                           title='Par-Fect Your Game',
-                          top_clubs=top_clubs,
-                          top_players=top_players,
-                          top_courses=top_courses)
+                          top_clubs_html=Markup(top_clubs_html),
+                          top_players_html=Markup(top_players_html),
+                          top_courses_html=Markup(top_courses_html))
+
+@bp.route('/search')
+def search():
+    query = request.args.get('q', '').strip()
+    content_type = request.args.get('type')
+    if content_type not in SEARCH_TYPES:
+        content_type = None
+    page = request.args.get('page', 1, type=int)
+    
+    results = None
+    if query:
+        results = search_index.search(query, content_type=content_type, page=page, per_page=20)
+    
+    return render_template('search.html',
+                           title=f'Search - {query}' if query else 'Search',
+                           query=query,
+                           content_type=content_type,
+                           results=results)
 
 @bp.route('/profile/<username>')
+@replica_reads
 def profile(username):
-    user = User.query.filter_by(username=username).first_or_404()
-    clubs_submitted = Club.query.filter_by(submitter=user, approved=True).all()
-    players_submitted = Player.query.filter_by(submitter=user, approved=True).all()
-    courses_submitted = Course.query.filter_by(submitter=user, approved=True).all()
-    
-    club_votes = Vote.query.filter_by(user=user, content_type='club').all()
-    player_votes = Vote.query.filter_by(user=user, content_type='player').all()
-    course_votes = Vote.query.filter_by(user=user, content_type='course').all()
+    user = user_by_username(username)
+    submitted = submissions_by_type(user)
+    votes = votes_by_type(user)
     
     return render_template('profile.html', 
                            title=f'Profile - {user.username}',
                            user=user,
-                           clubs_submitted=clubs_submitted,
-                           players_submitted=players_submitted,
-                           courses_submitted=courses_submitted,
-                           club_votes=club_votes,
-                           player_votes=player_votes,
-                           course_votes=course_votes)
+                           clubs_submitted=submitted['club'],
+                           players_submitted=submitted['player'],
+                           courses_submitted=submitted['course'],
+                           club_votes=votes['club'],
+                           player_votes=votes['player'],
+                           course_votes=votes['course'])
 
 @bp.route('/edit_profile', methods=['GET', 'POST'])
 @login_required
@@ -64,15 +82,10 @@ def edit_profile():
     
     form = EditProfileForm()
     if form.validate_on_submit():
-        if form.profile_image.data:
-            filename = secure_filename(form.profile_image.data.filename)
-            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-            filename = f"{timestamp}_{filename}"
-            form.profile_image.data.save(os.path.join(current_app.config['UPLOAD_FOLDER'], filename))
-            current_user.profile_image = filename
-        
         current_user.bio = form.bio.data
         db.session.commit()
+        if form.profile_image.data:
+            queue_image(form.profile_image.data, 'users', current_user.id)
         flash('Your profile has been updated.')
         return redirect(url_for('main.profile', username=current_user.username))
     
@@ -89,21 +102,40 @@ def admin_dashboard():
         flash('You do not have permission to access the admin dashboard.')
         return redirect(url_for('main.index'))
     
-    pending_clubs = Club.query.filter_by(approved=False).all()
-    pending_players = Player.query.filter_by(approved=False).all()
-    pending_courses = Course.query.filter_by(approved=False).all()
-    
-    users = User.query.all()
+    pending = pending_by_type()
+    users = users_with_roles()
     roles = Role.query.all()
     
     return render_template('admin/dashboard.html', 
                            title='Admin Dashboard',
-                           pending_clubs=pending_clubs,
-                           pending_players=pending_players,
-                           pending_courses=pending_courses,
+                           pending_clubs=pending['club'],
+                           pending_players=pending['player'],
+                           pending_courses=pending['course'],
                            users=users,
+                           user_activity=activity_counts(users),
                            roles=roles)
 
+@bp.route('/admin/queries', methods=['GET', 'POST'])
+@login_required
+def query_stats():
+    if current_user.role.name != 'Admin':
+        flash('You do not have permission to access the admin dashboard.')
+        return redirect(url_for('main.index'))
+    
+    if request.method == 'POST':
+        instrumentation.reset()
+        flash('Query statistics have been reset.')
+        return redirect(url_for('main.query_stats'))
+    
+    endpoints, templates, slow_queries = instrumentation.snapshot()
+    return render_template('admin/queries.html',
+                           title='Query Statistics',
+                           endpoints=endpoints,
+                           templates=templates,
+                           slow_queries=slow_queries,
+                           sample_rate=instrumentation.sample_rate,
+                           slow_query_ms=instrumentation.slow_query_ms)
+
 @bp.route('/employee')
 @login_required
 def employee_dashboard():
@@ -112,12 +144,10 @@ def employee_dashboard():
         flash('You do not have permission to access the employee dashboard.')
         return redirect(url_for('main.index'))
     
-    pending_clubs = Club.query.filter_by(approved=False).all()
-    pending_players = Player.query.filter_by(approved=False).all()
-    pending_courses = Course.query.filter_by(approved=False).all()
+    pending = pending_by_type()
     
     return render_template('employee/dashboard.html', 
                            title='Content Moderation',
-                           pending_clubs=pending_clubs,
-                           pending_players=pending_players,
-                           pending_courses=pending_courses)
\ No newline at end of file
+                           pending_clubs=pending['club'],
+                           pending_players=pending['player'],
+                           pending_courses=pending['course'])
\ No newline at end of file
@@ -1,66 +1,64 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
+from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from app import db
-from app.models.content import Player, Vote
+from app.models.content import Player
 from app.models.user import User
-from app.utils.forms import PlayerForm
-from werkzeug.utils import secure_filename
-import os
-import csv
-import io
-from datetime import datetime
+from app.utils.facets import facet_index
+from app.utils.ranking import leaderboard
+from app.utils.events import item_saved
+from app.utils.importer import stash_upload
+from app.utils.jobs import enqueue
+from app.utils.votes import vote_buffer
+from app.utils.images import queue_image
+from app.utils.conditional import conditional
+from app.utils.routing import replica_reads
 
 bp = Blueprint('players', __name__, url_prefix='/players')
 
 @bp.route('/')
+@replica_reads
+@conditional(Player)
 def index():
     page = request.args.get('page', 1, type=int)
     sort_by = request.args.get('sort', 'votes')
     filter_country = request.args.get('country')
     
     query = Player.query.filter_by(approved=True)
+    facets = {}
     
     if filter_country:
         query = query.filter_by(country=filter_country)
+        facets['country'] = filter_country
     
-    if sort_by == 'votes':
-        players = query.join(Vote, Player.id == Vote.player_id)\
-            .group_by(Player.id)\
-            .order_by(db.func.count(Vote.id).desc())\
-            .paginate(page=page, per_page=12)
-    elif sort_by == 'ranking':
+    if sort_by == 'ranking':
         players = query.order_by(Player.world_ranking).paginate(page=page, per_page=12)
     elif sort_by == 'name':
         players = query.order_by(Player.name).paginate(page=page, per_page=12)
     else:
-        players = query.join(Vote, Player.id == Vote.player_id)\
-            .group_by(Player.id)\
-            .order_by(db.func.count(Vote.id).desc())\
-            .paginate(page=page, per_page=12)
+        # 'votes' (the default) is served from the precomputed ranking
+        players = leaderboard.paginate(Player, page=page, per_page=12, **facets)
     
-    # Get unique countries for filtering
-    countries = db.session.query(Player.country).distinct().all()
+    # Countries for filtering, with the number of approved players for each
+    country_counts = facet_index.counts(Player, 'country')
     
     return render_template('players/index.html', 
                            title='Golf Players',
                            players=players,
-                           countries=[country[0] for country in countries],
+                           countries=list(country_counts),
+                           country_counts=country_counts,
                            current_sort=sort_by,
                            current_country=filter_country)
 
 @bp.route('/<int:id>')
+@replica_reads
+@conditional(Player)
 def show(id):
     player = Player.query.filter_by(id=id, approved=True).first_or_404()
     
     # Check if current user has voted for this player
     user_voted = False
     if current_user.is_authenticated:
-        vote = Vote.query.filter_by(
-            user_id=current_user.id,
-            player_id=player.id,
-            content_type='player'
-        ).first()
-        user_voted = vote is not None
+        user_voted = vote_buffer.voted(current_user.id, player)
     
     # Get associated user if this is a verified player
     user_account = player.user_account if player.user_id else None
@@ -74,21 +72,13 @@ def show(id):
 @bp.route('/new', methods=['GET', 'POST'])
 @login_required
 def new():
+    from app.utils.forms import PlayerForm
+    
     form = PlayerForm()
     if form.validate_on_submit():
-        # Handle image upload
-        image_url = None
-        if form.profile_image.data:
-            filename = secure_filename(form.profile_image.data.filename)
-            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-            filename = f"{timestamp}_{filename}"
-            form.profile_image.data.save(os.path.join(current_app.config['UPLOAD_FOLDER'], 'players', filename))
-            image_url = f'/static/uploads/players/{filename}'
-        
         # Create player
         player = Player(
             name=form.name.data,
-            profile_image=image_url,
             bio=form.bio.data,
             country=form.country.data,
             world_ranking=form.world_ranking.data,
@@ -102,6 +92,9 @@ def new():
         
         db.session.add(player)
         db.session.commit()
+        item_saved(player)
+        if form.profile_image.data:
+            queue_image(form.profile_image.data, 'players', player.id)
         
         flash('Your player has been submitted for approval!' if not player.approved else 'Player added successfully!')
         return redirect(url_for('players.show', id=player.id))
@@ -118,16 +111,10 @@ def edit(id):
         flash('You do not have permission to edit this player.')
         return redirect(url_for('players.show', id=player.id))
     
+    from app.utils.forms import PlayerForm
+    
     form = PlayerForm()
     if form.validate_on_submit():
-        # Handle image upload
-        if form.profile_image.data:
-            filename = secure_filename(form.profile_image.data.filename)
-            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-            filename = f"{timestamp}_{filename}"
-            form.profile_image.data.save(os.path.join(current_app.config['UPLOAD_FOLDER'], 'players', filename))
-            player.profile_image = f'/static/uploads/players/{filename}'
-        
         player.name = form.name.data
         player.bio = form.bio.data
         player.country = form.country.data
@@ -137,6 +124,9 @@ def edit(id):
         player.tour_wins = form.tour_wins.data
         
         db.session.commit()
+        item_saved(player)
+        if form.profile_image.data:
+            queue_image(form.profile_image.data, 'players', player.id)
         
         flash('Player updated successfully!')
         return redirect(url_for('players.show', id=player.id))
@@ -157,28 +147,11 @@ def edit(id):
 def vote(id):
     player = Player.query.filter_by(id=id, approved=True).first_or_404()
     
-    # Check if user has already voted
-    existing_vote = Vote.query.filter_by(
-        user_id=current_user.id,
-        player_id=player.id,
-        content_type='player'
-    ).first()
-    
-    if existing_vote:
-        # Remove vote if it exists
-        db.session.delete(existing_vote)
-        db.session.commit()
-        flash('Your vote has been removed.')
-    else:
-        # Add new vote
-        vote = Vote(
-            user_id=current_user.id,
-            player_id=player.id,
-            content_type='player'
-        )
-        db.session.add(vote)
-        db.session.commit()
+    # Buffered and written in batches, see app/utils/votes.py
+    if vote_buffer.toggle(current_user.id, player):
         flash('Your vote has been recorded!')
+    else:
+        flash('Your vote has been removed.')
     
     return redirect(url_for('players.show', id=player.id))
 
@@ -193,6 +166,7 @@ def approve(id):
     player = Player.query.get_or_404(id)
     player.approved = True
     db.session.commit()
+    item_saved(player)
     
     flash('Player has been approved!')
     
@@ -251,33 +225,9 @@ def import_players():
             return redirect(request.url)
         
         if file:
-            try:
-                csv_data = file.read().decode('utf-8')
-                csv_file = io.StringIO(csv_data)
-                csv_reader = csv.DictReader(csv_file)
-                
-                players_imported = 0
-                for row in csv_reader:
-                    player = Player(
-                        name=row.get('name', ''),
-                        profile_image=row.get('profile_image', ''),
-                        bio=row.get('bio', ''),
-                        country=row.get('country', ''),
-                        world_ranking=int(row.get('world_ranking', 0)),
-                        pro_since=int(row.get('pro_since', 0)),
-                        major_wins=int(row.get('major_wins', 0)),
-                        tour_wins=int(row.get('tour_wins', 0)),
-                        submitter=current_user,
-                        approved=True
-                    )
-                    db.session.add(player)
-                    players_imported += 1
-                
-                db.session.commit()
-                flash(f'Successfully imported {players_imported} players!')
-            except Exception as e:
-                flash(f'Error importing CSV file: {str(e)}')
-            
-            return redirect(url_for('players.index'))
+            job = enqueue('import_csv', submitter_id=current_user.id, content='players',
+                          key=stash_upload(file))
+            flash(f'Your import has been queued as job #{job.id}.')
+            return redirect(url_for('jobs.show', id=job.id))
     
     return render_template('players/import.html', title='Import Players')
\ No newline at end of file
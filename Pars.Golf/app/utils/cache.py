@@ -0,0 +1,148 @@
+from app.utils.metrics import CACHE_LOOKUPS
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+import pickle
+
+class NullCache:
+    """Backend that never stores anything, useful for tests and debugging."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, timeout=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def incr(self, key):
+        return 0
+
+    def counter(self, key):
+        return 0
+
+class SimpleCache:
+    """In-process LRU cache with per-entry expiry."""
+
+    def __init__(self, max_entries=1000, default_timeout=300):
+        self.max_entries = max_entries
+        self.default_timeout = default_timeout
+        self._entries = OrderedDict()
+        # Counters live outside the LRU, evicting one could resurrect stale fragments
+        self._counters = {}
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires < monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.default_timeout if timeout is None else timeout
+        expires = monotonic() + timeout if timeout else None
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def counter(self, key):
+        return self._counters.get(key, 0)
+
+class RedisCache:
+    """Shared backend so every worker sees the same entries and namespace versions.
+
+    Counters are stored without a TTL, so the server's maxmemory-policy must only
+    evict keys that have one (volatile-*), or none at all.
+    """
+
+    def __init__(self, url, default_timeout=300, key_prefix='parsgolf:'):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.default_timeout = default_timeout
+        self.key_prefix = key_prefix
+
+    def get(self, key):
+        value = self.client.get(self.key_prefix + key)
+        return None if value is None else pickle.loads(value)
+
+    def set(self, key, value, timeout=None):
+        timeout = self.default_timeout if timeout is None else timeout
+        self.client.set(self.key_prefix + key, pickle.dumps(value), ex=timeout or None)
+
+    def delete(self, key):
+        self.client.delete(self.key_prefix + key)
+
+    def incr(self, key):
+        return self.client.incr(self.key_prefix + key)
+
+    def counter(self, key):
+        return int(self.client.get(self.key_prefix + key) or 0)
+
+class Cache:
+    """Fragment cache with namespace versioning.
+
+    Cached values are grouped into namespaces (one per content table). Bumping a
+    namespace changes the version baked into its keys, so every fragment built from
+    that table is invalidated at once without having to track individual keys.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        cache_type = app.config.get('CACHE_TYPE', 'simple')
+        timeout = app.config.get('CACHE_DEFAULT_TIMEOUT', 300)
+        if cache_type == 'redis':
+            self.backend = RedisCache(app.config['CACHE_REDIS_URL'], default_timeout=timeout)
+        elif cache_type == 'null':
+            self.backend = NullCache()
+        else:
+            self.backend = SimpleCache(max_entries=app.config.get('CACHE_MAX_ENTRIES', 1000),
+                                       default_timeout=timeout)
+        app.extensions['cache'] = self
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value, timeout=None):
+        self.backend.set(key, value, timeout)
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    def version(self, namespace):
+        return self.backend.counter(f'version:{namespace}')
+
+    def bump(self, namespace):
+        return self.backend.incr(f'version:{namespace}')
+
+    def get_or_set(self, namespace, name, builder, timeout=None):
+        key = f'{namespace}:{self.version(namespace)}:{name}'
+        value = self.backend.get(key)
+        if value is None:
+            CACHE_LOOKUPS.labels(namespace, 'miss').inc()
+            value = builder()
+            self.backend.set(key, value, timeout)
+        else:
+            CACHE_LOOKUPS.labels(namespace, 'hit').inc()
+        return value
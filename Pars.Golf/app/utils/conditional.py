@@ -0,0 +1,72 @@
+from flask import current_app, request, session
+from flask_login import current_user
+from app import db
+from app.utils.votes import vote_buffer
+from app.utils.surrogates import surrogate_keys
+from datetime import timezone
+from functools import wraps
+import hashlib
+
+def listing_stamp(model):
+    """When any of model's rows last changed: created, edited, approved, imported or voted on."""
+    return db.session.query(db.func.max(model.updated_at)).scalar()
+
+def conditional(model):
+    """Answer conditional GETs for a page of model's listing, or of one item with an id view arg.
+
+    The ETag is built from a few indexed lookups (the listing stamp, and the item's
+    vote count and the user's vote on item pages), so a 304 is sent before the view
+    queries or renders anything. Anonymous pages may be cached by browsers for
+    HTTP_CACHE_MAX_AGE seconds and by nginx for HTTP_MICROCACHE_TTL, tagged with
+    their surrogate keys; logged in users' pages are private and revalidated every
+    time. Pages showing flashed messages aren't cached at all.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            if '_flashes' in session:
+                response = current_app.make_response(view(**kwargs))
+                response.cache_control.no_store = True
+                return response
+
+            stamp = listing_stamp(model)
+            parts = [model.__tablename__, stamp]
+            if 'id' in kwargs:
+                vote_count = db.session.query(model.vote_count)\
+                    .filter_by(id=kwargs['id'], approved=True).scalar()
+                if vote_count is None:
+                    return view(**kwargs)  # the view 404s
+                parts += [kwargs['id'], vote_count]
+            if current_user.is_authenticated:
+                parts += [current_user.id, current_user.role_id]
+                if 'id' in kwargs:
+                    parts.append(vote_buffer.voted_on(current_user.id, model, kwargs['id']))
+            etag = hashlib.sha1(repr(parts).encode()).hexdigest()
+            last_modified = stamp and stamp.replace(tzinfo=timezone.utc, microsecond=0)
+
+            if request.if_none_match:
+                fresh = request.if_none_match.contains(etag)
+            else:
+                fresh = bool(last_modified and request.if_modified_since
+                             and request.if_modified_since >= last_modified)
+            if fresh:
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(**kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            if current_user.is_authenticated:
+                response.cache_control.private = True
+                response.cache_control.no_cache = True
+            else:
+                response.cache_control.public = True
+                response.cache_control.max_age = current_app.config['HTTP_CACHE_MAX_AGE']
+                # nginx keeps it this long, then revalidates with the ETag
+                response.headers['X-Accel-Expires'] = str(current_app.config['HTTP_MICROCACHE_TTL'])
+            response.headers['Surrogate-Key'] = ' '.join(surrogate_keys(model, kwargs.get('id')))
+            response.vary.add('Cookie')
+            return response
+        return wrapper
+    return decorator
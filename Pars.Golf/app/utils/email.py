@@ -1,15 +1,16 @@
 from flask import current_app, render_template
-from flask_mail import Message
 from threading import Thread
-from app import mail
 from time import time
-import jwt
 
 def send_async_email(app, msg):
+    # Flask-Mail (and smtplib) is only loaded once the app sends its first email
+    from flask_mail import Mail
     with app.app_context():
-        mail.send(msg)
+        state = app.extensions.get('mail') or Mail().init_app(app)
+        state.send(msg)
 
 def send_email(subject, sender, recipients, text_body, html_body):
+    from flask_mail import Message
     msg = Message(subject, sender=sender, recipients=recipients)
     msg.body = text_body
     msg.html = html_body
@@ -29,6 +30,7 @@ def send_password_reset_email(user):
     )
 
 def generate_reset_token(user_id, expires_in=600):
+    import jwt
     return jwt.encode(
         {'reset_password': user_id, 'exp': time() + expires_in},
         current_app.config['SECRET_KEY'],
@@ -36,6 +38,7 @@ def generate_reset_token(user_id, expires_in=600):
     )
 
 def verify_reset_token(token):
+    import jwt
     try:
         from app.models.user import User
         id = jwt.decode(
@@ -0,0 +1,31 @@
+from app import cache
+from app.utils.facets import facet_index
+from app.utils.ranking import leaderboard
+from app.utils.search import search_index
+from app.utils.surrogates import surrogate_keys, purger
+
+# Derived state (leaderboards, facet counts, search index, cached fragments and
+# pages) is refreshed from these hooks, which the route handlers call right after
+# committing a change to a club, player or course.
+
+def item_voted(item):
+    leaderboard.update(item)
+    cache.bump(item.__tablename__)
+    purger.purge(*surrogate_keys(type(item), item.id))
+
+def item_saved(item):
+    """Call after an item is created, edited or approved."""
+    leaderboard.update(item)
+    facet_index.update(item)
+    search_index.index(item)
+    cache.bump(item.__tablename__)
+    purger.purge(*surrogate_keys(type(item), item.id))
+
+def items_imported(model, ids):
+    """Call after each committed chunk of a bulk import."""
+    leaderboard.invalidate(model)
+    facet_index.invalidate(model)
+    search_index.index_ids(model, ids)
+    cache.bump(model.__tablename__)
+    # Only the listing, refreshing every imported item's page would rerender them all
+    purger.purge(*surrogate_keys(model))
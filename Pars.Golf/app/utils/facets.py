@@ -0,0 +1,97 @@
+from flask import current_app
+from app import db
+from collections import Counter
+from threading import Lock
+from time import monotonic
+
+# Filterable columns for each content table
+FACETS = {
+    'clubs': ('brand', 'club_type'),
+    'players': ('country',),
+}
+
+class ModelFacets:
+    """Approved-item counts for every facet value of one model."""
+
+    def __init__(self, model):
+        self.model = model
+        self.attrs = FACETS[model.__tablename__]
+        self.counts = {attr: Counter() for attr in self.attrs}
+        # id -> facet values, so edits can take the old values out again
+        self.members = {}
+        self._sorted = {}
+        self.built_at = None
+
+    def build(self):
+        columns = [getattr(self.model, attr) for attr in self.attrs]
+        rows = db.session.query(self.model.id, *columns).filter_by(approved=True).all()
+        for id, *values in rows:
+            self._add(id, tuple(values))
+        self.built_at = monotonic()
+
+    def _add(self, id, values):
+        self.members[id] = values
+        for attr, value in zip(self.attrs, values):
+            if value:
+                self.counts[attr][value] += 1
+        self._sorted.clear()
+
+    def _remove(self, id):
+        values = self.members.pop(id, None)
+        if values is None:
+            return
+        for attr, value in zip(self.attrs, values):
+            if value:
+                self.counts[attr][value] -= 1
+                if self.counts[attr][value] <= 0:
+                    del self.counts[attr][value]
+        self._sorted.clear()
+
+    def update(self, item):
+        self._remove(item.id)
+        if item.approved:
+            self._add(item.id, tuple(getattr(item, attr) for attr in self.attrs))
+
+    def values(self, attr):
+        if attr not in self._sorted:
+            self._sorted[attr] = dict(sorted(self.counts[attr].items()))
+        return self._sorted[attr]
+
+class FacetIndex:
+    """Per-process map of facet value -> approved item count for the listing filters.
+
+    Built with one query per model and then maintained incrementally from the create,
+    edit, approve and import hooks. Other workers converge after FACET_TTL seconds.
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._lock = Lock()
+
+    def _facets(self, model):
+        facets = self._models.get(model.__tablename__)
+        if facets is None or monotonic() - facets.built_at > current_app.config['FACET_TTL']:
+            facets = ModelFacets(model)
+            facets.build()
+            self._models[model.__tablename__] = facets
+        return facets
+
+    def counts(self, model, attr):
+        """Return {value: count} for the facet, ordered by value."""
+        with self._lock:
+            return self._facets(model).values(attr)
+
+    def update(self, item):
+        with self._lock:
+            facets = self._models.get(item.__tablename__)
+            if facets is not None:
+                facets.update(item)
+
+    def invalidate(self, model=None):
+        with self._lock:
+            if model is None:
+                self._models.clear()
+            else:
+                self._models.pop(model.__tablename__, None)
+
+facet_index = FacetIndex()
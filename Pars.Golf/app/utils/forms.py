@@ -4,6 +4,24 @@ from wtforms import StringField, PasswordField, BooleanField, TextAreaField, Flo
 from wtforms.validators import DataRequired, Email, EqualTo, Length, Optional, NumberRange, URL, ValidationError
 from app.models.user import User
 
+class ImageFile:
+    """Check an upload is an image Pillow can read, from its header alone."""
+
+    def __init__(self, message='That file is not a readable image.'):
+        self.message = message
+
+    def __call__(self, form, field):
+        if not field.data:
+            return
+        from PIL import Image
+        try:
+            with Image.open(field.data.stream):
+                pass
+        except (OSError, Image.DecompressionBombError):
+            raise ValidationError(self.message)
+        finally:
+            field.data.stream.seek(0)
+
 class LoginForm(FlaskForm):
     email = StringField('Email', validators=[DataRequired(), Email()])
     password = PasswordField('Password', validators=[DataRequired()])
@@ -40,7 +58,7 @@ class ResetPasswordForm(FlaskForm):
     submit = SubmitField('Reset Password')
 
 class EditProfileForm(FlaskForm):
-    profile_image = FileField('Profile Picture', validators=[FileAllowed(['jpg', 'png', 'jpeg'], 'Images only!')])
+    profile_image = FileField('Profile Picture', validators=[FileAllowed(['jpg', 'png', 'jpeg'], 'Images only!'), ImageFile()])
     bio = TextAreaField('About Me', validators=[Length(max=500)])
     submit = SubmitField('Save Changes')
 
@@ -59,7 +77,7 @@ class ClubForm(FlaskForm):
                             ],
                             validators=[DataRequired()])
     description = TextAreaField('Description', validators=[DataRequired()])
-    image = FileField('Club Image', validators=[FileAllowed(['jpg', 'png', 'jpeg'], 'Images only!')])
+    image = FileField('Club Image', validators=[FileAllowed(['jpg', 'png', 'jpeg'], 'Images only!'), ImageFile()])
     purchase_link = StringField('Purchase Link', validators=[URL(), Optional()])
     price = FloatField('Price (USD)', validators=[NumberRange(min=0), Optional()])
     release_year = IntegerField('Release Year', validators=[Optional()])
@@ -67,7 +85,7 @@ class ClubForm(FlaskForm):
 
 class PlayerForm(FlaskForm):
     name = StringField('Player Name', validators=[DataRequired(), Length(max=100)])
-    profile_image = FileField('Profile Image', validators=[FileAllowed(['jpg', 'png', 'jpeg'], 'Images only!')])
+    profile_image = FileField('Profile Image', validators=[FileAllowed(['jpg', 'png', 'jpeg'], 'Images only!'), ImageFile()])
     bio = TextAreaField('Biography', validators=[DataRequired()])
     country = StringField('Country', validators=[DataRequired(), Length(max=100)])
     world_ranking = IntegerField('World Ranking', validators=[Optional()])
@@ -80,7 +98,7 @@ class CourseForm(FlaskForm):
     name = StringField('Course Name', validators=[DataRequired(), Length(max=100)])
     location = StringField('Location', validators=[DataRequired(), Length(max=100)])
     description = TextAreaField('Description', validators=[DataRequired()])
-    image = FileField('Course Image', validators=[FileAllowed(['jpg', 'png', 'jpeg'], 'Images only!')])
+    image = FileField('Course Image', validators=[FileAllowed(['jpg', 'png', 'jpeg'], 'Images only!'), ImageFile()])
     website = StringField('Website', validators=[URL(), Optional()])
     par = IntegerField('Par', validators=[NumberRange(min=54, max=80), Optional()])
     length_yards = IntegerField('Length (Yards)', validators=[NumberRange(min=5000, max=8000), Optional()])
@@ -0,0 +1,122 @@
+from flask import current_app
+from app import db
+from app.models.sync import SyncPage
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import requests
+
+# records is None when the server answered 304 Not Modified
+Page = namedtuple('Page', 'number url records total_pages etag last_modified')
+Validators = namedtuple('Validators', 'etag last_modified total_pages')
+
+class GolfApiClient:
+    """Pages through GET {base_url}/courses?page=N&per_page=M.
+
+    Expects JSON like {"courses": [...], "page": N, "total_pages": K}. Requests share
+    one pooled session; up to `workers` pages are fetched at once. 429 and 5xx answers
+    are retried with exponential backoff, honouring Retry-After.
+    """
+
+    def __init__(self, base_url, api_key='', workers=4, page_size=100, timeout=10, retries=5):
+        self.base_url = base_url.rstrip('/')
+        self.workers = workers
+        self.page_size = page_size
+        self.timeout = timeout
+        retry = Retry(total=retries, backoff_factor=0.5,
+                      status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset(['GET']),
+                      respect_retry_after_header=True, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers, pool_block=True,
+                              max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['Accept'] = 'application/json'
+        if api_key:
+            self.session.headers['Authorization'] = f'Bearer {api_key}'
+
+    @classmethod
+    def from_config(cls):
+        config = current_app.config
+        return cls(config['GOLF_API_URL'], config['GOLF_API_KEY'],
+                   workers=config['GOLF_API_WORKERS'], page_size=config['GOLF_API_PAGE_SIZE'],
+                   timeout=config['GOLF_API_TIMEOUT'], retries=config['GOLF_API_RETRIES'])
+
+    def page_url(self, number):
+        return f'{self.base_url}/courses?page={number}&per_page={self.page_size}'
+
+    def fetch_page(self, number, validators=None):
+        url = self.page_url(number)
+        headers = {}
+        if validators and validators.etag:
+            headers['If-None-Match'] = validators.etag
+        if validators and validators.last_modified:
+            headers['If-Modified-Since'] = validators.last_modified
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            return Page(number, url, None, validators.total_pages, validators.etag,
+                        validators.last_modified)
+        response.raise_for_status()
+        data = response.json()
+        return Page(number, url, data.get('courses', []), data.get('total_pages') or 1,
+                    response.headers.get('ETag'), response.headers.get('Last-Modified'))
+
+    def pages(self, known=None):
+        """Yield every page, in completion order after the first.
+
+        known maps page URLs to the Validators saved by the last sync. At most
+        2 * workers requests are queued at a time, so a slow consumer doesn't pile
+        pages up in memory.
+        """
+        known = known or {}
+        first = self.fetch_page(1, known.get(self.page_url(1)))
+        yield first
+        numbers = iter(range(2, (first.total_pages or 1) + 1))
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            def submit(number):
+                return executor.submit(self.fetch_page, number, known.get(self.page_url(number)))
+            pending = {submit(number) for number in islice(numbers, self.workers * 2)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+                    pending.update(submit(number) for number in islice(numbers, 1))
+
+def course_row(record):
+    """Map an API course record onto the courses importer's columns."""
+    row = dict(record)
+    row['external_id'] = record.get('id')
+    # Courses from the API are public unless it says otherwise (CSV imports default to private)
+    row.setdefault('is_public', True)
+    return row
+
+def sync_courses(importer, submitter_id, report, full=False, on_page=None):
+    """Upsert every course from the API by external_id.
+
+    Pages that haven't changed since the last sync come back as 304s and are skipped;
+    full=True ignores the saved validators and re-reads everything. on_page(report,
+    pages_done) is called before each page's bookkeeping commits.
+    """
+    client = GolfApiClient.from_config()
+    known = {}
+    if not full:
+        for page in SyncPage.query.filter(SyncPage.url.startswith(client.base_url + '/courses?')):
+            known[page.url] = Validators(page.etag, page.last_modified, page.total_pages)
+    pages_done = 0
+    for page in client.pages(known):
+        if page.records is not None:
+            importer.import_rows((course_row(record) for record in page.records), submitter_id,
+                                 first_line=(page.number - 1) * client.page_size + 1,
+                                 report=report, upsert_key='external_id')
+            # Only remember the validators once the page's rows are committed
+            db.session.merge(SyncPage(url=page.url, etag=page.etag,
+                                      last_modified=page.last_modified,
+                                      total_pages=page.total_pages))
+        pages_done += 1
+        if on_page:
+            on_page(report, pages_done)
+        db.session.commit()
+    return report
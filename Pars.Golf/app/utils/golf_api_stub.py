@@ -0,0 +1,72 @@
+from flask import Flask, request, jsonify, abort
+from email.utils import formatdate
+from threading import Lock
+import hashlib
+import json
+import random
+import time
+
+def create_stub_app(count=1000, seed=1, rate_limit_every=0, fail_every=0):
+    """A stand-in for the golf course API, for syncing locally without a key.
+
+    Serves `count` generated courses with the same paging, ETag and Last-Modified
+    behaviour the client relies on. Every rate_limit_every-th request gets a 429 and
+    every fail_every-th a 503, to exercise the retry path. POST /courses/<id>/touch
+    edits a course so the next sync has something to update.
+    """
+    app = Flask(__name__)
+    generator = random.Random(seed)
+    cities = ['Augusta, Georgia, USA', 'St Andrews, Scotland, UK', 'Pebble Beach, California, USA',
+              'Melbourne, Australia', 'Portrush, Northern Ireland, UK', 'Kiawah Island, South Carolina, USA']
+    courses = [{
+        'id': f'gc-{number}',
+        'name': f'Golf Course {number}',
+        'location': generator.choice(cities),
+        'description': 'Generated by the golf API stub',
+        'par': generator.choice([70, 71, 72, 73]),
+        'length_yards': generator.randint(6000, 7800),
+        'difficulty_rating': round(generator.uniform(5, 10), 1),
+        'year_built': generator.randint(1860, 2020),
+        'designer': generator.choice(['Alister MacKenzie', 'Pete Dye', 'Tom Fazio', 'Donald Ross']),
+        'is_public': generator.random() < 0.5,
+        'has_hosted_major': generator.random() < 0.05,
+    } for number in range(1, count + 1)]
+    state = {'requests': 0, 'modified': [time.time()] * count}
+    lock = Lock()
+
+    @app.before_request
+    def misbehave():
+        with lock:
+            state['requests'] += 1
+            seen = state['requests']
+        if rate_limit_every and seen % rate_limit_every == 0:
+            return jsonify(error='rate limited'), 429, {'Retry-After': '1'}
+        if fail_every and seen % fail_every == 0:
+            return jsonify(error='unavailable'), 503
+
+    @app.route('/courses')
+    def courses_page():
+        page = request.args.get('page', 1, type=int)
+        per_page = min(request.args.get('per_page', 100, type=int), 500)
+        start = (page - 1) * per_page
+        if page < 1 or (start >= count and count):
+            abort(404)
+        body = json.dumps({'courses': courses[start:start + per_page], 'page': page,
+                           'total_pages': max(1, -(-count // per_page))}, sort_keys=True)
+        etag = '"%s"' % hashlib.md5(body.encode()).hexdigest()
+        last_modified = formatdate(max(state['modified'][start:start + per_page] or [0]), usegmt=True)
+        if request.headers.get('If-None-Match') == etag:
+            return '', 304, {'ETag': etag, 'Last-Modified': last_modified}
+        return app.response_class(body, mimetype='application/json',
+                                  headers={'ETag': etag, 'Last-Modified': last_modified})
+
+    @app.route('/courses/<course_id>/touch', methods=['POST'])
+    def touch(course_id):
+        number = int(course_id.split('-')[-1])
+        if not 1 <= number <= count:
+            abort(404)
+        courses[number - 1]['length_yards'] += 1
+        state['modified'][number - 1] = time.time()
+        return jsonify(courses[number - 1])
+
+    return app
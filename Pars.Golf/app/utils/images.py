@@ -0,0 +1,136 @@
+from flask import current_app
+from flask_login import current_user
+from markupsafe import Markup, escape
+from app import db, storage
+from app.models.content import Club, Player, Course
+from app.models.user import User
+from app.utils.events import item_saved
+from app.utils.jobs import handler, enqueue
+from io import BytesIO
+from uuid import uuid4
+import hashlib
+import re
+
+# Widths every image is resized to, up to its own width and the target's maximum
+WIDTHS = (160, 400, 800, 1600)
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpg': 'image/jpeg'}
+SAVE_OPTIONS = {
+    'avif': {'format': 'AVIF', 'quality': 55},
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+# Upload kind -> (model, column, largest width)
+TARGETS = {
+    'clubs': (Club, 'image_url', 1600),
+    'players': (Player, 'profile_image', 1600),
+    'courses': (Course, 'image_url', 1600),
+    'users': (User, 'profile_image', 400),
+}
+# Processed images are named <content hash>-<largest width>.jpg, with the other
+# widths and formats next to them
+PROCESSED = re.compile(r'^(?P<base>.*[0-9a-f]{20})-(?P<width>\d+)\.jpg$')
+
+def stash_image(file):
+    """Save an uploaded image where image jobs can read it, return its storage key."""
+    return storage.private.save(f'images/{uuid4().hex}', file.stream)
+
+def queue_image(file, kind, id):
+    """Stash an upload for the item (or user) and process it in a background job.
+
+    The item keeps its previous image until the job has written the new one.
+    """
+    return enqueue('process_image', submitter_id=current_user.id,
+                   key=stash_image(file), content=kind, id=id)
+
+def _srgb(image):
+    from PIL import ImageCms
+    icc = image.info.get('icc_profile')
+    if not icc or image.mode not in ('RGB', 'RGBA'):
+        return image
+    try:
+        return ImageCms.profileToProfile(image, ImageCms.ImageCmsProfile(BytesIO(icc)),
+                                         ImageCms.createProfile('sRGB'), outputMode=image.mode)
+    except ImageCms.PyCMSError:
+        return image
+
+def process_image(stream, prefix, max_width=WIDTHS[-1], formats=('avif', 'webp')):
+    """Store resized copies of the image in stream under prefix, in each format plus JPEG.
+
+    Copies are named by a hash of the original, so they never change and can be
+    cached forever. Orientation is applied and colours converted to sRGB before
+    EXIF, ICC and other metadata are dropped. Returns the URL of the largest JPEG.
+    """
+    from PIL import Image, ImageOps
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(64 * 1024), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    key = f'{prefix}/{digest.hexdigest()[:20]}'
+    with Image.open(stream) as original:
+        image = ImageOps.exif_transpose(original)
+        alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+        image = _srgb(image.convert('RGBA' if alpha else 'RGB'))
+    # A fresh image carries no metadata into the encoders
+    image = Image.frombytes(image.mode, image.size, image.tobytes())
+
+    largest = min(image.width, max_width)
+    widths = [width for width in WIDTHS if width < largest] + [largest]
+    for width in widths:
+        resized = image if width == image.width else \
+            image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        for extension in (*formats, 'jpg'):
+            output = resized
+            if extension == 'jpg' and alpha:
+                output = Image.new('RGB', resized.size, 'white')
+                output.paste(resized, mask=resized.getchannel('A'))
+            encoded = BytesIO()
+            output.save(encoded, **SAVE_OPTIONS[extension])
+            encoded.seek(0)
+            storage.uploads.save(f'{key}-{width}.{extension}', encoded, MIME_TYPES[extension], immutable=True)
+    return storage.uploads.url(f'{key}-{largest}.jpg')
+
+@handler('process_image')
+def run_process_image(job):
+    params = job.params
+    model, column, max_width = TARGETS[params['content']]
+    with storage.private.open(params['key']) as stream:
+        url = process_image(stream, params['content'], max_width, current_app.config['IMAGE_FORMATS'])
+    item = db.session.get(model, params['id'])
+    if item is not None:
+        setattr(item, column, url)
+        db.session.commit()
+        if model is not User:
+            item_saved(item)
+    storage.private.delete(params['key'])
+
+def _variants(url):
+    match = PROCESSED.match(url or '')
+    if match is None:
+        return None
+    largest = int(match['width'])
+    return match['base'], [width for width in WIDTHS if width < largest] + [largest]
+
+def srcset(url, extension='jpg'):
+    """srcset of a processed image's widths in one format, or just url for other images."""
+    variants = _variants(url)
+    if variants is None:
+        return url
+    base, widths = variants
+    return ', '.join(f'{base}-{width}.{extension} {width}w' for width in widths)
+
+def picture(url, alt, sizes='100vw', **attrs):
+    """<picture> with AVIF/WebP sources and a JPEG fallback, or a plain lazy <img>.
+
+    Extra keyword arguments become attributes of the <img>, with class_ for class.
+    """
+    attributes = ''.join(f' {name.rstrip("_").replace("_", "-")}="{escape(value)}"'
+                         for name, value in attrs.items())
+    img = f'<img src="{escape(url)}" alt="{escape(alt)}" loading="lazy"{attributes}>'
+    variants = _variants(url)
+    if variants is None:
+        return Markup(img)
+    sources = ''.join(
+        f'<source type="{MIME_TYPES[extension]}" srcset="{escape(srcset(url, extension))}" sizes="{escape(sizes)}">'
+        for extension in current_app.config['IMAGE_FORMATS'])
+    img = img.replace('<img ', f'<img srcset="{escape(srcset(url))}" sizes="{escape(sizes)}" ', 1)
+    return Markup(f'<picture>{sources}{img}</picture>')
@@ -0,0 +1,262 @@
+from flask import current_app
+from app import db, storage
+from app.models.content import Club, Player, Course
+from app.utils.events import items_imported
+from app.utils.jobs import handler, save_progress
+from sqlalchemy.exc import SQLAlchemyError
+from itertools import islice
+from uuid import uuid4
+import csv
+import io
+
+MAX_REPORTED_ERRORS = 1000
+
+def text(value):
+    return '' if value is None else str(value).strip()
+
+def integer(value):
+    if isinstance(value, int):
+        return value
+    return int(float(text(value))) if text(value) else None
+
+def number(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    return float(text(value)) if text(value) else None
+
+def boolean(value):
+    if isinstance(value, bool):
+        return value
+    return text(value).lower() in ('true', '1', 'yes', 'y')
+
+class ImportReport:
+    """Outcome of an import: how many rows made it in and why the others didn't."""
+
+    def __init__(self):
+        self.rows_read = 0
+        self.imported = 0
+        self.updated = 0  # upserts only
+        self.unchanged = 0
+        self.error_count = 0
+        self.errors = []  # (line number, message), capped at MAX_REPORTED_ERRORS
+
+    @classmethod
+    def resume(cls, job):
+        """Pick up the counters a background job committed before it was interrupted."""
+        report = cls()
+        report.rows_read = job.processed or 0
+        report.imported = job.succeeded or 0
+        report.updated = job.updated or 0
+        report.unchanged = job.unchanged or 0
+        report.error_count = job.error_count or 0
+        report.errors = [tuple(error) for error in job.error_list]
+        return report
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def error_summary(self, limit=5):
+        summary = '; '.join(f'row {line}: {message}' for line, message in self.errors[:limit])
+        if self.error_count > limit:
+            summary += f' (and {self.error_count - limit} more)'
+        return f'{self.error_count} rows were skipped: {summary}'
+
+class Importer:
+    """Validates, coerces and bulk-inserts rows for one content model.
+
+    Rows are consumed lazily and written in chunks of IMPORT_CHUNK_SIZE, each in its
+    own transaction, so memory stays flat regardless of file size and a bad row is
+    reported instead of aborting the whole import.
+    """
+
+    def __init__(self, model, fields, required=('name',)):
+        self.model = model
+        self.fields = fields  # column -> (coercer, default when blank)
+        self.required = required
+
+    def coerce(self, row):
+        values = {}
+        for column, (coercer, default) in self.fields.items():
+            try:
+                value = coercer(row.get(column))
+            except (TypeError, ValueError, OverflowError):
+                raise ValueError(f'invalid {column} {row.get(column)!r}')
+            if value is None or value == '':
+                value = default
+            length = getattr(getattr(self.model, column).type, 'length', None)
+            if length and isinstance(value, str) and len(value) > length:
+                raise ValueError(f'{column} is longer than {length} characters')
+            values[column] = value
+        for column in self.required:
+            if not values.get(column):
+                raise ValueError(f'{column} is required')
+        return values
+
+    def import_rows(self, rows, submitter_id, chunk_size=None, first_line=1, report=None,
+                    on_chunk=None, upsert_key=None):
+        """Import an iterable of dicts. first_line is the line number of the first row.
+
+        With upsert_key (e.g. 'external_id') rows matching an existing record update it
+        when any field differs and are left alone otherwise, so re-syncs are cheap.
+
+        on_chunk(report, line) is called inside each chunk's transaction, just before it
+        commits, with the last line the committed work covers. Background jobs use it to
+        store their progress atomically with the rows themselves.
+        """
+        chunk_size = chunk_size or current_app.config['IMPORT_CHUNK_SIZE']
+        report = report or ImportReport()
+        chunk = []
+        for line, row in enumerate(rows, start=first_line):
+            report.rows_read += 1
+            try:
+                values = self.coerce(row)
+                if upsert_key and not values.get(upsert_key):
+                    raise ValueError(f'{upsert_key} is required')
+            except ValueError as e:
+                report.add_error(line, str(e))
+                continue
+            values.update(submitter_id=submitter_id, approved=True)
+            chunk.append((line, values))
+            if len(chunk) >= chunk_size:
+                self._write(chunk, report, on_chunk, upsert_key)
+                chunk = []
+        if chunk:
+            self._write(chunk, report, on_chunk, upsert_key)
+        return report
+
+    def import_csv(self, stream, submitter_id, chunk_size=None, skip=0, report=None,
+                   on_chunk=None):
+        """Import from a binary upload stream without reading it into memory.
+
+        skip data rows are passed over first, which is how interrupted jobs resume.
+        """
+        reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+        # Line 1 is the header
+        return self.import_rows(islice(reader, skip, None), submitter_id, chunk_size=chunk_size,
+                                first_line=2 + skip, report=report, on_chunk=on_chunk)
+
+    def _apply(self, chunk, report, upsert_key=None):
+        """Write a chunk in the current transaction and return the ids it touched."""
+        if upsert_key:
+            return self._upsert(chunk, report, upsert_key)
+        ids = db.session.scalars(db.insert(self.model).returning(self.model.id),
+                                 [values for _, values in chunk]).all()
+        report.imported += len(ids)
+        return ids
+
+    def _upsert(self, chunk, report, key):
+        column = getattr(self.model, key)
+        existing = {row[key]: row for row in db.session.execute(
+            db.select(self.model.id, *[getattr(self.model, name) for name in self.fields])
+            .where(column.in_([values[key] for _, values in chunk]))
+        ).mappings()}
+        inserts, updates = [], []
+        for _, values in chunk:
+            current = existing.get(values[key])
+            if current is None:
+                inserts.append(values)
+            elif any(current[name] != values[name] for name in self.fields):
+                # Leave the submitter and moderation state of existing rows alone
+                updates.append(dict({name: values[name] for name in self.fields}, id=current['id']))
+            else:
+                report.unchanged += 1
+        ids = []
+        if inserts:
+            ids += db.session.scalars(db.insert(self.model).returning(self.model.id), inserts).all()
+            report.imported += len(inserts)
+        if updates:
+            db.session.execute(db.update(self.model), updates)
+            report.updated += len(updates)
+            ids += [values['id'] for values in updates]
+        return ids
+
+    def _write(self, chunk, report, on_chunk=None, upsert_key=None):
+        counts = (report.imported, report.updated, report.unchanged)
+        try:
+            ids = self._apply(chunk, report, upsert_key)
+            if on_chunk:
+                on_chunk(report, chunk[-1][0])
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+            report.imported, report.updated, report.unchanged = counts
+            # Find the offending rows by retrying the chunk one row at a time
+            ids = []
+            for line, values in chunk:
+                counts = (report.imported, report.updated, report.unchanged)
+                try:
+                    touched = self._apply([(line, values)], report, upsert_key)
+                    if on_chunk:
+                        on_chunk(report, line)
+                    db.session.commit()
+                    ids += touched
+                except SQLAlchemyError as e:
+                    db.session.rollback()
+                    report.imported, report.updated, report.unchanged = counts
+                    report.add_error(line, str(e.orig if hasattr(e, 'orig') else e))
+        if ids:
+            items_imported(self.model, ids)
+
+IMPORTERS = {
+    'clubs': Importer(Club, {
+        'name': (text, ''),
+        'brand': (text, ''),
+        'club_type': (text, ''),
+        'description': (text, ''),
+        'image_url': (text, ''),
+        'purchase_link': (text, ''),
+        'price': (number, 0),
+        'release_year': (integer, 0),
+    }),
+    'players': Importer(Player, {
+        'name': (text, ''),
+        'profile_image': (text, ''),
+        'bio': (text, ''),
+        'country': (text, ''),
+        'world_ranking': (integer, 0),
+        'pro_since': (integer, 0),
+        'major_wins': (integer, 0),
+        'tour_wins': (integer, 0),
+    }),
+    'courses': Importer(Course, {
+        'name': (text, ''),
+        'location': (text, ''),
+        'description': (text, ''),
+        'image_url': (text, ''),
+        'website': (text, ''),
+        'par': (integer, 72),
+        'length_yards': (integer, 0),
+        'difficulty_rating': (number, 0),
+        'year_built': (integer, 0),
+        'designer': (text, ''),
+        'is_public': (boolean, False),
+        'has_hosted_major': (boolean, False),
+        'external_id': (text, None),
+    }),
+}
+
+def stash_upload(file):
+    """Save an uploaded CSV where import workers can read it, return its storage key."""
+    return storage.private.save(f'imports/{uuid4().hex}.csv', file.stream, 'text/csv')
+
+@handler('import_csv')
+def run_csv_import(job):
+    params = job.params
+    report = ImportReport.resume(job)
+    with storage.private.open(params['key']) as stream:
+        # Line 1 is the header, so line N is data row N - 1
+        IMPORTERS[params['content']].import_csv(
+            stream, job.submitter_id, skip=job.checkpoint or 0, report=report,
+            on_chunk=lambda report, line: save_progress(job, report, line - 1))
+    save_progress(job, report, report.rows_read)
+    storage.private.delete(params['key'])
+
+@handler('sync_golf_api')
+def run_golf_api_sync(job):
+    from app.utils.golf_api import sync_courses  # requests, only for the course API
+    report = ImportReport.resume(job)
+    # Pages committed before an interruption come back as 304s, so re-running resumes
+    sync_courses(IMPORTERS['courses'], job.submitter_id, report, full=job.params.get('full', False),
+                 on_page=lambda report, pages: save_progress(job, report, pages))
@@ -0,0 +1,200 @@
+from flask import g, request, current_app, has_app_context, before_render_template, template_rendered
+from collections import defaultdict, deque
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from threading import Lock
+from time import perf_counter
+import heapq
+import random
+
+# Upper bounds in milliseconds, the last bucket catches everything slower
+BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, float('inf'))
+SLOWEST_PER_REQUEST = 3
+MAX_STATEMENT_LENGTH = 500
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.max = max(self.max, value)
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of observations."""
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if count and seen >= target:
+                return min(bound, self.max)
+        return 0.0
+
+class RequestStats:
+    """SQL activity and template renders of one sampled request."""
+
+    def __init__(self, slow_query_ms):
+        self.started = perf_counter()
+        self.slow_query_ms = slow_query_ms
+        self.queries = 0
+        self.db_time = 0.0  # ms
+        self.slowest = []  # min-heap of (ms, statement)
+        self.templates = defaultdict(float)  # name -> ms, excluding templates rendered inside it
+        self.renders = []  # [started, ms spent in nested renders] of renders in progress
+
+    def record(self, statement, elapsed):
+        self.queries += 1
+        self.db_time += elapsed
+        entry = (elapsed, statement[:MAX_STATEMENT_LENGTH])
+        if len(self.slowest) < SLOWEST_PER_REQUEST:
+            heapq.heappush(self.slowest, entry)
+        elif entry > self.slowest[0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def start_render(self):
+        self.renders.append([perf_counter(), 0.0])
+
+    def finish_render(self, name):
+        if not self.renders:
+            return
+        started, nested = self.renders.pop()
+        elapsed = (perf_counter() - started) * 1000
+        self.templates[name] += elapsed - nested
+        if self.renders:
+            self.renders[-1][1] += elapsed
+
+class EndpointStats:
+    def __init__(self):
+        self.duration = Histogram()
+        self.db_time = Histogram()
+        self.queries = Histogram()
+
+class Instrumentation:
+    """Per-request SQL query counts and timings, and template render times, sampled at
+    SQL_STATS_SAMPLE_RATE.
+
+    Sampled requests get a Server-Timing header and feed per-endpoint and
+    per-template histograms; statements slower than SLOW_QUERY_MS are logged and
+    kept for the admin debug page. Everything is per worker process and reset on
+    restart. Unsampled requests cost one random() call.
+    """
+
+    def __init__(self):
+        self.endpoints = defaultdict(EndpointStats)
+        self.templates = defaultdict(Histogram)
+        self.slow_queries = deque(maxlen=100)
+        self.sample_rate = 1.0
+        self.slow_query_ms = 100
+        self._lock = Lock()
+
+    def init_app(self, app):
+        self.sample_rate = app.config.get('SQL_STATS_SAMPLE_RATE', 1.0)
+        self.slow_query_ms = app.config.get('SLOW_QUERY_MS', 100)
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        before_render_template.connect(self._start_render, app)
+        template_rendered.connect(self._finish_render, app)
+        app.extensions['instrumentation'] = self
+
+    def _start(self):
+        if self.sample_rate and random.random() < self.sample_rate:
+            g.sql_stats = RequestStats(self.slow_query_ms)
+
+    def _start_render(self, app, template, context, **extra):
+        stats = g.get('sql_stats')
+        if stats is not None:
+            stats.start_render()
+
+    def _finish_render(self, app, template, context, **extra):
+        stats = g.get('sql_stats')
+        if stats is not None:
+            stats.finish_render(template.name or 'string')
+
+    def _finish(self, response):
+        stats = g.pop('sql_stats', None)
+        if stats is None:
+            return response
+        duration = (perf_counter() - stats.started) * 1000
+        response.headers.add('Server-Timing',
+                             f'db;dur={stats.db_time:.1f};desc="{stats.queries} queries", '
+                             f'app;dur={duration:.1f}')
+        for name, elapsed in stats.templates.items():
+            response.headers.add('Server-Timing', f'tpl;dur={elapsed:.1f};desc="{name}"')
+        endpoint = request.endpoint or 'unmatched'
+        with self._lock:
+            endpoint_stats = self.endpoints[endpoint]
+            endpoint_stats.duration.observe(duration)
+            endpoint_stats.db_time.observe(stats.db_time)
+            endpoint_stats.queries.observe(stats.queries)
+            for name, elapsed in stats.templates.items():
+                self.templates[name].observe(elapsed)
+            for elapsed, statement in stats.slowest:
+                if elapsed >= self.slow_query_ms:
+                    self.slow_queries.appendleft((elapsed, endpoint, statement))
+        return response
+
+    def snapshot(self):
+        """Per-endpoint summaries, slowest median first, per-template render times, most
+        total time first, and the recent slow queries."""
+        with self._lock:
+            rows = [{
+                'endpoint': endpoint,
+                'requests': stats.duration.count,
+                'p50': stats.duration.percentile(0.5),
+                'p95': stats.duration.percentile(0.95),
+                'max': stats.duration.max,
+                'db_mean': stats.db_time.mean,
+                'db_p95': stats.db_time.percentile(0.95),
+                'queries_mean': stats.queries.mean,
+                'queries_max': stats.queries.max,
+            } for endpoint, stats in self.endpoints.items()]
+            templates = [{
+                'template': name,
+                'requests': stats.count,
+                'total': stats.total,
+                'mean': stats.mean,
+                'p95': stats.percentile(0.95),
+                'max': stats.max,
+            } for name, stats in self.templates.items()]
+            slow_queries = list(self.slow_queries)
+        rows.sort(key=lambda row: -row['p50'])
+        templates.sort(key=lambda row: -row['total'])
+        return rows, templates, slow_queries
+
+    def reset(self):
+        with self._lock:
+            self.endpoints.clear()
+            self.templates.clear()
+            self.slow_queries.clear()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context so a failed statement can't leave a stale start time
+    if context is not None:
+        context._stats_started = perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = g.get('sql_stats') if has_app_context() else None
+    if stats is None or context is None:
+        return
+    elapsed = (perf_counter() - context._stats_started) * 1000
+    stats.record(statement, elapsed)
+    if elapsed >= stats.slow_query_ms:
+        current_app.logger.warning(f'Slow query ({elapsed:.0f} ms) in {request.endpoint}: '
+                                   f'{statement[:MAX_STATEMENT_LENGTH]}')
@@ -0,0 +1,205 @@
+from flask import current_app
+from app import db
+from app.models.job import Job
+from datetime import datetime, timedelta
+from threading import Event, Lock, Thread
+import json
+import os
+import socket
+import traceback
+
+HANDLERS = {}
+
+class JobLost(Exception):
+    """The job was requeued and claimed again while this worker was still running it."""
+
+def handler(kind):
+    """Register a function(job) that runs jobs of the given kind."""
+    def decorator(f):
+        HANDLERS[kind] = f
+        return f
+    return decorator
+
+def enqueue(kind, submitter_id=None, **params):
+    job = Job(kind=kind, payload=json.dumps(params), submitter_id=submitter_id)
+    db.session.add(job)
+    db.session.commit()
+    pool.wake(current_app._get_current_object())
+    return job
+
+def _held(job):
+    """Conditions matching the job only while this worker's claim on it stands."""
+    worker, attempts = job.lease
+    return Job.id == job.id, Job.status == 'running', Job.worker == worker, Job.attempts == attempts
+
+def hold(job):
+    """Refresh the job's heartbeat in the current transaction, raising JobLost if it was taken away.
+
+    The row stays locked until the transaction ends, so a requeue can't slip in
+    between this check and the caller's commit.
+    """
+    held = db.session.execute(
+        db.update(Job).where(*_held(job)).values(heartbeat_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not held:
+        raise JobLost(f'Job {job.id} was requeued')
+
+def save_progress(job, report, checkpoint):
+    """Record import progress on the job inside the caller's transaction.
+
+    Raises JobLost if the job was requeued, so the caller's work rolls back
+    instead of being committed twice.
+    """
+    hold(job)
+    job.checkpoint = checkpoint
+    job.processed = report.rows_read
+    job.succeeded = report.imported
+    job.updated = report.updated
+    job.unchanged = report.unchanged
+    job.error_count = report.error_count
+    job.errors = json.dumps(report.errors)
+
+def requeue_stale():
+    """Put running jobs whose worker stopped sending heartbeats back in the queue.
+
+    They resume from their checkpoint, so work committed before the crash isn't redone.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['JOB_STALE_AFTER'])
+    result = db.session.execute(
+        db.update(Job)
+        .where(Job.status == 'running', Job.heartbeat_at < cutoff)
+        .values(status='queued', worker=None)
+    )
+    db.session.commit()
+    return result.rowcount
+
+def claim(worker_name):
+    """Atomically take the oldest queued job, or return None."""
+    while True:
+        job_id = db.session.execute(
+            db.select(Job.id).where(Job.status == 'queued').order_by(Job.id).limit(1)
+        ).scalar()
+        if job_id is None:
+            return None
+        now = datetime.utcnow()
+        claimed = db.session.execute(
+            db.update(Job)
+            .where(Job.id == job_id, Job.status == 'queued')
+            .values(status='running', worker=worker_name, heartbeat_at=now,
+                    started_at=db.func.coalesce(Job.started_at, now),
+                    attempts=Job.attempts + 1)
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            job = db.session.get(Job, job_id)
+            # What this claim is checked against; the columns change if the job is requeued
+            job.lease = (worker_name, job.attempts)
+            return job
+        # Another worker got there first, try the next one
+
+class Heartbeat(Thread):
+    """Keeps a running job's heartbeat fresh, so chunks slower than JOB_STALE_AFTER aren't requeued."""
+
+    def __init__(self, app, job):
+        super().__init__(daemon=True)
+        self.app = app
+        self.job = job
+        self.stopped = Event()
+
+    def run(self):
+        interval = self.app.config['JOB_STALE_AFTER'] / 3
+        while not self.stopped.wait(interval):
+            with self.app.app_context():
+                try:
+                    db.session.execute(
+                        db.update(Job).where(*_held(self.job)).values(heartbeat_at=datetime.utcnow())
+                        .execution_options(synchronize_session=False)
+                    )
+                    db.session.commit()
+                except Exception:
+                    # e.g. the database is locked by the job's own chunk; try again next time
+                    db.session.rollback()
+                    self.app.logger.warning(f'Job {self.job.id} heartbeat failed:\n{traceback.format_exc()}')
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+def run(job):
+    heartbeat = Heartbeat(current_app._get_current_object(), job)
+    heartbeat.start()
+    try:
+        try:
+            HANDLERS[job.kind](job)
+            status, message = 'done', None
+        except JobLost:
+            raise
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f'Job {job.id} failed:\n{traceback.format_exc()}')
+            status, message = 'failed', str(e)
+        hold(job)
+        job.status = status
+        job.message = message
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+    except JobLost:
+        db.session.rollback()
+        current_app.logger.warning(f'Job {job.id} was requeued while running here, leaving it to its new worker')
+    finally:
+        heartbeat.stop()
+
+def work(app, worker_name, stop=None, once=False):
+    """Process jobs until stop is set (or the queue is empty when once is True)."""
+    stop = stop or Event()
+    while not stop.is_set():
+        with app.app_context():
+            try:
+                requeue_stale()
+                job = claim(worker_name)
+                if job is not None:
+                    run(job)
+                    continue
+            except Exception:
+                if once:
+                    raise
+                # e.g. the database restarting or a table missing mid-deploy; keep the thread alive
+                db.session.rollback()
+                current_app.logger.exception(f'Job worker {worker_name} failed, retrying')
+                stop.wait(app.config['JOB_POLL_INTERVAL'])
+                continue
+        if once:
+            return
+        pool.idle.wait(app.config['JOB_POLL_INTERVAL'])
+        pool.idle.clear()
+
+class WorkerPool:
+    """In-process worker threads, started on first use when JOB_WORKERS > 0.
+
+    Set JOB_WORKERS=0 and run 'flask jobs-worker' to process jobs in a separate process.
+    """
+
+    def __init__(self):
+        self.threads = []
+        self.idle = Event()
+        self.stop = Event()
+        self._lock = Lock()
+
+    def start(self, app):
+        if self.threads or not app.config['JOB_WORKERS']:
+            return
+        with self._lock:
+            if self.threads or not app.config['JOB_WORKERS']:
+                return
+            for i in range(app.config['JOB_WORKERS']):
+                name = f'{socket.gethostname()}:{os.getpid()}:{i}'
+                thread = Thread(target=work, args=(app, name, self.stop), daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def wake(self, app):
+        self.start(app)
+        self.idle.set()
+
+pool = WorkerPool()
@@ -0,0 +1,90 @@
+from app import db
+from datetime import datetime
+import base64
+import json
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(value, id):
+    return base64.urlsafe_b64encode(json.dumps([value, id]).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        value, id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if not isinstance(id, int) or isinstance(value, (list, dict)):
+        raise InvalidCursor(cursor)
+    return value, id
+
+class Keyset:
+    """Keyset (cursor) pagination ordered by (column, id).
+
+    Each page continues from the last row of the previous one with a
+    (column, id) > (value, id) condition, so it's one indexed range scan however
+    deep it is, and nothing counts the whole result. Ties in column are broken
+    by id in the same direction. Rows where a nullable column is NULL come after
+    all the others, in id order.
+    """
+
+    def __init__(self, column, id_column, descending=False):
+        self.column = column
+        self.id_column = id_column
+        self.descending = descending
+        self.nullable = column.expression.nullable
+
+    def _parse(self, value):
+        # Cursors come from clients, so check the value fits the column before it's bound
+        if value is None:
+            return None
+        python_type = self.column.type.python_type
+        try:
+            if python_type is datetime:
+                return datetime.fromisoformat(value)
+            if python_type is float and isinstance(value, int) and not isinstance(value, bool):
+                return float(value)
+        except (TypeError, ValueError):
+            raise InvalidCursor(value)
+        if not isinstance(value, python_type) or isinstance(value, bool) != (python_type is bool):
+            raise InvalidCursor(value)
+        return value
+
+    def _after(self, columns, values):
+        key, bound = db.tuple_(*columns), db.tuple_(*values)
+        return key < bound if self.descending else key > bound
+
+    def _order(self, *columns):
+        return [column.desc() if self.descending else column for column in columns]
+
+    def page(self, query, cursor=None, limit=20):
+        """Return (rows, next_cursor) for the page after cursor; next_cursor is None on the last page."""
+        after = None
+        if cursor:
+            value, id = decode_cursor(cursor)
+            after = (self._parse(value), id)
+        rows = []
+        if after is None or after[0] is not None:
+            ranked = query.filter(self.column.isnot(None)) if self.nullable else query
+            if after is not None:
+                ranked = ranked.filter(self._after((self.column, self.id_column), after))
+            rows = ranked.order_by(*self._order(self.column, self.id_column)).limit(limit + 1).all()
+            if len(rows) > limit or not self.nullable:
+                return self._result(rows, limit)
+            after = None
+        # Past the last non-NULL value, or it was NULL on the previous page already
+        unranked = query.filter(self.column.is_(None))
+        if after is not None:
+            unranked = unranked.filter(self.id_column < after[1] if self.descending
+                                       else self.id_column > after[1])
+        rows += unranked.order_by(*self._order(self.id_column)).limit(limit - len(rows) + 1).all()
+        return self._result(rows, limit)
+
+    def _result(self, rows, limit):
+        if len(rows) <= limit:
+            return rows, None
+        last = rows[limit - 1]
+        value = getattr(last, self.column.key)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        return rows[:limit], encode_cursor(value, getattr(last, self.id_column.key))
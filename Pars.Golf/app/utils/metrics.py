@@ -0,0 +1,122 @@
+from flask import g, request, Response, before_render_template, template_rendered
+from prometheus_client import (CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,
+                               CONTENT_TYPE_LATEST, generate_latest, multiprocess)
+from prometheus_client.core import GaugeMetricFamily
+from time import perf_counter
+import os
+
+# Under gunicorn, PROMETHEUS_MULTIPROC_DIR (set in gunicorn.conf.py before the app is
+# imported) makes every worker write its samples to mmap'd files in that directory,
+# and /metrics merges them, so whichever worker answers the scrape reports totals.
+
+REQUEST_LATENCY = Histogram(
+    'parsgolf_request_duration_seconds', 'Time spent handling a request',
+    ['blueprint', 'endpoint', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+REQUESTS = Counter('parsgolf_requests_total', 'Requests handled',
+                   ['blueprint', 'endpoint', 'method', 'status'])
+REQUESTS_IN_PROGRESS = Gauge('parsgolf_requests_in_progress', 'Requests being handled',
+                             multiprocess_mode='livesum')
+TEMPLATE_RENDER = Histogram(
+    'parsgolf_template_render_seconds', 'Time spent rendering a template', ['template'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1))
+POOL_CHECKOUT_WAIT = Histogram(
+    'parsgolf_db_pool_checkout_seconds',
+    'Time spent waiting for a database connection from the pool',
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30))
+CACHE_LOOKUPS = Counter('parsgolf_cache_lookups_total', 'Fragment cache lookups',
+                        ['namespace', 'result'])
+
+def instrument_pool(engine):
+    """Record how long each checkout from the engine's pool waits for a connection."""
+    pool = engine.pool
+    if getattr(pool, 'timed', False):
+        return
+    base = type(pool)
+
+    def _do_get(self):
+        started = perf_counter()
+        try:
+            return base._do_get(self)
+        finally:
+            POOL_CHECKOUT_WAIT.observe(perf_counter() - started)
+
+    # Swapping the class rather than wrapping the method means pool.recreate(), used by
+    # engine.dispose(), keeps the timing
+    pool.__class__ = type(f'Timed{base.__name__}', (base,), {'_do_get': _do_get, 'timed': True})
+
+class JobCollector:
+    """Queued and running jobs by kind, read from the database at scrape time."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def collect(self):
+        from app import db
+        from app.models.job import Job
+        gauge = GaugeMetricFamily('parsgolf_jobs', 'Background jobs not yet finished',
+                                  labels=['kind', 'status'])
+        with self.app.app_context():
+            rows = db.session.execute(
+                db.select(Job.kind, Job.status, db.func.count())
+                .where(Job.status.in_(['queued', 'running']))
+                .group_by(Job.kind, Job.status))
+            for kind, status, count in rows:
+                gauge.add_metric([kind, status], count)
+        yield gauge
+
+class Metrics:
+    """Prometheus metrics served at /metrics."""
+
+    def init_app(self, app):
+        from app import db
+        with app.app_context():
+            for engine in db.engines.values():
+                instrument_pool(engine)
+        if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+            self.registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(self.registry)
+        else:
+            self.registry = REGISTRY
+        self.jobs = JobCollector(app)
+        app.before_request(self._start)
+        app.after_request(self._record_status)
+        app.teardown_request(self._finish)
+        before_render_template.connect(self._start_render, app)
+        template_rendered.connect(self._finish_render, app)
+        app.add_url_rule('/metrics', 'metrics', self.view)
+        app.extensions['metrics'] = self
+
+    def _start(self):
+        g.metrics_started = perf_counter()
+        REQUESTS_IN_PROGRESS.inc()
+
+    def _finish(self, exc):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        REQUESTS_IN_PROGRESS.dec()
+        blueprint = request.blueprint or ''
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_LATENCY.labels(blueprint, endpoint, request.method)\
+            .observe(perf_counter() - started)
+        status = 500 if exc is not None else g.pop('metrics_status', 200)
+        REQUESTS.labels(blueprint, endpoint, request.method, str(status)).inc()
+
+    def _record_status(self, response):
+        g.metrics_status = response.status_code
+        return response
+
+    def _start_render(self, app, template, context, **extra):
+        g.setdefault('metrics_renders', []).append(perf_counter())
+
+    def _finish_render(self, app, template, context, **extra):
+        renders = g.get('metrics_renders')
+        if renders:
+            TEMPLATE_RENDER.labels(template.name or 'string').observe(perf_counter() - renders.pop())
+
+    def view(self):
+        registry = CollectorRegistry()
+        for collector in (self.registry, self.jobs):
+            registry.register(collector)
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
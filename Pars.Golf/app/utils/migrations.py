@@ -0,0 +1,37 @@
+from flask.cli import ScriptInfo
+import click
+
+class Migrations:
+    """The `flask db` commands, with Flask-Migrate loaded only when one of them runs.
+
+    Flask-Migrate imports alembic and mako, which is most of the app's own import
+    time and wasted in web workers and every other CLI command.
+    """
+
+    def __init__(self):
+        self.db = None
+
+    def init_app(self, app, db):
+        self.db = db
+        app.cli.add_command(_MigrationsGroup(self, name='db', help='Perform database migrations.'))
+
+    def load(self, app):
+        from flask_migrate import Migrate
+        from flask_migrate.cli import db as group
+        if 'migrate' not in app.extensions:
+            Migrate(app, self.db)
+        return group
+
+class _MigrationsGroup(click.Group):
+    def __init__(self, migrations, **kwargs):
+        super().__init__(**kwargs)
+        self.migrations = migrations
+
+    def _group(self, ctx):
+        return self.migrations.load(ctx.ensure_object(ScriptInfo).load_app())
+
+    def list_commands(self, ctx):
+        return self._group(ctx).list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self._group(ctx).get_command(ctx, name)
@@ -1,6 +1,5 @@
 from flask import url_for, current_app, redirect, request, session
 import json
-from rauth import OAuth1Service, OAuth2Service
 from urllib.parse import urlencode
 import urllib.request
 
@@ -34,6 +33,7 @@ class OAuthSignIn:
 class GoogleSignIn(OAuthSignIn):
     def __init__(self):
         super(GoogleSignIn, self).__init__('google')
+        from rauth import OAuth2Service
         self.service = OAuth2Service(
             name='google',
             client_id=self.consumer_id,
@@ -72,6 +72,7 @@ class GoogleSignIn(OAuthSignIn):
 class TwitterSignIn(OAuthSignIn):
     def __init__(self):
         super(TwitterSignIn, self).__init__('twitter')
+        from rauth import OAuth1Service
         self.service = OAuth1Service(
             name='twitter',
             consumer_key=self.consumer_id,
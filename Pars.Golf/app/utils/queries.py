@@ -0,0 +1,128 @@
+from app import db
+from app.models.content import Club, Player, Course, Vote
+from app.models.user import User
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.orm import joinedload
+import threading
+
+CONTENT_MODELS = {'club': Club, 'player': Player, 'course': Course}
+
+# Loaders for pages that show related rows in a loop. Each one issues a fixed number of
+# queries however many rows come back, so templates never lazy-load per row.
+
+def user_by_username(username):
+    return User.query.options(joinedload(User.role)).filter_by(username=username).first_or_404()
+
+def votes_by_type(user):
+    """The user's votes grouped by content type, with the voted item loaded, in one query."""
+    votes = {content_type: [] for content_type in CONTENT_MODELS}
+    query = Vote.query.filter_by(user_id=user.id)\
+        .options(joinedload(Vote.club), joinedload(Vote.player), joinedload(Vote.course))\
+        .order_by(Vote.created_at.desc())
+    for vote in query:
+        votes[vote.content_type].append(vote)
+    return votes
+
+def submissions_by_type(user, approved=True):
+    return {content_type: model.query.filter_by(submitter_id=user.id, approved=approved).all()
+            for content_type, model in CONTENT_MODELS.items()}
+
+def pending_by_type():
+    """Items awaiting moderation, with their submitters."""
+    return {content_type: model.query.filter_by(approved=False)
+            .options(joinedload(model.submitter)).order_by(model.created_at).all()
+            for content_type, model in CONTENT_MODELS.items()}
+
+def users_with_roles():
+    return User.query.options(joinedload(User.role)).order_by(User.id).all()
+
+def activity_counts(users):
+    """Map user id -> {'votes': n, 'clubs': n, 'players': n, 'courses': n}.
+
+    One GROUP BY per table for the whole page instead of a count per user.
+    """
+    ids = [user.id for user in users]
+    counts = {id: {'votes': 0, 'clubs': 0, 'players': 0, 'courses': 0} for id in ids}
+    if not ids:
+        return counts
+    columns = [('votes', Vote.user_id)] + [(model.__tablename__, model.submitter_id)
+                                           for model in CONTENT_MODELS.values()]
+    for name, column in columns:
+        rows = db.session.execute(
+            db.select(column, db.func.count()).where(column.in_(ids)).group_by(column))
+        for user_id, count in rows:
+            counts[user_id][name] = count
+    return counts
+
+class QueryCounter:
+    """Counts the SQL statements the current thread executes while active."""
+
+    def __init__(self):
+        self.statements = []
+        self._thread = None
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        # Background job threads share the engine, leave their queries out
+        if threading.get_ident() == self._thread:
+            self.statements.append(statement)
+
+    def __enter__(self):
+        self._thread = threading.get_ident()
+        event.listen(db.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(db.engine, 'before_cursor_execute', self._record)
+
+@contextmanager
+def max_queries(limit):
+    """Fail with AssertionError if the block runs more than limit queries."""
+    with QueryCounter() as counter:
+        yield counter
+    if counter.count > limit:
+        raise AssertionError(f'{counter.count} queries, expected at most {limit}:\n' +
+                             '\n'.join(counter.statements))
+
+# Most queries each page may run, checked by 'flask query-budget'. Budgets allow for
+# cold fragment caches and include loading the logged-in user.
+QUERY_BUDGETS = {
+    '/': 10,
+    '/profile/{username}': 8,
+    '/admin': 11,
+    '/employee': 6,
+    '/clubs/': 8,
+    '/players/': 8,
+    '/courses/': 8,
+    '/search?q=golf': 6,
+}
+
+def check_query_budgets(app, user):
+    """Fetch each page in QUERY_BUDGETS as user and return (url, status, queries, limit, error) rows.
+
+    Each page is fetched once beforehand so one-off work (building the search index,
+    first leaderboard load) isn't counted. A page that raises (as errors do with
+    FLASK_DEBUG=1) is reported as a 500 with the exception as its error.
+    """
+    results = []
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
+    for url, limit in QUERY_BUDGETS.items():
+        url = url.format(username=user.username)
+        counter = QueryCounter()
+        try:
+            client.get(url)
+            # A fresh app context per request, so nothing is served from the last one's session
+            with app.app_context(), counter:
+                response = client.get(url)
+        except Exception as e:
+            results.append((url, 500, counter.count, limit, f'{type(e).__name__}: {e}'))
+            continue
+        results.append((url, response.status_code, counter.count, limit, None))
+    return results
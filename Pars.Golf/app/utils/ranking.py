@@ -0,0 +1,113 @@
+from flask import current_app
+from flask_sqlalchemy.pagination import Pagination
+from app import db
+from app.utils.facets import FACETS, facet_index
+from bisect import bisect_left, insort
+from threading import Lock
+from time import monotonic
+
+class Board:
+    """Approved items of one model matching a set of facet filters, ordered by votes.
+
+    Entries are kept as (-vote_count, -id) tuples so a plain sorted list gives the
+    same order as ORDER BY vote_count DESC, id DESC, the API's votes sort.
+    """
+
+    def __init__(self, model, filters):
+        self.model = model
+        self.filters = filters
+        self.entries = []
+        self.votes = {}
+        self.built_at = None
+
+    def build(self):
+        rows = db.session.query(self.model.id, self.model.vote_count)\
+            .filter_by(approved=True, **self.filters).all()
+        self.votes = {id: vote_count for id, vote_count in rows}
+        self.entries = sorted((-vote_count, -id) for id, vote_count in rows)
+        self.built_at = monotonic()
+
+    def matches(self, item):
+        return bool(item.approved) and all(
+            getattr(item, attr) == value for attr, value in self.filters.items()
+        )
+
+    def discard(self, id):
+        if id in self.votes:
+            key = (-self.votes.pop(id), -id)
+            index = bisect_left(self.entries, key)
+            if index < len(self.entries) and self.entries[index] == key:
+                del self.entries[index]
+
+    def update(self, item):
+        self.discard(item.id)
+        if self.matches(item):
+            self.votes[item.id] = item.vote_count
+            insort(self.entries, (-item.vote_count, -item.id))
+
+    def ids(self, offset, limit):
+        return [-id for _, id in self.entries[offset:offset + limit]]
+
+    def __len__(self):
+        return len(self.entries)
+
+class RankedPagination(Pagination):
+    """Pagination over a Board; only the rows on the requested page are loaded."""
+
+    def _query_items(self):
+        model = self._query_args['model']
+        ids = self._query_args['board'].ids(self._query_offset, self.per_page)
+        if not ids:
+            return []
+        rows = {item.id: item for item in model.query.filter(model.id.in_(ids))}
+        return [rows[id] for id in ids if id in rows]
+
+    def _query_count(self):
+        return len(self._query_args['board'])
+
+class Leaderboard:
+    """Per-process vote rankings for each content type and facet combination.
+
+    Boards are built lazily from the denormalized vote_count column and then kept
+    current by calling update() whenever a vote, approval or edit is committed.
+    Other workers pick up those changes when their copy expires after RANKING_TTL
+    seconds.
+    """
+
+    def __init__(self):
+        self._boards = {}
+        self._lock = Lock()
+
+    def board(self, model, **filters):
+        # Filter values come from the query string, so only keep boards for values some
+        # approved item has; anything else would grow the cache without bound
+        for attr in FACETS.get(model.__tablename__, ()):
+            if attr in filters and filters[attr] not in facet_index.counts(model, attr):
+                return Board(model, filters)
+        key = (model.__tablename__, tuple(sorted(filters.items())))
+        ttl = current_app.config['RANKING_TTL']
+        with self._lock:
+            board = self._boards.get(key)
+            if board is None or monotonic() - board.built_at > ttl:
+                board = Board(model, filters)
+                board.build()
+                self._boards[key] = board
+            return board
+
+    def paginate(self, model, page, per_page, **filters):
+        return RankedPagination(page=page, per_page=per_page, model=model,
+                                board=self.board(model, **filters))
+
+    def update(self, item):
+        with self._lock:
+            for board in self._boards.values():
+                if board.model is type(item):
+                    board.update(item)
+
+    def invalidate(self, model=None):
+        with self._lock:
+            for key in [key for key, board in self._boards.items()
+                        if model is None or board.model is model]:
+                del self._boards[key]
+
+leaderboard = Leaderboard()
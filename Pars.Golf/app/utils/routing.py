@@ -0,0 +1,42 @@
+from flask import current_app, g, has_app_context, request, session
+from flask_login import current_user
+from flask_sqlalchemy.session import Session
+from functools import wraps
+from sqlalchemy.sql import Select
+from time import time
+import random
+
+class RoutingSession(Session):
+    """Sends SELECTs to the replica picked for the request by @replica_reads.
+
+    Everything else (flushes, Core writes, SELECT ... FOR UPDATE, raw SQL) and any
+    query outside such a request goes to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and isinstance(clause, Select)
+                and clause._for_update_arg is None and has_app_context() and g.get('replica')):
+            return self._db.engines[g.replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def replica_reads(view):
+    """Read from a replica in this view, unless the user wrote something a moment ago.
+
+    Only for views that don't write: the replica may be a little behind, so a
+    user's own vote or edit could be missing, which is what the stickiness after
+    writes avoids.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        replicas = current_app.config['REPLICA_BINDS']
+        if replicas and session.get('_primary_until', 0) < time():
+            g.replica = random.choice(replicas)
+        return view(*args, **kwargs)
+    return wrapper
+
+def stick_to_primary(response):
+    # Successful writes pin the user to the primary until replicas have caught up
+    if (current_app.config['REPLICA_BINDS'] and request.method not in ('GET', 'HEAD', 'OPTIONS')
+            and response.status_code < 400 and current_user.is_authenticated):
+        session['_primary_until'] = time() + current_app.config['REPLICA_STICKY_SECONDS']
+    return response
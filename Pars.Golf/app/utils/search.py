@@ -0,0 +1,389 @@
+from flask import current_app
+from flask_sqlalchemy.pagination import Pagination
+from app import db
+from app.models.content import Club, Player, Course
+from collections import defaultdict
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from threading import Lock
+from time import monotonic
+import math
+import re
+
+MODELS = {'club': Club, 'player': Player, 'course': Course}
+CONTENT_TYPES = {model: content_type for content_type, model in MODELS.items()}
+
+TOKEN_RE = re.compile(r'\w+')
+
+def tokenize(value):
+    return [token.lower() for token in TOKEN_RE.findall(value or '')]
+
+def document(item):
+    """Return the (title, body) text indexed for an item. Title matches rank higher."""
+    if isinstance(item, Club):
+        return (' '.join(filter(None, [item.brand, item.name])),
+                ' '.join(filter(None, [item.club_type, item.description])))
+    if isinstance(item, Player):
+        return item.name or '', ' '.join(filter(None, [item.country, item.bio]))
+    return (item.name or '',
+            ' '.join(filter(None, [item.location, item.designer, item.description])))
+
+class SqliteBackend:
+    """FTS5 virtual table ranked with bm25.
+
+    Documents are keyed by rowid = object_id * 4 + type code, so updates and deletes
+    are rowid lookups rather than scans of the unindexed columns.
+    """
+
+    name = 'sqlite'
+    TYPE_CODES = {'club': 1, 'player': 2, 'course': 3}
+
+    def exists(self):
+        return db.session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'"
+        )).first() is not None
+
+    def create(self):
+        # Same as migration 8e4b2f6a1c37, for databases made with db.create_all()
+        db.session.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+            "content_type UNINDEXED, title, body, tokenize = 'porter unicode61')"
+        ))
+        db.session.commit()
+
+    def _rowid(self, content_type, object_id):
+        return object_id * 4 + self.TYPE_CODES[content_type]
+
+    def index_many(self, content_type, documents):
+        rows = [{'rowid': self._rowid(content_type, object_id), 'content_type': content_type,
+                 'title': title, 'body': body} for object_id, title, body in documents]
+        if not rows:
+            return
+        db.session.execute(text("DELETE FROM search_index WHERE rowid = :rowid"), rows)
+        db.session.execute(text(
+            "INSERT INTO search_index (rowid, content_type, title, body) "
+            "VALUES (:rowid, :content_type, :title, :body)"
+        ), rows)
+
+    def remove(self, content_type, object_id):
+        db.session.execute(text("DELETE FROM search_index WHERE rowid = :rowid"),
+                           {'rowid': self._rowid(content_type, object_id)})
+
+    def clear(self, content_type):
+        db.session.execute(text("DELETE FROM search_index WHERE content_type = :content_type"),
+                           {'content_type': content_type})
+
+    def _where(self, query, content_type):
+        # Quote every token so user input can't inject FTS5 query syntax
+        params = {'match': ' '.join(f'"{token}"' for token in tokenize(query))}
+        where = 'search_index MATCH :match'
+        if content_type:
+            where += ' AND content_type = :content_type'
+            params['content_type'] = content_type
+        return where, params
+
+    def search(self, query, content_type, limit, offset):
+        where, params = self._where(query, content_type)
+        rows = db.session.execute(text(
+            f"SELECT content_type, rowid FROM search_index WHERE {where} "
+            "ORDER BY bm25(search_index, 0, 10.0, 1.0) LIMIT :limit OFFSET :offset"
+        ), dict(params, limit=limit, offset=offset))
+        return [(row[0], row[1] // 4) for row in rows]
+
+    def count(self, query, content_type):
+        where, params = self._where(query, content_type)
+        return db.session.execute(text(f"SELECT count(*) FROM search_index WHERE {where}"),
+                                  params).scalar()
+
+class PostgresBackend:
+    """Weighted tsvector documents behind a GIN index, ranked with ts_rank_cd."""
+
+    name = 'postgres'
+
+    def exists(self):
+        return db.session.execute(text("SELECT to_regclass('search_documents')")).scalar() is not None
+
+    def create(self):
+        # Same as migration 8e4b2f6a1c37, for databases made with db.create_all()
+        db.session.execute(text(
+            "CREATE TABLE IF NOT EXISTS search_documents ("
+            "content_type VARCHAR(20) NOT NULL, "
+            "object_id INTEGER NOT NULL, "
+            "document TSVECTOR NOT NULL, "
+            "PRIMARY KEY (content_type, object_id))"
+        ))
+        db.session.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_search_documents_document "
+            "ON search_documents USING GIN (document)"
+        ))
+        db.session.commit()
+
+    def index_many(self, content_type, documents):
+        rows = [{'content_type': content_type, 'object_id': object_id, 'title': title, 'body': body}
+                for object_id, title, body in documents]
+        if not rows:
+            return
+        db.session.execute(text(
+            "INSERT INTO search_documents (content_type, object_id, document) "
+            "VALUES (:content_type, :object_id, "
+            "setweight(to_tsvector('english', :title), 'A') || "
+            "setweight(to_tsvector('english', :body), 'B')) "
+            "ON CONFLICT (content_type, object_id) DO UPDATE SET document = EXCLUDED.document"
+        ), rows)
+
+    def remove(self, content_type, object_id):
+        db.session.execute(text(
+            "DELETE FROM search_documents WHERE content_type = :content_type AND object_id = :object_id"
+        ), {'content_type': content_type, 'object_id': object_id})
+
+    def clear(self, content_type):
+        db.session.execute(text("DELETE FROM search_documents WHERE content_type = :content_type"),
+                           {'content_type': content_type})
+
+    def _where(self, query, content_type):
+        params = {'query': query}
+        where = 'document @@ websearch_to_tsquery(\'english\', :query)'
+        if content_type:
+            where += ' AND content_type = :content_type'
+            params['content_type'] = content_type
+        return where, params
+
+    def search(self, query, content_type, limit, offset):
+        where, params = self._where(query, content_type)
+        rows = db.session.execute(text(
+            f"SELECT content_type, object_id FROM search_documents WHERE {where} "
+            "ORDER BY ts_rank_cd(document, websearch_to_tsquery('english', :query)) DESC, object_id "
+            "LIMIT :limit OFFSET :offset"
+        ), dict(params, limit=limit, offset=offset))
+        return [(row[0], row[1]) for row in rows]
+
+    def count(self, query, content_type):
+        where, params = self._where(query, content_type)
+        return db.session.execute(text(f"SELECT count(*) FROM search_documents WHERE {where}"),
+                                  params).scalar()
+
+class MemoryBackend:
+    """Pure-Python inverted index scored with BM25, for databases without full-text support.
+
+    The index lives in each worker and is loaded from the database by its first
+    search; changes before that are picked up by the load. Other workers' changes
+    only reach it through a reload, SEARCH_TTL seconds after the last one.
+    """
+
+    name = 'memory'
+    TITLE_WEIGHT = 3
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self.postings = defaultdict(dict)  # token -> {(content_type, id): weighted term frequency}
+        self.documents = {}  # (content_type, id) -> (length, tokens)
+        self.loaded_at = None
+        self._lock = Lock()
+
+    @property
+    def loaded(self):
+        return self.loaded_at is not None
+
+    def exists(self):
+        return True
+
+    def create(self):
+        pass
+
+    def index_many(self, content_type, documents):
+        for object_id, title, body in documents:
+            key = (content_type, object_id)
+            frequencies = defaultdict(int)
+            for token in tokenize(title):
+                frequencies[token] += self.TITLE_WEIGHT
+            for token in tokenize(body):
+                frequencies[token] += 1
+            with self._lock:
+                self._remove(key)
+                for token, frequency in frequencies.items():
+                    self.postings[token][key] = frequency
+                self.documents[key] = (sum(frequencies.values()), tuple(frequencies))
+
+    def _remove(self, key):
+        _, tokens = self.documents.pop(key, (0, ()))
+        for token in tokens:
+            self.postings[token].pop(key, None)
+            if not self.postings[token]:
+                del self.postings[token]
+
+    def remove(self, content_type, object_id):
+        with self._lock:
+            self._remove((content_type, object_id))
+
+    def clear(self, content_type):
+        with self._lock:
+            for key in [key for key in self.documents if key[0] == content_type]:
+                self._remove(key)
+
+    def _ranked(self, query, content_type):
+        tokens = set(tokenize(query))
+        with self._lock:
+            if not tokens or any(token not in self.postings for token in tokens):
+                return []
+            total = len(self.documents)
+            average = sum(length for length, _ in self.documents.values()) / total
+            # Every token has to match, like the FTS backends
+            keys = set.intersection(*(set(self.postings[token]) for token in tokens))
+            if content_type:
+                keys = {key for key in keys if key[0] == content_type}
+            scores = {}
+            for key in keys:
+                length = self.documents[key][0]
+                score = 0.0
+                for token in tokens:
+                    postings = self.postings[token]
+                    idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                    frequency = postings[key]
+                    score += idf * frequency * (self.K1 + 1) / (
+                        frequency + self.K1 * (1 - self.B + self.B * length / average))
+                scores[key] = score
+        return sorted(scores, key=lambda key: (-scores[key], key))
+
+    def search(self, query, content_type, limit, offset):
+        return self._ranked(query, content_type)[offset:offset + limit]
+
+    def count(self, query, content_type):
+        return len(self._ranked(query, content_type))
+
+class SearchPagination(Pagination):
+    """Items are (content_type, item) pairs in relevance order."""
+
+    def _query_items(self):
+        if not tokenize(self._query_args['query']):
+            return []
+        index = self._query_args['index']
+        hits = index.searchable().search(self._query_args['query'], self._query_args['content_type'],
+                                         self.per_page, self._query_offset)
+        ids = defaultdict(list)
+        for content_type, object_id in hits:
+            ids[content_type].append(object_id)
+        loaded = {}
+        for content_type, object_ids in ids.items():
+            model = MODELS[content_type]
+            for item in model.query.filter(model.id.in_(object_ids), model.approved == True):
+                loaded[(content_type, item.id)] = item
+        return [(content_type, loaded[(content_type, object_id)])
+                for content_type, object_id in hits if (content_type, object_id) in loaded]
+
+    def _query_count(self):
+        if not tokenize(self._query_args['query']):
+            return 0
+        return self._query_args['index'].searchable().count(self._query_args['query'],
+                                                            self._query_args['content_type'])
+
+class SearchIndex:
+    """Full-text search over approved clubs, players and courses.
+
+    SEARCH_BACKEND picks 'sqlite' (FTS5), 'postgres' (tsvector/GIN) or 'memory';
+    'auto' uses whatever the database supports and falls back to memory. The
+    tables come from migrations, requests never create or fill them: run
+    `flask search-reindex` to build the index.
+    """
+
+    def __init__(self):
+        self._backend = None
+        self._lock = Lock()
+
+    def _configured_backend(self):
+        choice = current_app.config['SEARCH_BACKEND']
+        if choice == 'auto':
+            choice = {'sqlite': 'sqlite', 'postgresql': 'postgres'}.get(db.engine.dialect.name, 'memory')
+        return {'sqlite': SqliteBackend, 'postgres': PostgresBackend}.get(choice, MemoryBackend)()
+
+    def backend(self):
+        with self._lock:
+            if self._backend is None:
+                backend = self._configured_backend()
+                if not backend.exists():
+                    current_app.logger.warning(
+                        f'No {backend.name} search index, using an in-memory one. '
+                        'Run flask db upgrade and flask search-reindex.')
+                    backend = MemoryBackend()
+                self._backend = backend
+            return self._backend
+
+    def searchable(self):
+        """The backend, with an in-memory index loaded first, or reloaded once SEARCH_TTL has passed."""
+        backend = self.backend()
+        if isinstance(backend, MemoryBackend) and self._expired(backend):
+            with self._lock:
+                if self._backend is backend and self._expired(backend):
+                    # Built aside and swapped in, so searches already running never see it half loaded
+                    fresh = MemoryBackend()
+                    self._load(fresh, MODELS.values())
+                    self._backend = fresh
+                backend = self._backend
+        return backend
+
+    def _expired(self, backend):
+        return not backend.loaded or monotonic() - backend.loaded_at > current_app.config['SEARCH_TTL']
+
+    def _index_query(self, backend, model, query):
+        content_type = CONTENT_TYPES[model]
+        documents = []
+        for item in query.yield_per(1000):
+            documents.append((item.id, *document(item)))
+            if len(documents) >= 1000:
+                backend.index_many(content_type, documents)
+                documents = []
+        backend.index_many(content_type, documents)
+
+    def _load(self, backend, models):
+        for model in models:
+            backend.clear(CONTENT_TYPES[model])
+            self._index_query(backend, model, model.query.filter_by(approved=True))
+        db.session.commit()
+        if isinstance(backend, MemoryBackend):
+            backend.loaded_at = monotonic()
+
+    def _stale(self, backend):
+        # An in-memory index nobody searched yet reads the change when it loads
+        return isinstance(backend, MemoryBackend) and not backend.loaded
+
+    def index(self, item):
+        backend = self.backend()
+        if self._stale(backend):
+            return
+        if item.approved:
+            backend.index_many(CONTENT_TYPES[type(item)], [(item.id, *document(item))])
+        else:
+            backend.remove(CONTENT_TYPES[type(item)], item.id)
+        db.session.commit()
+
+    def index_ids(self, model, ids):
+        backend = self.backend()
+        if self._stale(backend):
+            return
+        self._index_query(backend, model, model.query.filter(model.id.in_(ids), model.approved == True))
+        db.session.commit()
+
+    def reindex(self, model=None):
+        """Rebuild the index for one model, or for everything.
+
+        Creates the tables first if the database was made with db.create_all().
+        """
+        backend = self._configured_backend()
+        try:
+            backend.create()
+        except OperationalError as e:
+            # e.g. SQLite compiled without FTS5
+            current_app.logger.warning(f'Full-text search unavailable, using in-memory index: {e}')
+            db.session.rollback()
+            backend = MemoryBackend()
+        # A new in-memory index has nothing yet, so it needs every model
+        models = [model] if model and not isinstance(backend, MemoryBackend) else MODELS.values()
+        with self._lock:
+            self._backend = backend
+            self._load(backend, models)
+
+    def search(self, query, content_type=None, page=1, per_page=20):
+        return SearchPagination(page=page, per_page=per_page, index=self, query=query,
+                                content_type=content_type)
+
+search_index = SearchIndex()
@@ -0,0 +1,114 @@
+from tempfile import SpooledTemporaryFile
+from uuid import uuid4
+import os
+import shutil
+
+# For keys that are never overwritten, like content-hashed images
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+class LocalStorage:
+    """Files under a local directory, served from base_url if given."""
+
+    def __init__(self, root, base_url=None):
+        self.root = root
+        self.base_url = base_url
+
+    def _path(self, key):
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f'Invalid key {key!r}')
+        return path
+
+    def save(self, key, stream, content_type=None, immutable=False):
+        """Copy stream to key in chunks; readers never see a partial file."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial = f'{path}.{uuid4().hex}.part'
+        with open(partial, 'wb') as out:
+            shutil.copyfileobj(stream, out, 64 * 1024)
+        os.replace(partial, path)
+        return key
+
+    def open(self, key):
+        return open(self._path(key), 'rb')
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def url(self, key):
+        if self.base_url is None:
+            raise ValueError(f'{self.root} is not served')
+        return self.base_url + key
+
+    def presigned_url(self, key, expires=3600):
+        # Served files are public anyway
+        return self.url(key)
+
+class S3Storage:
+    """Objects under a prefix of an S3 bucket, or of any S3-compatible service via endpoint_url.
+
+    public_url is where the prefix is served from, e.g. a CDN; by default the
+    bucket's own URL, which needs a policy allowing public reads of the prefix.
+    """
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, region=None, public_url=None):
+        import boto3
+        self.client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region)
+        self.bucket = bucket
+        self.prefix = prefix
+        self.public_url = public_url or f"{self.client.meta.endpoint_url}/{bucket}/{prefix}"
+
+    def save(self, key, stream, content_type=None, immutable=False):
+        """Upload stream to key, in multipart chunks for large files."""
+        extra = {}
+        if content_type:
+            extra['ContentType'] = content_type
+        if immutable:
+            extra['CacheControl'] = IMMUTABLE
+        self.client.upload_fileobj(stream, self.bucket, self.prefix + key, ExtraArgs=extra)
+        return key
+
+    def open(self, key):
+        """A seekable local copy of the object, in memory unless it's large."""
+        copy = SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+        self.client.download_fileobj(self.bucket, self.prefix + key, copy)
+        copy.seek(0)
+        return copy
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+    def url(self, key):
+        return self.public_url + key
+
+    def presigned_url(self, key, expires=3600, method='get_object'):
+        """Temporary URL to read the object, or with method='put_object' to upload it directly."""
+        return self.client.generate_presigned_url(
+            method, Params={'Bucket': self.bucket, 'Key': self.prefix + key}, ExpiresIn=expires)
+
+class Storage:
+    """Where uploads are kept.
+
+    uploads holds files served to browsers (processed images), private holds
+    uploads waiting for background jobs (CSV imports, raw images). With
+    STORAGE_BACKEND='s3' both live in S3_BUCKET under 'uploads/' and 'private/',
+    so web and worker nodes don't need a shared disk.
+    """
+
+    def __init__(self):
+        self.uploads = None
+        self.private = None
+
+    def init_app(self, app):
+        if app.config['STORAGE_BACKEND'] == 's3':
+            options = {'bucket': app.config['S3_BUCKET'], 'endpoint_url': app.config['S3_ENDPOINT_URL'],
+                       'region': app.config['S3_REGION']}
+            self.uploads = S3Storage(prefix='uploads/', public_url=app.config['S3_PUBLIC_URL'], **options)
+            self.private = S3Storage(prefix='private/', **options)
+        else:
+            self.uploads = LocalStorage(app.config['UPLOAD_FOLDER'], '/static/uploads/')
+            self.private = LocalStorage(app.config['PRIVATE_FOLDER'])
+        app.extensions['storage'] = self
@@ -0,0 +1,73 @@
+from flask import current_app
+from threading import Event, Lock, Thread
+import atexit
+
+def surrogate_keys(model, id=None):
+    """Cache keys of a listing or item page, which double as their paths: 'clubs', 'clubs/12'."""
+    keys = [model.__tablename__]
+    if id is not None:
+        keys.append(f'{model.__tablename__}/{id}')
+    return keys
+
+class Purger:
+    """Refreshes pages in the nginx microcache after their content changes.
+
+    Keys are collected from the event hooks and sent once a second at most, so a
+    burst of votes on one item costs one refresh. Each key's page is requested
+    from HTTP_CACHE_PURGE_URL with X-Cache-Refresh, which nginx only accepts from
+    private addresses; it bypasses the cached copy and stores the new one. Listing
+    keys refresh the unfiltered first page, other pages of the listing expire with
+    HTTP_MICROCACHE_TTL. Does nothing unless HTTP_CACHE_PURGE_URL is set.
+    """
+
+    interval = 1
+
+    def __init__(self):
+        self.pending = set()
+        self.thread = None
+        self.stop = Event()
+        self._lock = Lock()
+
+    def purge(self, *keys):
+        app = current_app._get_current_object()
+        if not app.config['HTTP_CACHE_PURGE_URL']:
+            return
+        with self._lock:
+            self.pending.update(keys)
+        self.start(app)
+
+    def flush(self, app):
+        import requests  # only needed once purging is configured
+        with self._lock:
+            keys, self.pending = self.pending, set()
+        base = app.config['HTTP_CACHE_PURGE_URL'].rstrip('/')
+        for key in sorted(keys):
+            # Listings are served from /clubs/, items from /clubs/12
+            path = key if '/' in key else f'{key}/'
+            try:
+                requests.get(f'{base}/{path}', headers={'X-Cache-Refresh': '1'}, timeout=5)
+            except requests.RequestException as e:
+                app.logger.warning(f'Refreshing cached /{path} failed: {e}')
+        return len(keys)
+
+    def start(self, app):
+        if self.thread is not None:
+            return
+        with self._lock:
+            if self.thread is not None:
+                return
+            self.thread = Thread(target=self.run, args=(app,), daemon=True)
+            self.thread.start()
+            atexit.register(self.shutdown, app)
+
+    def run(self, app):
+        while not self.stop.is_set():
+            self.stop.wait(self.interval)
+            if self.pending:
+                self.flush(app)
+
+    def shutdown(self, app):
+        self.stop.set()
+        self.flush(app)
+
+purger = Purger()
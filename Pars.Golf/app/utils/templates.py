@@ -0,0 +1,46 @@
+from jinja2 import FileSystemBytecodeCache
+import os
+import stat
+
+class Templates:
+    """Compiled templates kept on disk in TEMPLATE_CACHE_DIR, shared by every worker.
+
+    A worker's first render of a template then loads its bytecode instead of
+    parsing and compiling the source; a changed source gets a new entry. Run
+    `flask precompile-templates` at build or deploy time to fill the cache ahead
+    of traffic.
+    """
+
+    def init_app(self, app):
+        directory = app.config['TEMPLATE_CACHE_DIR']
+        if directory and self.check_directory(app, directory):
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory, '%s.jinja')
+        app.extensions['templates'] = self
+
+    def check_directory(self, app, directory):
+        """Create the cache directory, or make sure no other user can write to the existing one.
+
+        Cached bytecode is executed, so a directory someone else owns or can write to
+        would let them run code in the app (as with CVE-2014-1402). Returns False, and
+        the app compiles templates in each worker, if the directory can't be used.
+        """
+        try:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            info = os.lstat(directory)
+            if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+                app.logger.warning(f'TEMPLATE_CACHE_DIR {directory} is not a directory owned by this user, '
+                                   'templates are compiled in each worker instead')
+                return False
+            if stat.S_IMODE(info.st_mode) != 0o700:
+                os.chmod(directory, 0o700)
+        except OSError as e:
+            app.logger.warning(f'TEMPLATE_CACHE_DIR unusable, templates are compiled in each worker instead: {e}')
+            return False
+        return True
+
+    def precompile(self, app):
+        """Load every template, writing any missing bytecode. Returns the template names."""
+        names = app.jinja_env.list_templates()
+        for name in names:
+            app.jinja_env.get_template(name)
+        return names
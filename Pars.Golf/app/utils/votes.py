@@ -0,0 +1,263 @@
+from flask import current_app
+from app import db
+from app.models.content import (Vote, VOTE_MODELS, OBJECT_TYPES, add_votes, remove_votes,
+                                adjust_vote_counts, toggle_vote)
+from app.utils.cache import RedisCache
+from app.utils.events import item_voted
+from threading import Event, Lock, Thread
+import atexit
+
+class LocalVotes:
+    """Buffered votes kept in this process."""
+
+    def __init__(self):
+        self.pending = {}  # (user_id, object_type, object_id) -> (voted in the database, wanted)
+        self.flushing = {}  # the batch being written, still authoritative until committed
+        self._lock = Lock()
+
+    def _buffered(self, key):
+        entry = self.pending.get(key) or self.flushing.get(key)
+        return None if entry is None else entry[1]
+
+    def get(self, key):
+        with self._lock:
+            return self._buffered(key)
+
+    def flip(self, key, stored):
+        """Flip the buffered vote, calling stored() for the database's if nothing is buffered."""
+        state = self.get(key)
+        if state is None:
+            state = stored()
+        with self._lock:
+            entry = self.pending.get(key)
+            if entry is None:
+                # Another request may have buffered it meanwhile, or a flush finished
+                current = self._buffered(key)
+                current = state if current is None else current
+                entry = (current, current)
+            voted = not entry[1]
+            self.pending[key] = (entry[0], voted)
+        return voted
+
+    def waiting(self):
+        return bool(self.pending)
+
+    def take(self):
+        with self._lock:
+            self.flushing, self.pending = self.pending, {}
+            return self.flushing
+
+    def done(self, batch):
+        with self._lock:
+            self.flushing = {}
+
+    def restore(self, batch):
+        with self._lock:
+            # Put them back. A toggle made since keeps its wanted state, but what it took to be
+            # in the database came from this unwritten batch, so the batch's own value wins
+            for key, entry in batch.items():
+                newer = self.pending.get(key)
+                self.pending[key] = entry if newer is None else (entry[0], newer[1])
+            self.flushing = {}
+
+class RedisVotes:
+    """Buffered votes kept in Redis, shared by every worker.
+
+    Each vote is a key holding the wanted state ('1' or '0'), listed in a set of
+    pending keys. Any worker's flush writes them all; a key is only removed if it
+    still holds the state that was written, so a toggle made during the flush is
+    kept for the next one. The keys have no TTL and must not be evicted: Redis needs
+    a volatile-* maxmemory-policy or noeviction, as with the cache's version counters.
+    """
+
+    def __init__(self, client, key_prefix='parsgolf:'):
+        self.client = client
+        self.prefix = key_prefix + 'votes:'
+        self.index = self.prefix + 'pending'
+        self.lock = self.prefix + 'flushing'
+
+    def _name(self, key):
+        return self.prefix + '%d:%d:%d' % key
+
+    def get(self, key):
+        value = self.client.get(self._name(key))
+        return None if value is None else value == b'1'
+
+    def flip(self, key, stored):
+        """Flip the buffered vote, calling stored() for the database's if nothing is buffered."""
+        import redis
+        name = self._name(key)
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(name)
+                    value = pipe.get(name)
+                    voted = not (stored() if value is None else value == b'1')
+                    pipe.multi()
+                    pipe.set(name, '1' if voted else '0')
+                    pipe.sadd(self.index, name)
+                    pipe.execute()
+                    return voted
+                except redis.WatchError:
+                    continue  # toggled concurrently, try again on top of that
+
+    def waiting(self):
+        return bool(self.client.scard(self.index))
+
+    def take(self):
+        # One flush at a time across workers; the lock expires if its holder dies
+        if not self.client.set(self.lock, 1, nx=True, px=30000):
+            return {}
+        names = [name.decode() for name in self.client.smembers(self.index)]
+        batch = {}
+        for name, value in zip(names, self.client.mget(names) if names else []):
+            if value is not None:
+                user_id, object_type, object_id = name[len(self.prefix):].split(':')
+                batch[(int(user_id), int(object_type), int(object_id))] = (None, value == b'1')
+        if not batch:
+            self.client.delete(self.lock)
+        return batch
+
+    def done(self, batch):
+        import redis
+        written = {self._name(key): b'1' if wanted else b'0' for key, (_, wanted) in batch.items()}
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(*written)
+                    unchanged = [name for name, value in zip(written, pipe.mget(list(written)))
+                                 if value == written[name]]
+                    pipe.multi()
+                    if unchanged:
+                        pipe.delete(*unchanged)
+                        pipe.srem(self.index, *unchanged)
+                    pipe.delete(self.lock)
+                    pipe.execute()
+                    return
+                except redis.WatchError:
+                    continue
+
+    def restore(self, batch):
+        # Nothing was removed, the next flush retries them
+        self.client.delete(self.lock)
+
+class VoteBuffer:
+    """Write-behind buffer for vote toggles.
+
+    A toggle only records the state the user wants their vote in, keyed by
+    (user_id, object_type, object_id), so clicking the same button repeatedly
+    coalesces into one change, or none if it ends where it started. A background
+    thread writes everything buffered every VOTE_FLUSH_INTERVAL ms in one
+    transaction, along with the vote_count changes; set it to 0 to write each
+    toggle in its request with toggle_vote() instead.
+
+    With CACHE_TYPE=redis the buffer lives in Redis: every worker sees every
+    buffered vote, and a worker killed mid-interval loses nothing, another worker's
+    flush writes its votes (provided Redis doesn't evict them, see RedisVotes). Otherwise it is per process: votes buffered when a
+    process is killed are lost (a normal shutdown flushes them), and two workers
+    can each buffer a toggle of the same vote, both decided from the database.
+    Either way vote_count only changes when the batch is written.
+    """
+
+    def __init__(self):
+        self.store = LocalVotes()
+        self.thread = None
+        self.stop = Event()
+        self._lock = Lock()
+        self._flush_lock = Lock()
+
+    def init_app(self, app):
+        backend = app.extensions['cache'].backend
+        if isinstance(backend, RedisCache):
+            self.store = RedisVotes(backend.client, backend.key_prefix)
+        else:
+            self.store = LocalVotes()
+
+    def key(self, user_id, item):
+        return (user_id, OBJECT_TYPES[type(item)], item.id)
+
+    def _stored(self, key):
+        user_id, object_type, object_id = key
+        return db.session.query(Vote.query.filter_by(
+            user_id=user_id, object_type=object_type, object_id=object_id).exists()).scalar()
+
+    def voted(self, user_id, item):
+        """Whether the user has voted for item, counting votes not yet written."""
+        return self.voted_on(user_id, type(item), item.id)
+
+    def voted_on(self, user_id, model, id):
+        key = (user_id, OBJECT_TYPES[model], id)
+        state = self.store.get(key)
+        return self._stored(key) if state is None else state
+
+    def toggle(self, user_id, item):
+        """Flip the user's vote on item and return whether they now have one.
+
+        The votes table is only read when nothing is buffered for this vote yet.
+        """
+        app = current_app._get_current_object()
+        if not app.config['VOTE_FLUSH_INTERVAL']:
+            voted = toggle_vote(user_id, item)
+            item_voted(item)
+            return voted
+        key = self.key(user_id, item)
+        voted = self.store.flip(key, lambda: self._stored(key))
+        self.start(app)
+        return voted
+
+    def flush(self):
+        """Write buffered votes and counts in one transaction. Needs an app context."""
+        with self._flush_lock:
+            batch = self.store.take()
+            if not batch:
+                return 0
+            try:
+                changed = self._write(batch)
+            except Exception:
+                db.session.rollback()
+                current_app.logger.exception(f'Writing {len(batch)} buffered votes failed')
+                self.store.restore(batch)
+                return 0
+            self.store.done(batch)
+        for object_type, ids in changed.items():
+            for item in VOTE_MODELS[object_type].query.filter(VOTE_MODELS[object_type].id.in_(ids)):
+                item_voted(item)
+        return len(batch)
+
+    def _write(self, batch):
+        # stored is None when the store doesn't know; add_votes and remove_votes skip what's already so
+        added = add_votes([key for key, (stored, wanted) in batch.items() if wanted and stored is not True])
+        removed = remove_votes([key for key, (stored, wanted) in batch.items()
+                                if not wanted and stored is not False])
+        changed = adjust_vote_counts(added, removed)
+        db.session.commit()
+        return changed
+
+    def start(self, app):
+        if self.thread is not None:
+            return
+        with self._lock:
+            if self.thread is not None:
+                return
+            self.thread = Thread(target=self.run, args=(app,), daemon=True)
+            self.thread.start()
+            atexit.register(self.shutdown, app)
+
+    def run(self, app):
+        interval = app.config['VOTE_FLUSH_INTERVAL'] / 1000
+        while not self.stop.is_set():
+            self.stop.wait(interval)
+            with app.app_context():
+                try:
+                    if self.store.waiting():
+                        self.flush()
+                except Exception:
+                    # e.g. Redis unreachable; the votes stay buffered for the next round
+                    current_app.logger.exception('Flushing buffered votes failed')
+
+    def shutdown(self, app):
+        self.stop.set()
+        with app.app_context():
+            self.flush()
+
+vote_buffer = VoteBuffer()
@@ -0,0 +1 @@
+"""Seeded datasets, load scenarios and latency reports. Run with `python -m benchmarks --help`."""
@@ -0,0 +1,194 @@
+"""python -m benchmarks seed|run|compare|plans|toggles|runtime|startup
+
+Runs against the database in DATABASE_URL, so point it at a scratch database.
+"""
+from app import create_app, db
+from benchmarks import plans as query_plans, report, runtime as server_runtime, startup as cold_start
+from benchmarks.scenarios import SCENARIOS, Dataset
+from benchmarks.seed import seed as seed_data
+from benchmarks.targets import AppTarget, HttpTarget
+from benchmarks.toggles import stress
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from time import perf_counter
+import click
+import json
+import random
+import sys
+
+@click.group()
+def cli():
+    pass
+
+@cli.command()
+@click.option('--scale', default=0.01, help='1.0 = 100k items per type, 1M users, 50M votes.')
+@click.option('--seed', default=1, help='Random seed, the same seed gives the same data.')
+@click.option('--skip-search', is_flag=True, help="Don't rebuild the search index afterwards.")
+def seed(scale, seed, skip_search):
+    """Bulk-load a generated dataset."""
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        started = datetime.utcnow()
+        counts = seed_data(scale, seed, reindex=not skip_search)
+        print(f'{counts} in {(datetime.utcnow() - started).total_seconds():.1f}s')
+
+def run_scenarios(app, names, iterations, concurrency, target_url, seed, warmup):
+    with app.app_context():
+        data = Dataset()
+
+    def worker(number):
+        rng = random.Random(seed * 1000 + number)
+        samples = []
+        for name in names:
+            target = HttpTarget(target_url) if target_url else AppTarget(app)
+            state = {}
+            for _ in range(warmup):
+                SCENARIOS[name](target, rng, data, state)
+            target.samples.clear()
+            for _ in range(max(1, iterations // concurrency)):
+                SCENARIOS[name](target, rng, data, state)
+            samples += target.samples
+        return samples
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return [sample for samples in executor.map(worker, range(concurrency)) for sample in samples]
+
+@cli.command()
+@click.option('--scenario', 'names', multiple=True, type=click.Choice(sorted(SCENARIOS)),
+              help='Scenario to run, repeatable (default: all but imports).')
+@click.option('--iterations', default=200, help='Iterations per scenario, split across threads.')
+@click.option('--concurrency', default=1, help='Threads making requests.')
+@click.option('--target', 'target_url', help='Base URL of a running server, e.g. gunicorn. '
+              'Defaults to the in-process test client.')
+@click.option('--seed', default=1)
+@click.option('--warmup', default=5, help='Unrecorded iterations per thread first.')
+@click.option('--output', help='Save the summary as JSON, e.g. to use as a baseline.')
+@click.option('--baseline', help='Compare with a saved summary and exit 1 on regressions.')
+@click.option('--tolerance', default=0.2, help='Allowed p95 growth over the baseline.')
+def run(names, iterations, concurrency, target_url, seed, warmup, output, baseline, tolerance):
+    """Run scenarios and report p50/p95/p99 latency and queries per request."""
+    app = create_app()
+    names = names or ['browse', 'profile', 'vote_storm']
+    samples = run_scenarios(app, names, iterations, concurrency, target_url, seed, warmup)
+    summary = report.summarize(samples)
+    print(report.render(summary))
+    if output:
+        report.save(output, summary, {
+            'scenarios': list(names), 'iterations': iterations, 'concurrency': concurrency,
+            'target': target_url or 'test-client', 'seed': seed,
+            'database': app.config['SQLALCHEMY_DATABASE_URI'].split(':')[0],
+            'created_at': datetime.utcnow().isoformat(),
+        })
+    if baseline:
+        check(report.load(baseline), summary, tolerance)
+
+@cli.command()
+@click.argument('baseline')
+@click.argument('current')
+@click.option('--tolerance', default=0.2)
+def compare(baseline, current, tolerance):
+    """Compare two saved summaries and exit 1 on regressions."""
+    check(report.load(baseline), report.load(current), tolerance)
+
+def check(baseline, current, tolerance):
+    regressions = report.compare(baseline, current, tolerance)
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    if regressions:
+        raise SystemExit(1)
+    print('No regressions against the baseline')
+
+@cli.command()
+@click.option('--index', 'names', multiple=True, help='Only this index, repeatable (default: all).')
+@click.option('--repeat', default=5, help='Runs per query, the median is reported.')
+@click.option('--output', help='Save the plans and timings as JSON.')
+def plans(names, repeat, output):
+    """Show query plans and timings of the hot queries with and without their indexes."""
+    app = create_app()
+    with app.app_context():
+        results = query_plans.compare_plans(names, repeat)
+        database = db.engine.dialect.name
+    print(query_plans.render(results))
+    if output:
+        with open(output, 'w') as f:
+            json.dump({'meta': {'database': database, 'repeat': repeat,
+                                'created_at': datetime.utcnow().isoformat()},
+                       'plans': results}, f, indent=2)
+
+@cli.command()
+@click.option('--toggles', default=5000, help='Total toggles to fire.')
+@click.option('--threads', default=32)
+@click.option('--users', default=50, help='Distinct users toggling.')
+@click.option('--items', default=2, help='Hot items per content type to toggle.')
+@click.option('--seed', default=1)
+def toggles(toggles, threads, users, items, seed):
+    """Toggle votes from many threads at once and exit 1 on errors or wrong counts."""
+    result = stress(create_app(), toggles, threads, users, items, seed)
+    print(f"{result['toggles']} toggles from {result['threads']} threads in {result['seconds']}s "
+          f"({result['per_second']}/s, p50 {result['p50']} ms, p99 {result['p99']} ms)")
+    for problem in result['problems'][:20]:
+        print(f'PROBLEM {problem}')
+    if result['problems']:
+        raise SystemExit(1)
+    print('Every vote and count is consistent')
+
+@cli.command()
+@click.option('--mode', 'modes', multiple=True, type=click.Choice(server_runtime.MODES),
+              help='Worker class to run, repeatable (default: sync, gthread and gevent).')
+@click.option('--scenario', default='listings', type=click.Choice(sorted(SCENARIOS)))
+@click.option('--iterations', default=1000, help='Iterations per mode, split across threads.')
+@click.option('--concurrency', default=32, help='Threads making requests.')
+@click.option('--workers', type=int, help="Worker processes for every mode (default: each mode's own sizing).")
+@click.option('--seed', default=1)
+@click.option('--output', help='Save the results as JSON.')
+def runtime(modes, scenario, iterations, concurrency, workers, seed, output):
+    """Start gunicorn in each worker mode and compare throughput on the same traffic."""
+    app = create_app()
+    results = []
+    for mode in modes or ['sync', 'gthread', 'gevent']:
+        with server_runtime.serve(mode, workers) as url:
+            # Warm up every worker's caches and connections before timing
+            run_scenarios(app, [scenario], concurrency * 5, concurrency, url, seed, 0)
+            started = perf_counter()
+            samples = run_scenarios(app, [scenario], iterations, concurrency, url, seed, 0)
+            elapsed = perf_counter() - started
+        times = sorted(sample.ms for sample in samples)
+        results.append({
+            'mode': mode, 'workers': workers, 'requests': len(samples),
+            'errors': sum(1 for sample in samples if sample.status >= 500),
+            'per_second': round(len(samples) / elapsed, 1),
+            'p50': round(report.percentile(times, 0.50), 2),
+            'p95': round(report.percentile(times, 0.95), 2),
+            'p99': round(report.percentile(times, 0.99), 2),
+        })
+    print(server_runtime.render(results))
+    if output:
+        with open(output, 'w') as f:
+            json.dump({'meta': {'scenario': scenario, 'iterations': iterations, 'concurrency': concurrency,
+                                'database': app.config['SQLALCHEMY_DATABASE_URI'].split(':')[0],
+                                'created_at': datetime.utcnow().isoformat()},
+                       'modes': results}, f, indent=2)
+
+@cli.command()
+@click.option('--target', 'targets', multiple=True, type=click.Choice(sorted(cold_start.TARGETS)),
+              help='What to start, repeatable (default: all).')
+@click.option('--repeat', default=10, help='Runs per target, min and median are reported.')
+@click.option('--profile', 'top', default=15, help='Packages to list by import time (0 to skip).')
+@click.option('--output', help='Save the timings and profile as JSON.')
+def startup(targets, repeat, top, output):
+    """Time cold starts of the app and the flask CLI, and show where import time goes."""
+    results = [cold_start.measure(name, repeat) for name in targets or cold_start.TARGETS]
+    print(cold_start.render(results))
+    packages = cold_start.profile()
+    if top:
+        print()
+        print(cold_start.render_profile(packages, top))
+    if output:
+        with open(output, 'w') as f:
+            json.dump({'meta': {'repeat': repeat, 'python': sys.version.split()[0],
+                                'created_at': datetime.utcnow().isoformat()},
+                       'targets': results, 'imports': dict(packages)}, f, indent=2)
+
+if __name__ == '__main__':
+    cli()
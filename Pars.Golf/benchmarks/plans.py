@@ -0,0 +1,112 @@
+"""Query plans and timings of the hot queries with and without their indexes.
+
+Each index is dropped inside a transaction, the query measured, and the
+transaction rolled back, so the database ends up as it started. Both SQLite and
+PostgreSQL have transactional DDL, but on PostgreSQL the DROP INDEX takes a lock
+on the table until the rollback, so don't point this at a live database.
+"""
+from app import db
+from app.models.content import Club, Player, Course, Vote
+from time import perf_counter
+import statistics
+
+def item_votes(model, object_type):
+    # One item's votes, as in reconcile_vote_counts
+    item_id = db.session.execute(db.select(db.func.max(model.id))).scalar() or 0
+    return db.select(db.func.count()).select_from(Vote)\
+        .where(Vote.object_type == object_type, Vote.object_id == item_id)
+
+def votes_per_item(object_type):
+    return db.select(Vote.object_id, db.func.count()).where(Vote.object_type == object_type)\
+        .group_by(Vote.object_id)
+
+def user_vote(object_type):
+    # Whether a user voted for an item, as on every item page and vote
+    user_id, item_id = db.session.execute(
+        db.select(Vote.user_id, Vote.object_id).filter_by(object_type=object_type).limit(1)).first() or (0, 0)
+    return db.select(Vote).filter_by(user_id=user_id, object_type=object_type, object_id=item_id)
+
+def approved(model, *order_by):
+    return db.select(model).filter_by(approved=True).order_by(*order_by).limit(12)
+
+def pending(model):
+    return db.select(model).filter_by(approved=False).order_by(model.created_at)
+
+# (index, label, query factory)
+PLANS = [
+    ('ix_votes_object', 'club vote count', lambda: item_votes(Club, Vote.CLUB)),
+    ('ix_votes_object', 'votes per club', lambda: votes_per_item(Vote.CLUB)),
+    ('ix_votes_object', 'player vote count', lambda: item_votes(Player, Vote.PLAYER)),
+    ('ix_votes_object', 'votes per player', lambda: votes_per_item(Vote.PLAYER)),
+    ('ix_votes_object', 'course vote count', lambda: item_votes(Course, Vote.COURSE)),
+    ('ix_votes_object', 'votes per course', lambda: votes_per_item(Vote.COURSE)),
+    ('uq_votes_user_object', "user's club vote", lambda: user_vote(Vote.CLUB)),
+    ('ix_clubs_approved_vote_count', 'club leaderboard build',
+     lambda: db.select(Club.id, Club.vote_count).filter_by(approved=True)),
+    ('ix_players_approved_vote_count', 'player leaderboard build',
+     lambda: db.select(Player.id, Player.vote_count).filter_by(approved=True)),
+    ('ix_courses_approved_vote_count', 'course leaderboard build',
+     lambda: db.select(Course.id, Course.vote_count).filter_by(approved=True)),
+    ('ix_clubs_approved_created_at', 'newest clubs', lambda: approved(Club, Club.created_at.desc())),
+    ('ix_players_approved_world_ranking', 'players by ranking',
+     lambda: approved(Player, Player.world_ranking)),
+    ('ix_courses_approved_difficulty_rating', 'courses by difficulty',
+     lambda: approved(Course, Course.difficulty_rating.desc())),
+    ('ix_clubs_pending_created_at', 'pending clubs', lambda: pending(Club)),
+    ('ix_players_pending_created_at', 'pending players', lambda: pending(Player)),
+    ('ix_courses_pending_created_at', 'pending courses', lambda: pending(Course)),
+]
+
+def explain(connection, statement, phase):
+    sql = str(statement.compile(connection, compile_kwargs={'literal_binds': True}))
+    if connection.dialect.name == 'postgresql':
+        return [row[0] for row in connection.exec_driver_sql(f'EXPLAIN {sql}')]
+    # pysqlite caches statements by their text, and a cached EXPLAIN isn't re-planned
+    # after the DROP INDEX, so each phase gets its own text.
+    # EXPLAIN QUERY PLAN rows are (id, parent, notused, detail)
+    return [row[3] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN /* {phase} */ {sql}')]
+
+def timed(connection, statement, repeat):
+    times = []
+    for _ in range(repeat):
+        started = perf_counter()
+        connection.execute(statement).fetchall()
+        times.append((perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+def measure(connection, statement, repeat, phase):
+    return {'plan': explain(connection, statement, phase), 'ms': round(timed(connection, statement, repeat), 3)}
+
+def compare_plans(names=None, repeat=5):
+    """Return [{index, label, without: {plan, ms}, with: {plan, ms}}] for the PLANS matching names."""
+    results = []
+    for index, label, factory in PLANS:
+        if names and index not in names:
+            continue
+        statement = factory()
+        table = statement.get_final_froms()[0].name
+        with db.engine.connect() as connection:
+            if index not in {ix['name'] for ix in db.inspect(connection).get_indexes(table)}:
+                raise RuntimeError(f'{index} is missing, run `flask db upgrade` first')
+            with_index = measure(connection, statement, repeat, 'with')
+            connection.rollback()
+            with connection.begin() as transaction:
+                if connection.dialect.name == 'sqlite':
+                    # pysqlite doesn't open a transaction for DDL by itself
+                    connection.exec_driver_sql('BEGIN')
+                connection.exec_driver_sql(f'DROP INDEX {index}')
+                without_index = measure(connection, statement, repeat, 'without')
+                transaction.rollback()
+        results.append({'index': index, 'label': label, 'without': without_index, 'with': with_index})
+    return results
+
+def render(results):
+    lines = []
+    for result in results:
+        before, after = result['without']['ms'], result['with']['ms']
+        speedup = f'{before / after:.1f}x' if after else '-'
+        lines.append(f"{result['label']} ({result['index']}): {before:.2f} -> {after:.2f} ms, {speedup}")
+        for name in ('without', 'with'):
+            lines.append(f'  {name} index:')
+            lines += [f'    {step}' for step in result[name]['plan']]
+    return '\n'.join(lines)
@@ -0,0 +1,67 @@
+"""Latency summaries and baseline comparison."""
+from collections import defaultdict
+import json
+import math
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+def summarize(samples):
+    """Group samples by label into {label: {count, errors, p50, p95, p99, mean, queries}}."""
+    grouped = defaultdict(list)
+    for sample in samples:
+        grouped[sample.label].append(sample)
+    summary = {}
+    for label, group in sorted(grouped.items()):
+        times = sorted(sample.ms for sample in group)
+        queries = [sample.queries for sample in group if sample.queries is not None]
+        summary[label] = {
+            'count': len(group),
+            'errors': sum(1 for sample in group if sample.status >= 500),
+            'p50': round(percentile(times, 0.50), 2),
+            'p95': round(percentile(times, 0.95), 2),
+            'p99': round(percentile(times, 0.99), 2),
+            'mean': round(sum(times) / len(times), 2),
+            'queries': round(sum(queries) / len(queries), 1) if queries else None,
+        }
+    return summary
+
+def render(summary):
+    lines = [f"{'label':28} {'count':>7} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8}"]
+    for label, row in summary.items():
+        queries = '-' if row['queries'] is None else f"{row['queries']:.1f}"
+        lines.append(f"{label:28} {row['count']:>7} {row['errors']:>6} {row['p50']:>9.1f} "
+                     f"{row['p95']:>9.1f} {row['p99']:>9.1f} {queries:>8}")
+    return '\n'.join(lines)
+
+def save(path, summary, meta):
+    with open(path, 'w') as f:
+        json.dump({'meta': meta, 'summary': summary}, f, indent=2)
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)['summary']
+
+def compare(baseline, current, tolerance=0.2, min_ms=1.0):
+    """Return a list of regressions of current against baseline.
+
+    A label regresses when its p95 grows by more than tolerance (and by more than
+    min_ms, so sub-millisecond noise doesn't count), when it runs more queries per
+    request, or when it starts returning server errors.
+    """
+    regressions = []
+    for label, row in current.items():
+        before = baseline.get(label)
+        if before is None:
+            continue
+        if row['p95'] > before['p95'] * (1 + tolerance) and row['p95'] - before['p95'] > min_ms:
+            regressions.append(f"{label}: p95 {before['p95']:.1f} -> {row['p95']:.1f} ms")
+        if row['queries'] is not None and before['queries'] is not None \
+                and row['queries'] > before['queries'] + 0.5:
+            regressions.append(f"{label}: {before['queries']} -> {row['queries']} queries per request")
+        if row['errors'] and not before['errors']:
+            regressions.append(f"{label}: {row['errors']} server errors")
+    return regressions
@@ -0,0 +1,62 @@
+"""Start gunicorn in a given worker mode on a free port, for comparing modes on the same traffic."""
+from contextlib import contextmanager
+from time import monotonic, sleep
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ['sync', 'gthread', 'gevent', 'eventlet']
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+@contextmanager
+def serve(worker_class, workers=None, threads=None, timeout=60):
+    """Run gunicorn.conf.py with worker_class and yield its base URL until the block exits."""
+    url = f'http://127.0.0.1:{free_port()}'
+    env = dict(os.environ, GUNICORN_BIND=url.split('//')[1], GUNICORN_WORKER_CLASS=worker_class,
+               # Not part of the comparison, and restarts would show up as latency spikes
+               GUNICORN_MAX_REQUESTS='0', SQL_STATS_SAMPLE_RATE='0')
+    if workers:
+        env['GUNICORN_WORKERS'] = str(workers)
+    if threads:
+        env['GUNICORN_THREADS'] = str(threads)
+    # A file rather than a pipe, which would block gunicorn once full
+    log = tempfile.TemporaryFile()
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', 'run:app'],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=log)
+    try:
+        deadline = monotonic() + timeout
+        while True:
+            if server.poll() is not None:
+                log.seek(0)
+                raise RuntimeError(f'gunicorn ({worker_class}) exited:\n{log.read().decode()}')
+            try:
+                requests.get(url + '/', timeout=1)
+                break
+            except requests.RequestException:
+                # Not listening yet, or a cold worker slower than the timeout on its first request
+                if monotonic() > deadline:
+                    raise RuntimeError(f'gunicorn ({worker_class}) did not start in {timeout}s')
+                sleep(0.1)
+        yield url
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        log.close()
+
+def render(results):
+    lines = [f"{'mode':10} {'workers':>7} {'requests':>9} {'errors':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"]
+    for row in results:
+        lines.append(f"{row['mode']:10} {row['workers'] or 'auto':>7} {row['requests']:>9} {row['errors']:>6} "
+                     f"{row['per_second']:>9.1f} {row['p50']:>9.1f} {row['p95']:>9.1f} {row['p99']:>9.1f}")
+    return '\n'.join(lines)
@@ -0,0 +1,111 @@
+"""Scripted user journeys. Each scenario makes one iteration's worth of requests."""
+from app import db
+from app.models.content import Club, Player, Course
+from app.models.user import User, Role
+from benchmarks.seed import PASSWORD, skewed
+from benchmarks.targets import Sample
+from time import sleep, perf_counter
+from urllib.parse import urlsplit
+import io
+import json
+
+LISTINGS = {'clubs': Club, 'players': Player, 'courses': Course}
+SORTS = {'clubs': ['votes', 'newest', 'name'], 'players': ['votes', 'ranking', 'name'],
+         'courses': ['votes', 'difficulty', 'name']}
+FACETS = {'clubs': ('brand', ['Titleist', 'Callaway', 'Ping']), 'players': ('country', ['USA', 'Japan'])}
+
+class Dataset:
+    """Ids to pick from, loaded once from the database the target is using."""
+
+    def __init__(self, max_users=10_000):
+        self.items = {name: [id for id, in db.session.execute(
+            db.select(model.id).where(model.approved == True).order_by(model.vote_count.desc()))]
+            for name, model in LISTINGS.items()}
+        self.users = [{'id': id, 'username': username, 'email': email, 'password': PASSWORD}
+                      for id, username, email in db.session.execute(
+                          db.select(User.id, User.username, User.email)
+                          .where(User.username.like('bench%')).limit(max_users))]
+        admin = db.session.execute(
+            db.select(User.id, User.username, User.email).join(Role)
+            .where(Role.name == 'Admin', User.username.like('bench%')).limit(1)).first()
+        self.admin = admin and {'id': admin.id, 'username': admin.username, 'email': admin.email,
+                                'password': PASSWORD}
+        if not self.users or not any(self.items.values()):
+            raise RuntimeError('No benchmark data, run `python -m benchmarks seed` first')
+
+    def item(self, rng, name):
+        # Items are ordered by votes, so popular ones come up more often, like real traffic
+        return self.items[name][skewed(rng, len(self.items[name]))]
+
+def browse(target, rng, data, state):
+    name = rng.choice(list(LISTINGS))
+    params = {'sort': rng.choice(SORTS[name]), 'page': rng.choice([1, 1, 1, 2, 3, rng.randint(1, 50)])}
+    if name in FACETS and rng.random() < 0.3:
+        facet, values = FACETS[name]
+        params[facet] = rng.choice(values)
+    query = '&'.join(f'{key}={value}' for key, value in params.items())
+    target.request(f'{name}.index', 'GET', f'/{name}/?{query}')
+    target.request(f'{name}.show', 'GET', f'/{name}/{data.item(rng, name)}')
+    if rng.random() < 0.2:
+        target.request('main.search', 'GET', f'/search?q={rng.choice(["forgiving tour", "links", "spin"])}')
+    if rng.random() < 0.2:
+        target.request('main.index', 'GET', '/')
+
+def listings(target, rng, data, state):
+    # Just the listing and item pages, e.g. to compare server setups
+    name = rng.choice(list(LISTINGS))
+    target.request(f'{name}.index', 'GET', f'/{name}/?sort={rng.choice(SORTS[name])}&page={rng.choice([1, 1, 2, 3])}')
+    target.request(f'{name}.show', 'GET', f'/{name}/{data.item(rng, name)}')
+
+API_SORTS = {'clubs': ['votes', 'newest', 'name'], 'players': ['votes', 'ranking', 'name'],
+             'courses': ['votes', 'difficulty', 'name']}
+
+def api(target, rng, data, state):
+    # Each iteration reads the next page of a listing, so later samples come from deep pages
+    name = rng.choice(list(LISTINGS))
+    sort = rng.choice(API_SORTS[name])
+    cursor = state.get((name, sort))
+    status, body, _ = target.request('api.index', 'GET', f'/api/v1/{name}?sort={sort}&limit=20'
+                                     + (f'&cursor={cursor}' if cursor else ''))
+    state[(name, sort)] = json.loads(body)['next_cursor'] if status == 200 else None
+    target.request('api.show', 'GET', f'/api/v1/{name}/{data.item(rng, name)}')
+
+def vote_storm(target, rng, data, state):
+    if 'user' not in state:
+        state['user'] = rng.choice(data.users)
+        target.login(state['user'])
+    name = rng.choice(list(LISTINGS))
+    # A narrow set of hot items, so votes contend on the same rows
+    item_id = data.items[name][skewed(rng, min(len(data.items[name]), 20))]
+    target.request(f'{name}.vote', 'POST', f'/{name}/{item_id}/vote')
+
+def profile(target, rng, data, state):
+    user = rng.choice(data.users)
+    target.request('main.profile', 'GET', f'/profile/{user["username"]}')
+
+def imports(target, rng, data, state, rows=1000):
+    if data.admin is None:
+        raise RuntimeError('Seed data has no admin user for the import scenario')
+    if 'user' not in state:
+        state['user'] = data.admin
+        target.login(data.admin)
+    csv = 'name,brand,club_type,price,release_year\n' + ''.join(
+        f'Imported {rng.randint(0, 10 ** 9)},{rng.choice(["Ping", "Mizuno"])},iron,{rng.randint(50, 500)},2024\n'
+        for _ in range(rows))
+    started = perf_counter()
+    status, _, headers = target.request('clubs.import', 'POST', '/clubs/import',
+                                        data={'csv_file': (io.BytesIO(csv.encode()), 'bench.csv')},
+                                        content_type='multipart/form-data')
+    if status != 302:
+        return
+    # Follow the job to completion and report the whole import as one sample
+    job_url = urlsplit(headers['Location']).path
+    for _ in range(600):
+        status, body, _ = target.request('jobs.status', 'GET', f'{job_url}/status')
+        if status != 200 or json.loads(body)['status'] in ('done', 'failed'):
+            break
+        sleep(0.1)
+    target.samples.append(Sample('import.job', (perf_counter() - started) * 1000, status, None))
+
+SCENARIOS = {'browse': browse, 'listings': listings, 'api': api, 'vote_storm': vote_storm, 'profile': profile,
+             'imports': imports}
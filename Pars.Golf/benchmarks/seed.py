@@ -0,0 +1,178 @@
+"""Bulk data generator for benchmarks.
+
+At scale 1.0 this creates 100k each of clubs, players and courses, 1M users and 50M votes.
+Rows are generated from a seeded RNG, so the same scale and seed give the same data, and
+written straight through the DBAPI: executemany on SQLite, COPY on PostgreSQL.
+"""
+from app import db
+from app.models.content import Vote
+from app.models.user import Role
+from app.utils.search import search_index
+from collections import Counter
+from datetime import datetime
+from itertools import islice
+from werkzeug.security import generate_password_hash
+import csv
+import io
+import random
+
+ITEMS = 100_000  # per content type
+USERS = 1_000_000
+VOTES = 50_000_000
+BATCH_SIZE = 50_000
+PASSWORD = 'benchmark'  # every generated user can log in with this
+
+BRANDS = ['Titleist', 'Callaway', 'TaylorMade', 'Ping', 'Mizuno', 'Cobra', 'Srixon', 'Cleveland']
+CLUB_TYPES = ['driver', 'fairway', 'hybrid', 'iron', 'wedge', 'putter']
+COUNTRIES = ['USA', 'England', 'Scotland', 'Spain', 'Australia', 'Japan', 'South Africa', 'Korea']
+LOCATIONS = ['Georgia, USA', 'Fife, Scotland', 'California, USA', 'Victoria, Australia',
+             'Co. Antrim, Northern Ireland', 'South Carolina, USA', 'Surrey, England']
+WORDS = ['forgiving', 'tour', 'distance', 'classic', 'links', 'parkland', 'precision', 'spin',
+         'launch', 'control', 'championship', 'coastal', 'heritage', 'modern', 'compact']
+
+def batched(rows, size=BATCH_SIZE):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+def copy_rows(table, columns, rows):
+    """Bulk-load an iterable of tuples into table."""
+    raw = db.engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        postgres = db.engine.dialect.name == 'postgresql'
+        placeholder = '?' if db.engine.dialect.paramstyle == 'qmark' else '%s'
+        statement = (f"INSERT INTO {table} ({', '.join(columns)}) "
+                     f"VALUES ({', '.join([placeholder] * len(columns))})")
+        for batch in batched(rows):
+            if postgres:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(batch)
+                buffer.seek(0)
+                cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                                   buffer)
+            else:
+                cursor.executemany(statement, batch)
+            raw.commit()
+    finally:
+        raw.close()
+
+def next_id(table):
+    return (db.session.execute(db.text(f'SELECT max(id) FROM {table}')).scalar() or 0) + 1
+
+def fix_sequences(tables):
+    # Rows were loaded with explicit ids, so Postgres sequences have to catch up
+    if db.engine.dialect.name == 'postgresql':
+        for table in tables:
+            db.session.execute(db.text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"))
+        db.session.commit()
+
+def ensure_roles():
+    for name in ['User', 'Player', 'Employee', 'Admin']:
+        if Role.query.filter_by(name=name).first() is None:
+            db.session.add(Role(name=name))
+    db.session.commit()
+    return {role.name: role.id for role in Role.query}
+
+def skewed(rng, count, skew=3):
+    """An index in range(count) where low indexes are much more popular."""
+    return int(count * rng.random() ** skew)
+
+def seed(scale=0.01, seed=1, log=print, reindex=True):
+    """Generate a dataset of the given scale and return the row counts written."""
+    rng = random.Random(seed)
+    roles = ensure_roles()
+    now = datetime.utcnow()
+    items = max(1, int(ITEMS * scale))
+    users = max(2, int(USERS * scale))
+    votes = int(VOTES * scale)
+    password_hash = generate_password_hash(PASSWORD)
+
+    def text(words=8):
+        return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+    first_user = next_id('users')
+    log(f'users: {users} from id {first_user}')
+    # The first generated user is an admin, for the import scenario
+    copy_rows('users', ['id', 'username', 'email', 'password_hash', 'role_id', 'created_at', 'last_login'],
+              ((first_user + n, f'bench{first_user + n}', f'bench{first_user + n}@bench.pars.golf',
+                password_hash, roles['Admin'] if n == 0 else roles['User'], now, now)
+               for n in range(users)))
+
+    first = {}
+    first['clubs'] = next_id('clubs')
+    log(f'clubs: {items} from id {first["clubs"]}')
+    copy_rows('clubs', ['id', 'name', 'brand', 'club_type', 'description', 'price', 'release_year',
+                        'approved', 'created_at', 'updated_at', 'vote_count', 'submitter_id'],
+              ((first['clubs'] + n, f'{rng.choice(WORDS).title()} {n}', rng.choice(BRANDS),
+                rng.choice(CLUB_TYPES), text(), round(rng.uniform(50, 600), 2),
+                rng.randint(2000, 2025), True, now, now, 0, first_user)
+               for n in range(items)))
+
+    first['players'] = next_id('players')
+    log(f'players: {items} from id {first["players"]}')
+    copy_rows('players', ['id', 'name', 'bio', 'country', 'world_ranking', 'pro_since', 'major_wins',
+                          'tour_wins', 'verified', 'approved', 'created_at', 'updated_at',
+                          'vote_count', 'submitter_id'],
+              ((first['players'] + n, f'Player {n}', text(20), rng.choice(COUNTRIES), n + 1,
+                rng.randint(1980, 2024), rng.randint(0, 5), rng.randint(0, 40), False, True,
+                now, now, 0, first_user)
+               for n in range(items)))
+
+    first['courses'] = next_id('courses')
+    log(f'courses: {items} from id {first["courses"]}')
+    copy_rows('courses', ['id', 'name', 'location', 'description', 'par', 'length_yards',
+                          'difficulty_rating', 'year_built', 'designer', 'is_public',
+                          'has_hosted_major', 'approved', 'created_at', 'updated_at',
+                          'vote_count', 'submitter_id'],
+              ((first['courses'] + n, f'{rng.choice(WORDS).title()} Links {n}', rng.choice(LOCATIONS),
+                text(15), rng.choice([70, 71, 72]), rng.randint(6000, 7800),
+                round(rng.uniform(5, 10), 1), rng.randint(1860, 2020), rng.choice(WORDS).title(),
+                rng.random() < 0.5, rng.random() < 0.05, True, now, now, 0, first_user)
+               for n in range(items)))
+
+    counts = {table: Counter() for table in first}
+    object_types = {'clubs': Vote.CLUB, 'players': Vote.PLAYER, 'courses': Vote.COURSE}
+
+    def generate_votes():
+        per_user = votes / users
+        written = 0
+        for n in range(users):
+            if written >= votes:
+                return
+            wanted = min(int(rng.uniform(0, 2 * per_user) + 0.5), votes - written, 3 * items)
+            chosen = set()
+            while len(chosen) < wanted:
+                chosen.add((rng.choice(('clubs', 'players', 'courses')), skewed(rng, items)))
+            for table, index in chosen:
+                item_id = first[table] + index
+                counts[table][item_id] += 1
+                yield (first_user + n, object_types[table], item_id, now)
+            written += wanted
+
+    log(f'votes: about {votes}')
+    copy_rows('votes', ['user_id', 'object_type', 'object_id', 'created_at'],
+              generate_votes())
+
+    for table, counter in counts.items():
+        log(f'{table}: setting vote counts on {len(counter)} rows')
+        raw = db.engine.raw_connection()
+        try:
+            placeholder = '?' if db.engine.dialect.paramstyle == 'qmark' else '%s'
+            cursor = raw.cursor()
+            for batch in batched(counter.items()):
+                cursor.executemany(f'UPDATE {table} SET vote_count = {placeholder} WHERE id = {placeholder}',
+                                   [(count, id) for id, count in batch])
+            raw.commit()
+        finally:
+            raw.close()
+
+    fix_sequences(['users', 'clubs', 'players', 'courses'])
+    if reindex:
+        log('rebuilding the search index')
+        search_index.reindex()
+    return {'users': users, 'items': items, 'votes': sum(sum(c.values()) for c in counts.values())}
@@ -0,0 +1,51 @@
+"""Time cold starts of the app and the flask CLI in fresh interpreters, and profile their imports."""
+from collections import Counter
+from statistics import median
+from time import perf_counter
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CREATE_APP = 'from app import create_app; create_app()'
+# What each target runs; 'python' is the interpreter alone, to subtract from the others
+TARGETS = {
+    'python': [sys.executable, '-c', 'pass'],
+    'app': [sys.executable, '-c', CREATE_APP],
+    'cli': [sys.executable, '-m', 'flask', '--app', 'run', 'routes'],
+}
+
+def measure(name, repeat):
+    """Wall time in ms of repeat runs of the target, after one unrecorded run to warm the disk cache."""
+    times = []
+    for run in range(repeat + 1):
+        started = perf_counter()
+        subprocess.run(TARGETS[name], cwd=ROOT, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if run:
+            times.append((perf_counter() - started) * 1000)
+    return {'target': name, 'runs': repeat, 'min': round(min(times), 1), 'median': round(median(times), 1)}
+
+def profile():
+    """Self import time in ms of create_app() by top-level package, largest first, from -X importtime."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', CREATE_APP], cwd=ROOT, check=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    packages = Counter()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or line.endswith('| imported package'):
+            continue
+        self_us, _, module = line.split(':', 1)[1].split('|')
+        packages[module.strip().split('.')[0]] += int(self_us)
+    return [(package, round(us / 1000, 1)) for package, us in packages.most_common()]
+
+def render(results):
+    lines = [f"{'target':8} {'runs':>5} {'min ms':>9} {'median ms':>10}"]
+    for row in results:
+        lines.append(f"{row['target']:8} {row['runs']:>5} {row['min']:>9.1f} {row['median']:>10.1f}")
+    return '\n'.join(lines)
+
+def render_profile(packages, top):
+    total = sum(ms for _, ms in packages)
+    lines = [f'Import time of create_app(): {total:.1f} ms', f"{'package':24} {'ms':>8} {'share':>6}"]
+    for package, ms in packages[:top]:
+        lines.append(f'{package:24} {ms:>8.1f} {ms / total:>6.0%}')
+    return '\n'.join(lines)
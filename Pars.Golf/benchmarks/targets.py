@@ -0,0 +1,77 @@
+"""Where scenario requests go: the Flask test client in-process, or a running server."""
+from app.utils.queries import QueryCounter
+from time import perf_counter
+import re
+import requests
+
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+CSRF_TOKEN = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+
+class Sample:
+    __slots__ = ('label', 'ms', 'status', 'queries')
+
+    def __init__(self, label, ms, status, queries):
+        self.label = label
+        self.ms = ms
+        self.status = status
+        self.queries = queries
+
+class AppTarget:
+    """Drives the app through its test client and counts queries directly."""
+
+    def __init__(self, app):
+        self.app = app
+        self.client = app.test_client()
+        self.samples = []
+
+    def login(self, user):
+        with self.client.session_transaction() as session:
+            session['_user_id'] = str(user['id'])
+            session['_fresh'] = True
+
+    def request(self, label, method, path, **kwargs):
+        with self.app.app_context(), QueryCounter() as counter:
+            started = perf_counter()
+            response = self.client.open(path, method=method, **kwargs)
+            elapsed = (perf_counter() - started) * 1000
+        self.samples.append(Sample(label, elapsed, response.status_code, counter.count))
+        return response.status_code, response.get_data(), response.headers
+
+class HttpTarget:
+    """Drives a running server, e.g. gunicorn, over HTTP.
+
+    Queries per request come from the Server-Timing header, so run the target with
+    SQL_STATS_SAMPLE_RATE=1 to get them for every request.
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+        self.samples = []
+
+    def login(self, user):
+        page = self.session.get(f'{self.base_url}/login').text
+        token = CSRF_TOKEN.search(page)
+        self.session.post(f'{self.base_url}/login', allow_redirects=False, data={
+            'csrf_token': token.group(1) if token else '',
+            'email': user['email'],
+            'password': user['password'],
+        })
+
+    def request(self, label, method, path, **kwargs):
+        if 'data' in kwargs and isinstance(kwargs['data'], dict):
+            # Test-client style uploads: {'field': (stream, filename)}
+            files = {key: value for key, value in kwargs['data'].items() if isinstance(value, tuple)}
+            if files:
+                kwargs['data'] = {key: value for key, value in kwargs['data'].items()
+                                  if key not in files}
+                kwargs['files'] = {key: (name, stream) for key, (stream, name) in files.items()}
+        kwargs.pop('content_type', None)
+        started = perf_counter()
+        response = self.session.request(method, self.base_url + path, allow_redirects=False,
+                                        **kwargs)
+        elapsed = (perf_counter() - started) * 1000
+        match = SERVER_TIMING_QUERIES.search(response.headers.get('Server-Timing', ''))
+        self.samples.append(Sample(label, elapsed, response.status_code,
+                                   int(match.group(1)) if match else None))
+        return response.status_code, response.content, response.headers
@@ -0,0 +1,84 @@
+"""Concurrent vote toggles against toggle_vote(), checked for lost or double-counted votes."""
+from app import db
+from app.models.content import Vote, VOTE_MODELS, toggle_vote
+from app.models.user import User
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+import random
+
+def hot_items(count):
+    """The most voted approved items of each type, where real toggles contend."""
+    return [(object_type, id) for object_type, model in VOTE_MODELS.items()
+            for id, in db.session.execute(db.select(model.id).filter_by(approved=True)
+                                          .order_by(model.vote_count.desc()).limit(count))]
+
+def stored_votes(users, items):
+    return set(db.session.execute(
+        db.select(Vote.user_id, Vote.object_type, Vote.object_id)
+        .where(Vote.user_id.in_(users), db.tuple_(Vote.object_type, Vote.object_id).in_(items))))
+
+def stored_counts(items):
+    counts = {}
+    for object_type, id in items:
+        model = VOTE_MODELS[object_type]
+        counts[(object_type, id)] = (
+            db.session.get(model, id).vote_count,
+            Vote.query.filter_by(object_type=object_type, object_id=id).count(),
+        )
+    return counts
+
+def stress(app, toggles=5000, threads=32, users=50, items=2, seed=1):
+    """Fire toggles from threads at a few hot items and check the outcome.
+
+    Each (user, item) pair must end up voted exactly when it started unvoted and was
+    toggled an odd number of times, and every vote_count must match its rows.
+    Returns a dict of timings and any problems found.
+    """
+    rng = random.Random(seed)
+    with app.app_context():
+        user_ids = [id for id, in db.session.execute(
+            db.select(User.id).where(User.username.like('bench%')).order_by(User.id).limit(users))]
+        targets = hot_items(items)
+        if not user_ids or not targets:
+            raise RuntimeError('No benchmark data, run `python -m benchmarks seed` first')
+        before = stored_votes(user_ids, targets)
+        db.session.remove()
+    plan = [(rng.choice(user_ids), *rng.choice(targets)) for _ in range(toggles)]
+
+    def toggle(key):
+        user_id, object_type, object_id = key
+        with app.app_context():
+            started = perf_counter()
+            try:
+                toggle_vote(user_id, db.session.get(VOTE_MODELS[object_type], object_id))
+            except Exception as e:
+                return key, perf_counter() - started, f'{type(e).__name__}: {e}'
+            return key, perf_counter() - started, None
+
+    started = perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(toggle, plan))
+    elapsed = perf_counter() - started
+
+    applied = Counter(key for key, _, error in results if error is None)
+    errors = Counter(error for _, _, error in results if error is not None)
+    expected = {key for key in set(plan) | before if (key in before) != (applied[key] % 2 == 1)}
+    with app.app_context():
+        after = stored_votes(user_ids, targets)
+        counts = stored_counts(targets)
+    problems = [f'{count} x {error}' for error, count in errors.items()]
+    problems += [f'user {key[0]} on {key[1]}/{key[2]}: expected voted={key in expected}, got voted={key in after}'
+                 for key in sorted(expected ^ after)]
+    problems += [f'{key[0]}/{key[1]}: vote_count {count} but {rows} vote rows'
+                 for key, (count, rows) in counts.items() if count != rows]
+    times = sorted(seconds * 1000 for _, seconds, _ in results)
+    return {
+        'toggles': toggles,
+        'threads': threads,
+        'seconds': round(elapsed, 2),
+        'per_second': round(toggles / elapsed, 1),
+        'p50': round(times[len(times) // 2], 2),
+        'p99': round(times[int(len(times) * 0.99)], 2),
+        'problems': problems,
+    }
@@ -4,10 +4,34 @@ from dotenv import load_dotenv
 basedir = os.path.abspath(os.path.dirname(__file__))
 load_dotenv(os.path.join(basedir, '.env'))
 
+def engine_options(url):
+    """Pool and timeout settings for a database URL, from the DB_* variables."""
+    if url.startswith('sqlite'):
+        return {}  # a local file, nothing to tune
+    options = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE') or 5),  # per worker process
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW') or 10),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT') or 30),
+        # Below the server's and any proxy's idle timeout, so no dead connections are handed out
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE') or 1800),
+        'pool_pre_ping': (os.environ.get('DB_POOL_PRE_PING') or '1').lower() in ('1', 'true', 'yes'),
+    }
+    statement_timeout = int(os.environ.get('DB_STATEMENT_TIMEOUT') or 30000)  # ms, 0 = none
+    if statement_timeout and url.startswith('postgresql'):
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+    return options
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-key-change-in-production'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'app.db')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    # Read replicas (comma separated URLs) for the listing, item and profile pages and the API
+    REPLICA_URLS = [url for url in (os.environ.get('DATABASE_REPLICA_URLS') or '').split(',') if url]
+    SQLALCHEMY_BINDS = {f'replica{i}': {'url': url, **engine_options(url)} for i, url in enumerate(REPLICA_URLS)}
+    REPLICA_BINDS = list(SQLALCHEMY_BINDS)
+    # After a vote or edit a user reads from the primary for this long, so they see their change
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS') or 10)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     OAUTH_CREDENTIALS = {
         'google': {
@@ -20,4 +44,58 @@ class Config:
         }
     }
     UPLOAD_FOLDER = os.path.join(basedir, 'app/static/uploads')
-    MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5MB max upload
\ No newline at end of file
+    MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5MB max upload
+    # Upload storage: 'local' (UPLOAD_FOLDER, and PRIVATE_FOLDER for uploads waiting on
+    # background jobs) or 's3' (S3_BUCKET on AWS or any S3-compatible service such as MinIO)
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND') or 'local'
+    PRIVATE_FOLDER = os.environ.get('PRIVATE_FOLDER') or os.path.join(basedir, 'instance')
+    S3_BUCKET = os.environ.get('S3_BUCKET') or 'parsgolf'
+    S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL') or None
+    S3_REGION = os.environ.get('S3_REGION') or None
+    # Where the bucket's uploads/ prefix is served from, e.g. a CDN (default: the bucket URL)
+    S3_PUBLIC_URL = os.environ.get('S3_PUBLIC_URL') or None
+    # Formats written besides the JPEG fallback, best first ('avif', 'webp')
+    IMAGE_FORMATS = (os.environ.get('IMAGE_FORMATS') or 'avif,webp').split(',')
+    # Seconds before a worker rebuilds its vote leaderboards from the database
+    RANKING_TTL = int(os.environ.get('RANKING_TTL') or 300)
+    # Same for the brand/type/country facet counts
+    FACET_TTL = int(os.environ.get('FACET_TTL') or 300)
+    # Fragment cache: 'simple' (per worker), 'redis' (shared) or 'null'. With 'simple' a change
+    # only invalidates the worker that made it, so run more than one worker with 'redis'
+    CACHE_TYPE = os.environ.get('CACHE_TYPE') or 'simple'
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL') or 'redis://localhost:6379/0'
+    CACHE_DEFAULT_TIMEOUT = int(os.environ.get('CACHE_DEFAULT_TIMEOUT') or 300)
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES') or 1000)
+    # Full-text search: 'auto', 'sqlite' (FTS5), 'postgres' (tsvector) or 'memory'
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND') or 'auto'
+    # Seconds before a worker reloads the in-memory search index, to pick up other workers' edits
+    SEARCH_TTL = int(os.environ.get('SEARCH_TTL') or 300)
+    # Rows written per transaction by the CSV/API importers
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE') or 1000)
+    # Background jobs: worker threads per web process (0 = only 'flask jobs-worker' runs them)
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS') or 1)
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL') or 1)
+    # Running jobs without a heartbeat for this many seconds are requeued and resumed
+    JOB_STALE_AFTER = int(os.environ.get('JOB_STALE_AFTER') or 300)
+    # Golf course API sync (point GOLF_API_URL at 'flask golf-api-stub' for local testing)
+    GOLF_API_URL = os.environ.get('GOLF_API_URL') or 'https://golfapi.io/api/v1'
+    GOLF_API_KEY = os.environ.get('GOLF_API_KEY') or ''
+    GOLF_API_WORKERS = int(os.environ.get('GOLF_API_WORKERS') or 4)  # concurrent page requests
+    GOLF_API_PAGE_SIZE = int(os.environ.get('GOLF_API_PAGE_SIZE') or 100)
+    GOLF_API_TIMEOUT = float(os.environ.get('GOLF_API_TIMEOUT') or 10)
+    GOLF_API_RETRIES = int(os.environ.get('GOLF_API_RETRIES') or 5)
+    # Votes are buffered and written in batches this often (ms); 0 writes each one in its request
+    VOTE_FLUSH_INTERVAL = int(os.environ.get('VOTE_FLUSH_INTERVAL') or 200)
+    # Seconds nginx and browsers may reuse anonymous listing and item pages without asking
+    HTTP_CACHE_MAX_AGE = int(os.environ.get('HTTP_CACHE_MAX_AGE') or 30)
+    # Seconds the nginx microcache serves them before revalidating with the app
+    HTTP_MICROCACHE_TTL = int(os.environ.get('HTTP_MICROCACHE_TTL') or 5)
+    # nginx address that changed pages are refreshed through, e.g. http://nginx ('' = off)
+    HTTP_CACHE_PURGE_URL = os.environ.get('HTTP_CACHE_PURGE_URL') or ''
+    # Compiled templates shared by the workers on this machine ('' = compile in each worker).
+    # Must be a 0700 directory owned by the app's user, loading bytecode from it runs code
+    TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR', os.path.join(basedir, 'instance', 'templates'))
+    # Fraction of requests whose SQL and template renders are timed (Server-Timing header, /admin/queries)
+    SQL_STATS_SAMPLE_RATE = float(os.environ.get('SQL_STATS_SAMPLE_RATE') or 0.1)
+    # Statements slower than this are logged with their endpoint
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS') or 100)
@@ -0,0 +1,95 @@
+"""gunicorn settings, sized from the machine and overridable with GUNICORN_* variables.
+
+GUNICORN_WORKER_CLASS picks the mode:
+  gthread (default)  processes with a pool of threads each
+  sync               one request per process
+  gevent, eventlet   cooperative workers, many concurrent requests per process; the
+                     psycopg2 driver is patched to yield while it waits on PostgreSQL
+
+With GUNICORN_PRELOAD=1 (the default) the app is imported once in the master and
+workers are forked from it, which starts them faster and shares memory. kill -HUP
+then restarts workers with the already loaded code; to deploy new code send USR2
+to start a new master, then QUIT to the old one once it's up.
+"""
+import importlib.util
+import os
+import shutil
+import tempfile
+
+def env_int(name, default):
+    return int(os.environ.get(name) or default)
+
+def env_flag(name, default):
+    return (os.environ.get(name) or default).lower() in ('1', 'true', 'yes')
+
+# Cores this process may run on, which in a container can be fewer than the host has
+cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+
+bind = os.environ.get('GUNICORN_BIND') or '0.0.0.0:5000'
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS') or 'gthread'
+if worker_class in ('gevent', 'eventlet'):
+    workers = env_int('GUNICORN_WORKERS', cores)
+    worker_connections = env_int('GUNICORN_WORKER_CONNECTIONS', 1000)
+elif worker_class == 'gthread':
+    workers = env_int('GUNICORN_WORKERS', cores + 1)
+    threads = env_int('GUNICORN_THREADS', 4)
+else:
+    workers = env_int('GUNICORN_WORKERS', cores * 2 + 1)
+
+preload_app = env_flag('GUNICORN_PRELOAD', '1')
+timeout = env_int('GUNICORN_TIMEOUT', 60)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = env_int('GUNICORN_KEEPALIVE', 5)  # nginx reuses its upstream connections
+# Restart each worker after a while to contain slow leaks, at staggered times so
+# they don't all restart together
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10)
+reload = env_flag('GUNICORN_RELOAD', '0')  # development only
+
+if worker_class in ('gevent', 'eventlet'):
+    # Patch before the app (and its locks and sockets) is imported, in the master when preloading
+    if worker_class == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+    else:
+        import eventlet
+        eventlet.monkey_patch()
+    if importlib.util.find_spec('psycopg2'):  # SQLite stays blocking
+        importlib.import_module(f'psycogreen.{worker_class}').patch_psycopg()
+
+# Workers share Prometheus samples through mmap'd files in this directory. It must be
+# set, and exist, before the app (and prometheus_client) is imported: with preload_app
+# the master opens its files while loading the app, before any server hook runs.
+metrics_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR',
+                                    os.path.join(tempfile.gettempdir(), 'parsgolf-metrics'))
+# Files left by a previous run would be added to this run's totals. gunicorn reads this
+# file again on HUP, so only clear them the first time in this master.
+if os.environ.get('PARSGOLF_METRICS_OWNER') != str(os.getpid()):
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.environ['PARSGOLF_METRICS_OWNER'] = str(os.getpid())
+os.makedirs(metrics_dir, exist_ok=True)
+
+def when_ready(server):
+    from config import Config
+    if Config.CACHE_TYPE == 'simple' and server.num_workers > 1:
+        server.log.warning('CACHE_TYPE=simple keeps a fragment cache per worker: edits and votes only '
+                           'invalidate the worker that handled them, the others serve stale '
+                           'fragments for up to CACHE_DEFAULT_TIMEOUT seconds. Use CACHE_TYPE=redis.')
+    if server.cfg.preload_app:
+        # Workers are forked with every template already loaded, none compiles on its first hit
+        from app import templates
+        templates.precompile(server.app.wsgi())
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        return
+    # Connections the master opened while loading the app would be shared with every
+    # worker; drop them from the worker's pools without closing the master's sockets
+    from app import db
+    with server.app.wsgi().app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
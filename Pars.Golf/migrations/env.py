@@ -69,13 +69,24 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info('No changes in schema detected.')
 
+    # the search index tables are created by raw SQL (8e4b2f6a1c37) rather than
+    # the models, so autogenerate shouldn't drop them
+    def include_object(object, name, type_, reflected, compare_to):
+        return not (type_ == 'table' and reflected and compare_to is None
+                    and name.startswith('search_'))
+
     connectable = current_app.extensions['migrate'].db.engine
 
     with connectable.connect() as connection:
+        # Index builds and backfills can take longer than DB_STATEMENT_TIMEOUT allows
+        if connection.dialect.name == 'postgresql':
+            connection.exec_driver_sql('SET statement_timeout = 0')
+            connection.commit()
         context.configure(
             connection=connection,
             target_metadata=target_metadata,
             process_revision_directives=process_revision_directives,
+            include_object=include_object,
             **current_app.extensions['migrate'].configure_args
         )
 
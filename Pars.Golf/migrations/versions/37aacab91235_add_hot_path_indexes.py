@@ -0,0 +1,67 @@
+"""Add hot path indexes
+
+Partial indexes for the approved listings and the moderation queue, and
+covering indexes for per-item vote counts (the unique constraints on votes
+lead with user_id, so they can't serve those).
+
+Revision ID: 37aacab91235
+Revises: 7d3a9e5c4f02
+Create Date: 2026-10-18 19:51:19.347159
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '37aacab91235'
+down_revision = '7d3a9e5c4f02'
+branch_labels = None
+depends_on = None
+
+# The WHERE clauses must read exactly like the queries' filters:
+# filter_by(approved=True) renders 'approved = 1' on SQLite, 'approved = true' on PostgreSQL
+APPROVED = {'sqlite_where': sa.text('approved = 1'), 'postgresql_where': sa.text('approved = true')}
+PENDING = {'sqlite_where': sa.text('approved = 0'), 'postgresql_where': sa.text('approved = false')}
+
+
+def where(condition):
+    return {'sqlite_where': sa.text(condition), 'postgresql_where': sa.text(condition)}
+
+
+INDEXES = [
+    ('ix_clubs_approved_vote_count', 'clubs', ['vote_count', 'id'], APPROVED),
+    ('ix_clubs_approved_created_at', 'clubs', ['created_at'], APPROVED),
+    ('ix_clubs_pending_created_at', 'clubs', ['created_at'], PENDING),
+    ('ix_players_approved_vote_count', 'players', ['vote_count', 'id'], APPROVED),
+    ('ix_players_approved_world_ranking', 'players', ['world_ranking'], APPROVED),
+    ('ix_players_pending_created_at', 'players', ['created_at'], PENDING),
+    ('ix_courses_approved_vote_count', 'courses', ['vote_count', 'id'], APPROVED),
+    ('ix_courses_approved_difficulty_rating', 'courses', ['difficulty_rating'], APPROVED),
+    ('ix_courses_pending_created_at', 'courses', ['created_at'], PENDING),
+    ('ix_votes_club', 'votes', ['content_type', 'club_id', 'user_id'], where('club_id IS NOT NULL')),
+    ('ix_votes_player', 'votes', ['content_type', 'player_id', 'user_id'], where('player_id IS NOT NULL')),
+    ('ix_votes_course', 'votes', ['content_type', 'course_id', 'user_id'], where('course_id IS NOT NULL')),
+]
+
+
+def upgrade():
+    postgresql = op.get_bind().dialect.name == 'postgresql'
+    existing = {}
+    for name, table, columns, options in INDEXES:
+        if table not in existing:
+            existing[table] = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+        # Databases made with db.create_all() already have them
+        if name in existing[table]:
+            continue
+        if postgresql:
+            # Don't hold a write lock on votes while a large table is indexed
+            with op.get_context().autocommit_block():
+                op.create_index(name, table, columns, postgresql_concurrently=True, **options)
+        else:
+            op.create_index(name, table, columns, **options)
+
+
+def downgrade():
+    for name, table, columns, options in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,41 @@
+"""Add vote counts
+
+Denormalized vote_count columns on clubs, players and courses, filled from the
+votes table.
+
+Revision ID: 5b1e0c7a9d21
+Revises: 08990e4fe939
+Create Date: 2026-10-18 19:51:14.402317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1e0c7a9d21'
+down_revision = '08990e4fe939'
+branch_labels = None
+depends_on = None
+
+TABLES = [('clubs', 'club'), ('players', 'player'), ('courses', 'course')]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table, content_type in TABLES:
+        # Databases made with db.create_all() already have it
+        if 'vote_count' in {column['name'] for column in inspector.get_columns(table)}:
+            continue
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('vote_count', sa.Integer(), server_default='0', nullable=False))
+        op.execute(
+            f"UPDATE {table} SET vote_count = (SELECT count(*) FROM votes "
+            f"WHERE votes.content_type = '{content_type}' AND votes.{content_type}_id = {table}.id)"
+        )
+
+
+def downgrade():
+    for table, _ in reversed(TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('vote_count')
@@ -0,0 +1,57 @@
+"""Add jobs
+
+Queue and progress of background jobs (imports, image processing, course API
+syncs).
+
+Revision ID: 6c2f8d4b3e10
+Revises: 5b1e0c7a9d21
+Create Date: 2026-10-18 19:51:15.873940
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6c2f8d4b3e10'
+down_revision = '5b1e0c7a9d21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases made with db.create_all() already have it
+    if sa.inspect(op.get_bind()).has_table('jobs'):
+        return
+    op.create_table('jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=32), nullable=True),
+    sa.Column('status', sa.String(length=16), nullable=True),
+    sa.Column('payload', sa.Text(), nullable=True),
+    sa.Column('checkpoint', sa.Integer(), nullable=True),
+    sa.Column('processed', sa.Integer(), nullable=True),
+    sa.Column('succeeded', sa.Integer(), nullable=True),
+    sa.Column('updated', sa.Integer(), nullable=True),
+    sa.Column('unchanged', sa.Integer(), nullable=True),
+    sa.Column('error_count', sa.Integer(), nullable=True),
+    sa.Column('errors', sa.Text(), nullable=True),
+    sa.Column('message', sa.Text(), nullable=True),
+    sa.Column('worker', sa.String(length=64), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('submitter_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['submitter_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_jobs_status'), ['status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_jobs_status'))
+
+    op.drop_table('jobs')
@@ -0,0 +1,45 @@
+"""Add course API sync
+
+Conditional-request state of synced API pages, and the API's id on courses so
+syncs upsert instead of duplicating.
+
+Revision ID: 7d3a9e5c4f02
+Revises: 6c2f8d4b3e10
+Create Date: 2026-10-18 19:51:17.120588
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d3a9e5c4f02'
+down_revision = '6c2f8d4b3e10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    # Databases made with db.create_all() already have them
+    if not inspector.has_table('sync_pages'):
+        op.create_table('sync_pages',
+        sa.Column('url', sa.String(length=255), nullable=False),
+        sa.Column('etag', sa.String(length=255), nullable=True),
+        sa.Column('last_modified', sa.String(length=64), nullable=True),
+        sa.Column('total_pages', sa.Integer(), nullable=True),
+        sa.Column('synced_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('url')
+        )
+    if 'external_id' not in {column['name'] for column in inspector.get_columns('courses')}:
+        with op.batch_alter_table('courses', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('external_id', sa.String(length=64), nullable=True))
+            batch_op.create_unique_constraint('courses_external_id_key', ['external_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('courses', schema=None) as batch_op:
+        batch_op.drop_constraint('courses_external_id_key', type_='unique')
+        batch_op.drop_column('external_id')
+
+    op.drop_table('sync_pages')
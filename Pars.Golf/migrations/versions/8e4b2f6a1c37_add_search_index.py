@@ -0,0 +1,53 @@
+"""Add search index
+
+The full-text search tables: an FTS5 table on SQLite, tsvector documents behind
+a GIN index on PostgreSQL. They aren't models, so autogenerate ignores them
+(see include_object in env.py). SQLite builds without FTS5 get nothing and
+search from an in-memory index. Run `flask search-reindex` afterwards to fill
+the index.
+
+Revision ID: 8e4b2f6a1c37
+Revises: a3c1d27b5e90
+Create Date: 2026-10-19 09:12:40.551832
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4b2f6a1c37'
+down_revision = 'a3c1d27b5e90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute(
+            "CREATE TABLE IF NOT EXISTS search_documents ("
+            "content_type VARCHAR(20) NOT NULL, "
+            "object_id INTEGER NOT NULL, "
+            "document TSVECTOR NOT NULL, "
+            "PRIMARY KEY (content_type, object_id))"
+        )
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_search_documents_document "
+            "ON search_documents USING GIN (document)"
+        )
+    elif bind.dialect.name == 'sqlite':
+        options = {row[0] for row in bind.execute(sa.text('PRAGMA compile_options'))}
+        if 'ENABLE_FTS5' in options:
+            op.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+                "content_type UNINDEXED, title, body, tokenize = 'porter unicode61')"
+            )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("DROP TABLE IF EXISTS search_documents")
+    elif bind.dialect.name == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS search_index")
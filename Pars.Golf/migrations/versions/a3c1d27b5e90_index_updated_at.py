@@ -0,0 +1,43 @@
+"""Index updated_at
+
+The listing and item pages stamp their ETags with max(updated_at) of the table,
+which is a single index lookup with these.
+
+Revision ID: a3c1d27b5e90
+Revises: fa4ee5fa1e44
+Create Date: 2026-10-18 22:14:37.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c1d27b5e90'
+down_revision = 'fa4ee5fa1e44'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_clubs_updated_at', 'clubs', ['updated_at']),
+    ('ix_players_updated_at', 'players', ['updated_at']),
+    ('ix_courses_updated_at', 'courses', ['updated_at']),
+]
+
+
+def upgrade():
+    postgresql = op.get_bind().dialect.name == 'postgresql'
+    for name, table, columns in INDEXES:
+        # Databases made with db.create_all() already have them
+        if name in {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}:
+            continue
+        if postgresql:
+            with op.get_context().autocommit_block():
+                op.create_index(name, table, columns, postgresql_concurrently=True)
+        else:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,44 @@
+"""Add polymorphic vote columns
+
+First of three steps moving votes from club_id/player_id/course_id and a
+content_type string to (object_type, object_id). This one only adds the new
+columns and their indexes, so it is safe to run while the previous release is
+serving traffic.
+
+Revision ID: e90808543f97
+Revises: 37aacab91235
+Create Date: 2026-10-18 20:24:03.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e90808543f97'
+down_revision = '37aacab91235'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nullable until the backfill has run, see fa4ee5fa1e44
+    op.add_column('votes', sa.Column('object_type', sa.SmallInteger(), nullable=True))
+    op.add_column('votes', sa.Column('object_id', sa.Integer(), nullable=True))
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index('uq_votes_user_object', 'votes', ['user_id', 'object_type', 'object_id'],
+                            unique=True, postgresql_concurrently=True)
+            op.create_index('ix_votes_object', 'votes', ['object_type', 'object_id'],
+                            postgresql_concurrently=True)
+    else:
+        op.create_index('uq_votes_user_object', 'votes', ['user_id', 'object_type', 'object_id'], unique=True)
+        op.create_index('ix_votes_object', 'votes', ['object_type', 'object_id'])
+
+
+def downgrade():
+    op.drop_index('ix_votes_object', table_name='votes')
+    op.drop_index('uq_votes_user_object', table_name='votes')
+    with op.batch_alter_table('votes', schema=None) as batch_op:
+        batch_op.drop_column('object_id')
+        batch_op.drop_column('object_type')
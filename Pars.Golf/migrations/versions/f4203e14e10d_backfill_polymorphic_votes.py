@@ -0,0 +1,47 @@
+"""Backfill polymorphic votes
+
+Copies the old columns into object_type/object_id in batches of primary keys,
+committing after each one, so no batch holds row locks for long and the
+previous release keeps voting meanwhile. Rows already converted are skipped,
+so it can be stopped and rerun.
+
+Revision ID: f4203e14e10d
+Revises: e90808543f97
+Create Date: 2026-10-18 20:24:03.118205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4203e14e10d'
+down_revision = 'e90808543f97'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 10000
+
+# Must match Vote.CLUB, Vote.PLAYER and Vote.COURSE
+CONVERT = sa.text(
+    "UPDATE votes SET "
+    "object_type = CASE content_type WHEN 'club' THEN 1 WHEN 'player' THEN 2 WHEN 'course' THEN 3 END, "
+    "object_id = CASE content_type WHEN 'club' THEN club_id WHEN 'player' THEN player_id "
+    "WHEN 'course' THEN course_id END "
+    "WHERE id > :low AND id <= :high AND object_id IS NULL"
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    low, high = bind.execute(sa.text('SELECT MIN(id) - 1, MAX(id) FROM votes')).one()
+    if high is None:
+        return
+    with op.get_context().autocommit_block():
+        while low < high:
+            bind.execute(CONVERT, {'low': low, 'high': low + BATCH_SIZE})
+            low += BATCH_SIZE
+
+
+def downgrade():
+    pass
@@ -0,0 +1,95 @@
+"""Drop old vote columns
+
+Last step of the move to (object_type, object_id). Run it once the release
+that writes only the new columns is deployed: it converts any votes the
+previous release added after the backfill, then drops the old columns, their
+unique constraints and indexes. The new release can't see those late votes, so
+a user may have voted for the same item again through it; the late copy is
+dropped. Both releases counted their vote, so vote_count is rebuilt from votes.
+
+Revision ID: fa4ee5fa1e44
+Revises: f4203e14e10d
+Create Date: 2026-10-18 20:24:03.118206
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fa4ee5fa1e44'
+down_revision = 'f4203e14e10d'
+branch_labels = None
+depends_on = None
+
+OBJECT_TYPE = "CASE {0}content_type WHEN 'club' THEN 1 WHEN 'player' THEN 2 WHEN 'course' THEN 3 END"
+OBJECT_ID = ("CASE {0}content_type WHEN 'club' THEN {0}club_id WHEN 'player' THEN {0}player_id "
+             "WHEN 'course' THEN {0}course_id END")
+COUNTED = [('clubs', 1), ('players', 2), ('courses', 3)]
+
+
+def upgrade():
+    # Votes the new release already stored for the same user and item win over late copies
+    op.execute(
+        "DELETE FROM votes WHERE object_id IS NULL AND EXISTS ("
+        "SELECT 1 FROM votes AS stored WHERE stored.object_id IS NOT NULL "
+        "AND stored.user_id = votes.user_id "
+        f"AND stored.object_type = {OBJECT_TYPE.format('votes.')} "
+        f"AND stored.object_id = {OBJECT_ID.format('votes.')})"
+    )
+    op.execute(
+        f"UPDATE votes SET object_type = {OBJECT_TYPE.format('')}, object_id = {OBJECT_ID.format('')} "
+        "WHERE object_id IS NULL"
+    )
+    # Anything still unset had no item to point at
+    op.execute("DELETE FROM votes WHERE object_type IS NULL OR object_id IS NULL")
+
+    for name in ('ix_votes_club', 'ix_votes_player', 'ix_votes_course'):
+        op.drop_index(name, table_name='votes', if_exists=True)
+    with op.batch_alter_table('votes', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_vote_club', type_='unique')
+        batch_op.drop_constraint('uq_vote_player', type_='unique')
+        batch_op.drop_constraint('uq_vote_course', type_='unique')
+        batch_op.drop_column('content_type')
+        batch_op.drop_column('club_id')
+        batch_op.drop_column('player_id')
+        batch_op.drop_column('course_id')
+        batch_op.alter_column('object_type', existing_type=sa.SmallInteger(), nullable=False)
+        batch_op.alter_column('object_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('user_id', existing_type=sa.Integer(), nullable=False)
+
+    for table, object_type in COUNTED:
+        op.execute(
+            f"UPDATE {table} SET vote_count = (SELECT count(*) FROM votes "
+            f"WHERE votes.object_type = {object_type} AND votes.object_id = {table}.id)"
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('votes', schema=None) as batch_op:
+        batch_op.alter_column('user_id', existing_type=sa.Integer(), nullable=True)
+        batch_op.alter_column('object_id', existing_type=sa.Integer(), nullable=True)
+        batch_op.alter_column('object_type', existing_type=sa.SmallInteger(), nullable=True)
+        batch_op.add_column(sa.Column('club_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('player_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('course_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('content_type', sa.String(length=20), nullable=True))
+        batch_op.create_foreign_key('fk_votes_club_id', 'clubs', ['club_id'], ['id'])
+        batch_op.create_foreign_key('fk_votes_player_id', 'players', ['player_id'], ['id'])
+        batch_op.create_foreign_key('fk_votes_course_id', 'courses', ['course_id'], ['id'])
+        batch_op.create_unique_constraint('uq_vote_club', ['user_id', 'club_id', 'content_type'])
+        batch_op.create_unique_constraint('uq_vote_player', ['user_id', 'player_id', 'content_type'])
+        batch_op.create_unique_constraint('uq_vote_course', ['user_id', 'course_id', 'content_type'])
+
+    op.execute(
+        "UPDATE votes SET "
+        "content_type = CASE object_type WHEN 1 THEN 'club' WHEN 2 THEN 'player' WHEN 3 THEN 'course' END, "
+        "club_id = CASE object_type WHEN 1 THEN object_id END, "
+        "player_id = CASE object_type WHEN 2 THEN object_id END, "
+        "course_id = CASE object_type WHEN 3 THEN object_id END"
+    )
+    for name, column in (('ix_votes_club', 'club_id'), ('ix_votes_player', 'player_id'),
+                         ('ix_votes_course', 'course_id')):
+        op.create_index(name, 'votes', ['content_type', column, 'user_id'],
+                        sqlite_where=sa.text(f'{column} IS NOT NULL'),
+                        postgresql_where=sa.text(f'{column} IS NOT NULL'))
@@ -1,6 +1,15 @@
-from app import create_app, db
+from app import create_app, db, templates
 from app.models.user import User, Role
-from app.models.content import Club, Player, Course, Vote
+from app.models.content import Club, Player, Course, Vote, reconcile_vote_counts
+from app.models.job import Job
+from app.utils.search import search_index
+from app.utils.jobs import work
+from app.utils.golf_api_stub import create_stub_app
+from app.utils.queries import check_query_budgets
+from threading import Event, Thread
+import click
+import os
+import socket
 
 app = create_app()
 
@@ -13,8 +22,81 @@ def make_shell_context():
         'Club': Club, 
         'Player': Player, 
         'Course': Course,
-        'Vote': Vote
+        'Vote': Vote,
+        'Job': Job
     }
 
+@app.cli.command('reconcile-votes')
+def reconcile_votes():
+    """Rebuild the cached vote counts from the votes table."""
+    fixed = reconcile_vote_counts()
+    for content_type, count in fixed.items():
+        print(f'{content_type}: corrected {count} vote counts')
+
+@app.cli.command('search-reindex')
+def search_reindex():
+    """Rebuild the full-text search index from the approved items."""
+    search_index.reindex()
+    print(f'Search index rebuilt ({search_index.backend().name} backend)')
+
+@app.cli.command('precompile-templates')
+def precompile_templates():
+    """Compile every template into the shared bytecode cache (TEMPLATE_CACHE_DIR)."""
+    if not app.config['TEMPLATE_CACHE_DIR']:
+        raise click.ClickException('TEMPLATE_CACHE_DIR is not set, there is no cache to fill')
+    if app.jinja_env.bytecode_cache is None:
+        raise click.ClickException(f"TEMPLATE_CACHE_DIR {app.config['TEMPLATE_CACHE_DIR']} can't be used, see the warning above")
+    names = templates.precompile(app)
+    print(f"Compiled {len(names)} templates into {app.config['TEMPLATE_CACHE_DIR']}")
+
+@app.cli.command('query-budget')
+@click.option('--username', help='User to browse as (defaults to the first admin).')
+def query_budget(username):
+    """Check that key pages stay within their query budgets, to catch N+1 regressions."""
+    if username:
+        user = User.query.filter_by(username=username).first()
+    else:
+        user = User.query.join(Role).filter(Role.name == 'Admin').first()
+    if user is None:
+        raise click.ClickException('No such user')
+    failed = False
+    for url, status, queries, limit, error in check_query_budgets(app, user):
+        ok = status < 400 and queries <= limit
+        failed = failed or not ok
+        print(f"{'ok' if ok else 'FAIL':4}  {url:30} {status}  {queries}/{limit} queries")
+        if error:
+            print(f'      {error}')
+    if failed:
+        raise SystemExit(1)
+
+@app.cli.command('jobs-worker')
+@click.option('--concurrency', default=1, help='Number of worker threads.')
+@click.option('--once', is_flag=True, help='Exit once the queue is empty.')
+def jobs_worker(concurrency, once):
+    """Process queued background jobs (imports) until interrupted."""
+    stop = Event()
+    threads = [Thread(target=work, args=(app, f'{socket.gethostname()}:{os.getpid()}:cli{i}', stop, once))
+               for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(1)
+    except KeyboardInterrupt:
+        # Stop claiming new jobs; jobs in flight run to completion before the threads exit.
+        # Interrupt again to abandon them: they're requeued once stale and resume from their checkpoint.
+        stop.set()
+
+@app.cli.command('golf-api-stub')
+@click.option('--port', default=5001)
+@click.option('--courses', default=1000, help='Number of generated courses.')
+@click.option('--rate-limit-every', default=0, help='Answer every Nth request with a 429.')
+@click.option('--fail-every', default=0, help='Answer every Nth request with a 503.')
+def golf_api_stub(port, courses, rate_limit_every, fail_every):
+    """Serve a local stand-in for the golf course API (set GOLF_API_URL=http://localhost:PORT)."""
+    create_stub_app(courses, rate_limit_every=rate_limit_every, fail_every=fail_every)\
+        .run(port=port, threaded=True)
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,55 @@
+from app import create_app, db
+from app.models.content import Club, Player, Course
+from app.models.user import User, Role
+from config import Config
+import pytest
+
+@pytest.fixture
+def app(tmp_path):
+    """An app on a fresh SQLite database with a few users and items of each kind."""
+    class TestConfig(Config):
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        SQLALCHEMY_BINDS = {}
+        REPLICA_BINDS = []
+        CACHE_TYPE = 'simple'
+        SEARCH_BACKEND = 'memory'
+        JOB_WORKERS = 0
+        TEMPLATE_CACHE_DIR = ''
+        HTTP_CACHE_PURGE_URL = ''
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        roles = {name: Role(name=name) for name in ['User', 'Player', 'Employee', 'Admin']}
+        admin = User(username='admin', email='admin@example.com', role=roles['Admin'])
+        admin.password = 'password'
+        golfer = User(username='golfer', email='golfer@example.com', role=roles['User'])
+        golfer.password = 'password'
+        db.session.add_all([*roles.values(), admin, golfer])
+        for i in range(5):
+            db.session.add(Club(name=f'Club {i}', brand='Brand', club_type='driver', approved=True, submitter=admin))
+            db.session.add(Player(name=f'Player {i}', country='US', approved=True, submitter=admin))
+            db.session.add(Course(name=f'Course {i}', location='Town', approved=True, submitter=admin))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def login(client):
+    """Sign the test client in as the named user without going through the login form."""
+    def login(username):
+        with client.application.app_context():
+            user_id = User.query.filter_by(username=username).one().id
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+    return login
@@ -0,0 +1,77 @@
+from flask import render_template
+from jinja2 import ChoiceLoader, DictLoader
+from app import db
+from app.models.content import Club, Player, Course
+from app.models.user import User, Role
+from app.utils import queries
+from app.utils.queries import QUERY_BUDGETS, check_query_budgets, max_queries
+import pytest
+
+def get_within_budget(app, client, url, limit):
+    client.get(url)  # fill the fragment cache and search index first
+    with app.app_context():
+        with max_queries(limit):
+            return client.get(url)
+
+@pytest.mark.parametrize('url, budget', [
+    ('/', '/'),
+    ('/profile/golfer', '/profile/{username}'),
+    ('/search?q=club', '/search?q=golf'),
+])
+def test_pages_stay_within_budget(app, client, login, url, budget):
+    login('golfer')
+    response = get_within_budget(app, client, url, QUERY_BUDGETS[budget])
+    assert response.status_code == 200
+
+# admin/dashboard.html isn't in the tree; this stands in for it and reads everything a
+# dashboard shows per row, so a lazy load per item or user would show up in the count
+ADMIN_DASHBOARD = """
+{% for item in pending_clubs + pending_players + pending_courses %}{{ item.name }} {{ item.submitter.username }}
+{% endfor %}
+{% for user in users %}{{ user.username }} {{ user.role.name }} {{ user_activity[user.id] }}
+{% endfor %}
+{% for role in roles %}{{ role.name }}{% endfor %}
+"""
+
+def add_pending(count):
+    admin = User.query.filter_by(username='admin').one()
+    role = Role.query.filter_by(name='User').one()
+    for i in range(count):
+        submitter = User(username=f'submitter{count}-{i}', email=f'submitter{count}-{i}@example.com', role=role)
+        db.session.add_all([submitter,
+                            Club(name=f'Pending club {i}', approved=False, submitter=submitter),
+                            Player(name=f'Pending player {i}', approved=False, submitter=admin),
+                            Course(name=f'Pending course {i}', approved=False, submitter=submitter)])
+    db.session.commit()
+
+def test_admin_dashboard_stays_within_budget(app, client, login):
+    app.jinja_env.loader = ChoiceLoader([app.jinja_env.loader,
+                                         DictLoader({'admin/dashboard.html': ADMIN_DASHBOARD})])
+    login('admin')
+    with app.app_context():
+        add_pending(2)
+    small = get_within_budget(app, client, '/admin', QUERY_BUDGETS['/admin'])
+    assert small.status_code == 200 and b'Pending club 1 submitter2-1' in small.data
+    with app.app_context():
+        add_pending(20)
+    # Ten times the rows, still the same handful of queries
+    assert get_within_budget(app, client, '/admin', QUERY_BUDGETS['/admin']).status_code == 200
+
+def test_max_queries_fails_over_limit(app):
+    with app.app_context():
+        with pytest.raises(AssertionError, match='2 queries, expected at most 1'):
+            with max_queries(1):
+                db.session.get(User, 1)
+                db.session.get(User, 2)
+
+def test_check_query_budgets_reports_each_page(app, monkeypatch):
+    app.add_url_rule('/broken', 'broken', lambda: render_template('missing.html'))
+    monkeypatch.setattr(queries, 'QUERY_BUDGETS', {'/broken': 1, '/profile/{username}': 8})
+    with app.app_context():
+        admin = User.query.filter_by(username='admin').one()
+        broken, profile = check_query_budgets(app, admin)
+    assert broken[:2] == ('/broken', 500)
+    assert broken[4] == 'TemplateNotFound: missing.html'
+    url, status, count, limit, error = profile
+    assert (url, status, error) == ('/profile/admin', 200, None)
+    assert 0 < count <= limit
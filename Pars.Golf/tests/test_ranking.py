@@ -0,0 +1,15 @@
+from app.models.content import Club
+from app.utils.ranking import Leaderboard
+
+def test_unknown_facet_values_get_no_board(app):
+    leaderboard = Leaderboard()
+    with app.app_context():
+        assert len(leaderboard.board(Club, brand='Brand')) == 5
+        for i in range(50):
+            assert len(leaderboard.board(Club, brand=f'made up {i}')) == 0
+        assert len(leaderboard._boards) == 1
+
+def test_ties_are_ranked_newest_first(app):
+    with app.app_context():
+        ids = Leaderboard().board(Club).ids(0, 10)
+        assert ids == sorted(ids, reverse=True)
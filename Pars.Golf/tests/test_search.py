@@ -0,0 +1,14 @@
+from app import db
+from app.models.content import Club
+from app.utils.search import SearchIndex
+
+def test_memory_index_reloads_after_search_ttl(app):
+    index = SearchIndex()
+    with app.app_context():
+        assert index.search('putter').total == 0
+        # Added by another worker: this one's index never hears of it
+        db.session.execute(db.insert(Club), [{'name': 'Putter', 'brand': 'Brand', 'approved': True}])
+        db.session.commit()
+        assert index.search('putter').total == 0
+        app.config['SEARCH_TTL'] = 0
+        assert index.search('putter').total == 1
@@ -0,0 +1,107 @@
+from app import db
+from app.models.content import Vote, VOTE_MODELS, toggle_vote
+from app.models.user import User
+from app.utils.votes import VoteBuffer
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import event
+import random
+import sqlite3
+import pytest
+
+@pytest.fixture
+def voters(app):
+    with app.app_context():
+        users = [User(username=f'voter{i}', email=f'voter{i}@example.com') for i in range(10)]
+        db.session.add_all(users)
+        db.session.commit()
+        items = [(object_type, id) for object_type, model in VOTE_MODELS.items()
+                 for id, in db.session.execute(db.select(model.id).order_by(model.id).limit(2))]
+        return [user.id for user in users], items
+
+def toggle_concurrently(app, plan, toggle, threads=8):
+    def run(key):
+        user_id, object_type, object_id = key
+        with app.app_context():
+            toggle(user_id, db.session.get(VOTE_MODELS[object_type], object_id))
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(run, plan))
+
+def assert_votes_match(app, plan):
+    """Every toggled pair is voted exactly when toggled an odd number of times, and counts match rows."""
+    toggles = Counter(plan)
+    with app.app_context():
+        stored = set(db.session.execute(db.select(Vote.user_id, Vote.object_type, Vote.object_id)))
+        assert stored == {key for key, count in toggles.items() if count % 2}
+        for object_type, model in VOTE_MODELS.items():
+            for item in model.query:
+                rows = Vote.query.filter_by(object_type=object_type, object_id=item.id).count()
+                assert item.vote_count == rows, item
+
+def make_plan(voters, toggles=400, seed=1):
+    users, items = voters
+    rng = random.Random(seed)
+    return [(rng.choice(users), *rng.choice(items)) for _ in range(toggles)]
+
+def test_concurrent_toggles_keep_vote_counts_exact(app, voters):
+    plan = make_plan(voters)
+    toggle_concurrently(app, plan, toggle_vote)
+    assert_votes_match(app, plan)
+
+def test_concurrent_buffered_toggles_keep_vote_counts_exact(app, voters):
+    app.config['VOTE_FLUSH_INTERVAL'] = 60000  # flushed by hand below, not by the buffer's thread
+    buffer = VoteBuffer()
+    buffer.init_app(app)
+    flushes = iter(range(10 ** 6))
+
+    def toggle(user_id, item):
+        buffer.toggle(user_id, item)
+        if next(flushes) % 25 == 0:
+            buffer.flush()
+
+    plan = make_plan(voters)
+    toggle_concurrently(app, plan, toggle)
+    with app.app_context():
+        buffer.flush()
+    assert_votes_match(app, plan)
+
+def test_failed_flush_keeps_votes_toggled_meanwhile(app, voters):
+    users, items = voters
+    app.config['VOTE_FLUSH_INTERVAL'] = 60000
+    buffer = VoteBuffer()
+    buffer.init_app(app)
+    with app.app_context():
+        object_type, object_id = items[0]
+        item = db.session.get(VOTE_MODELS[object_type], object_id)
+        buffer.toggle(users[0], item)
+        batch = buffer.store.take()  # the flush writing this batch fails...
+        buffer.toggle(users[0], item)  # ...after two more clicks
+        buffer.toggle(users[0], item)
+        buffer.store.restore(batch)
+        buffer.flush()
+    assert_votes_match(app, [(users[0], object_type, object_id)])
+
+def test_flush_writes_batches_larger_than_the_bind_parameter_limit(app, voters):
+    _, items = voters
+    object_type, object_id = items[0]
+    with app.app_context():
+        db.session.execute(db.insert(User), [{'username': f'many{i}', 'email': f'many{i}@example.com'}
+                                             for i in range(12000)])
+        db.session.commit()
+        plan = [(user_id, object_type, object_id) for user_id, in
+                db.session.execute(db.select(User.id).where(User.username.like('many%')))]
+    app.config['VOTE_FLUSH_INTERVAL'] = 60000
+    buffer = VoteBuffer()
+    buffer.init_app(app)
+    with app.app_context():
+        # Some builds raise SQLite's limit; hold it to the upstream default
+        db.engine.dispose()
+        event.listen(db.engine, 'connect', lambda connection, _: connection.setlimit(
+            sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 32766))
+        # As if every one of them had clicked, without 12000 lookups of their current vote
+        buffer.store.pending.update((key, (False, True)) for key in plan)
+        assert buffer.flush() == len(plan)
+        assert_votes_match(app, plan)
+        buffer.store.pending.update((key, (True, False)) for key in plan)
+        assert buffer.flush() == len(plan)
+    assert_votes_match(app, [])